@@ -0,0 +1,91 @@
+import threading
+
+
+class AnalysisWorker:
+    """
+    Background thread that runs one analysis at a time, latest request wins.
+
+    submit() hands a function and its arguments (a snapshot of the data,
+    not live buffers) to the thread and returns the request's generation
+    number. A request that is still waiting is replaced by a newer one;
+    a request that is already running finishes, but its result is
+    dropped if a newer one was submitted meanwhile. Results of current
+    requests go to on_result(generation, result) on the worker thread
+    (e.g. a Qt signal's emit, to post them to the GUI thread), which
+    should check is_current(generation) again before using them.
+
+    Qt-free; superseded counts the requests that were never delivered.
+    """
+
+    def __init__(self, on_result):
+        self.on_result = on_result
+        self.generation = 0
+        self.completed = 0
+        self.superseded = 0
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs), replacing a request that has not started yet."""
+        with self._condition:
+            self.generation += 1
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = (self.generation, func, args, kwargs)
+            self._condition.notify_all()
+            return self.generation
+
+    def cancel(self):
+        """Drop the waiting request and the result of the running one."""
+        with self._condition:
+            self.generation += 1
+            if self._pending is not None:
+                self.superseded += 1
+                self._pending = None
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def wait_idle(self, timeout=None):
+        """Block until no request is waiting or running; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._busy, timeout
+            )
+
+    def stop(self, timeout=1.0):
+        with self._condition:
+            self._stopping = True
+            self._pending = None
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stopping)
+                if self._stopping:
+                    return
+                generation, func, args, kwargs = self._pending
+                self._pending = None
+                self._busy = True
+
+            result = None
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                print(f"[ERROR] Analysis failed: {e}")
+                generation = None
+
+            if generation is not None and self.is_current(generation):
+                self.completed += 1
+                self.on_result(generation, result)
+            elif generation is not None:
+                self.superseded += 1
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
@@ -0,0 +1,511 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# The arc has ended at a falling edge after which the GPIO stays LOW this long (ms)
+ARC_END_LOW_MS = 5.0
+
+# Both pulses of a voltage zero-crossing double-pulse fall within this window (ms)
+DOUBLE_PULSE_WINDOW_MS = 2.0
+
+# Current zero-crossings are searched from the arc start (GPIO trigger) this long (ms)
+CURRENT_WINDOW_MS = 60.0
+
+# Mains frequency assumed when the zero-crossings do not give a period (Hz)
+NOMINAL_FREQUENCY_HZ = 50
+
+# Phase angles within this many degrees of 0 count as a resistive load
+RESISTIVE_PHASE_DEG = 5
+
+
+class GpioEdges:
+    """
+    Edge index arrays of a GPIO step series, computed once.
+
+    rising/falling hold the indices i where levels[i - 1] -> levels[i] goes
+    0 -> 1 / 1 -> 0. All arc timing questions are answered from these two
+    sorted arrays with searchsorted, so a whole analysis is linear in the
+    number of events (plus O(log n) per lookup) instead of rescanning the
+    series from every edge. Event times must be non-decreasing, as the
+    firmware's TIM2 timestamps are.
+    """
+
+    def __init__(self, times, levels):
+        self.times = np.asarray(times, dtype=np.float64)
+        levels = np.asarray(levels)
+        before, after = levels[:-1], levels[1:]
+        self.rising = np.flatnonzero((before == 0) & (after == 1)) + 1
+        self.falling = np.flatnonzero((before == 1) & (after == 0)) + 1
+
+    def __len__(self):
+        return len(self.times)
+
+    def arc_start(self):
+        """Arc start time: the first rising edge, or None."""
+        if len(self.times) < 2 or not len(self.rising):
+            return None
+        return self.times[self.rising[0]]
+
+    def arc_end(self, min_low_ms=ARC_END_LOW_MS):
+        """
+        Raw arc end: the first falling edge followed by at least min_low_ms of LOW.
+
+        For every falling edge but the last, LOW lasts until the next rising
+        edge. The last falling edge qualifies if the data continues for
+        min_low_ms after it (and it is not the final event).
+
+        Returns:
+            (raw_end_time, falling edge index), or (None, None)
+        """
+        times = self.times
+        falling = self.falling
+        if len(times) < 2 or not len(falling):
+            return None, None
+
+        qualifies = np.empty(len(falling), dtype=bool)
+        # A falling edge that is not the last always has a rising edge after it
+        next_rising = self.rising[np.searchsorted(self.rising, falling[:-1], side="right")]
+        qualifies[:-1] = times[next_rising] - times[falling[:-1]] >= min_low_ms
+        last = falling[-1]
+        qualifies[-1] = last < len(times) - 1 and times[-1] - times[last] >= min_low_ms
+
+        if not qualifies.any():
+            return None, None
+        end_idx = falling[np.argmax(qualifies)]
+        return times[end_idx], end_idx
+
+    def pulse_pair_duration(self, end_idx):
+        """
+        Duration of the first pulse pair after the arc end.
+
+        Time from the first rising edge to the second falling edge after
+        end_idx, or 0 if there are not two of each.
+        """
+        if end_idx >= len(self.times) - 1:
+            return 0
+        first_rising = np.searchsorted(self.rising, end_idx, side="right")
+        first_falling = np.searchsorted(self.falling, end_idx, side="right")
+        if first_rising + 1 >= len(self.rising) or first_falling + 1 >= len(self.falling):
+            return 0
+        return self.times[self.falling[first_falling + 1]] - self.times[self.rising[first_rising]]
+
+    def double_pulse_zero_crossings(self, raw_end_time=None, window_ms=DOUBLE_PULSE_WINDOW_MS):
+        """
+        Voltage zero-crossings marked by GPIO double-pulses.
+
+        A double-pulse starts at a rising edge t1 (not before raw_end_time)
+        and ends at the second falling edge t2 after it, less than window_ms
+        later; the zero-crossing is (t1 + t2) / 2. The search resumes after
+        t2, so double-pulses never overlap.
+
+        Returns:
+            List of zero-crossing timestamps in ms
+        """
+        times = self.times
+        rising = self.rising
+        falling = self.falling
+
+        # Candidate first edges; a double-pulse needs at least 4 events
+        candidates = rising[rising < len(times) - 3]
+        if raw_end_time is not None:
+            candidates = candidates[times[candidates] >= raw_end_time]
+
+        # Second falling edge after each candidate, within the window
+        second = np.searchsorted(falling, candidates, side="right") + 1
+        complete = second < len(falling)
+        candidates = candidates[complete]
+        ends = falling[second[complete]]
+        within = times[ends] - times[candidates] < window_ms
+        candidates = candidates[within]
+        ends = ends[within]
+
+        # Take the first match, then the first one that starts after its end
+        following = np.searchsorted(candidates, ends, side="right").tolist()
+        taken = []
+        k = 0
+        while k < len(following):
+            taken.append(k)
+            k = following[k]
+        taken = np.asarray(taken, dtype=np.int64)
+        zero_crossings = (times[candidates[taken]] + times[ends[taken]]) / 2.0
+        return zero_crossings.tolist()
+
+
+# States of ArcTracker
+IDLE = "idle"
+ARC = "arc"
+WAITING_LOW = "waiting_low"
+POST_ARC = "post_arc"
+
+
+class ArcTracker:
+    """
+    Incremental arc detector over the GPIO step series.
+
+    feed() takes the step points as they are appended to the series (the
+    LOW point at 0 ms, then expand_gpio_steps output) and advances a state
+    machine with constant work per point:
+
+        IDLE        -- waiting for the first rising edge: the arc start
+        ARC         -- GPIO toggling; a falling edge moves on to
+        WAITING_LOW -- the arc has ended if GPIO stays LOW for min_low_ms
+                       (the raw end time is that falling edge); a rising
+                       edge before that goes back to ARC
+        POST_ARC    -- timing the first pulse pair and collecting the
+                       voltage zero-crossing double-pulses
+
+    Like analyze_gpio(), the last falling edge so far also ends the arc
+    once the data continues min_low_ms past it, even if GPIO went HIGH
+    again; that end is provisional until another falling edge follows.
+
+    results() is the analyze_gpio() result for the points fed so far
+    (provided no rising edge shares its timestamp with the arc's final
+    falling edge), so it is up to date during the capture and the
+    stop-time analysis does not have to walk the series again.
+    """
+
+    def __init__(self, min_low_ms=ARC_END_LOW_MS, window_ms=DOUBLE_PULSE_WINDOW_MS):
+        self.min_low_ms = min_low_ms
+        self.window_ms = window_ms
+        self.reset()
+
+    def reset(self):
+        self.state = IDLE
+        self.points = 0
+        self.t_start = None
+        self.raw_end_time = None
+        self.pulse_pair_duration = None
+        self._level = None
+        self._fall_time = None  # Last falling edge before the arc end
+        self._provisional_end = False
+        self._pair_start = None
+        self._pair_fallings = 0
+        # Before the arc end every rising edge may start a double-pulse
+        self._double_pulses = _DoublePulseScanner(self.window_ms)
+
+    def feed(self, times, levels):
+        """Advance over a block of step points; True if the results changed."""
+        changed = False
+        for t, level in zip(np.asarray(times).tolist(), np.asarray(levels).tolist()):
+            changed |= self._point(t, level)
+        self.points += len(times)
+        return changed
+
+    def results(self):
+        """Arc timing in the format of analyze_gpio()."""
+        raw_end_time = self.raw_end_time
+        pulse_pair_duration = self.pulse_pair_duration
+        zero_crossings = self._double_pulses.zero_crossings
+        if self._provisional_end:
+            # No pulse pair or double-pulse has ended after the last falling edge
+            raw_end_time, pulse_pair_duration, zero_crossings = self._fall_time, 0, []
+
+        t_end = t_arc = None
+        if raw_end_time is not None:
+            t_end = raw_end_time - pulse_pair_duration / 2.0
+            t_arc = raw_end_time - self.t_start - pulse_pair_duration / 2.0
+        return {
+            "t_start": self.t_start,
+            "raw_end_time": raw_end_time,
+            "pulse_pair_duration": pulse_pair_duration,
+            "t_end": t_end,
+            "t_arc": t_arc,
+            "voltage_zero_crossings": list(zero_crossings),
+        }
+
+    def _point(self, t, level):
+        rising = self._level == 0 and level == 1
+        falling = self._level == 1 and level == 0
+        self._level = level
+        changed = False
+
+        if self.state == WAITING_LOW and t - self._fall_time >= self.min_low_ms:
+            self.raw_end_time = self._fall_time
+            self.pulse_pair_duration = 0
+            self.state = POST_ARC
+            # From now on only double-pulses after the arc end count
+            self._double_pulses = _DoublePulseScanner(self.window_ms)
+            changed = True
+
+        changed |= self._double_pulses.point(t, rising, falling)
+        if self.state == POST_ARC:
+            if self._pair_fallings < 2:
+                if rising and self._pair_start is None:
+                    self._pair_start = t
+                elif falling:
+                    self._pair_fallings += 1
+                    if self._pair_fallings == 2:
+                        self.pulse_pair_duration = t - self._pair_start
+                        changed = True
+        elif rising:
+            if self.state == IDLE:
+                self.t_start = t
+                changed = True
+            self.state = ARC
+        elif falling:
+            # A later falling edge withdraws the provisional end
+            changed |= self._provisional_end
+            self._provisional_end = False
+            self._fall_time = t
+            self.state = WAITING_LOW
+
+        if (
+            self.state == ARC
+            and self._fall_time is not None
+            and not self._provisional_end
+            and t - self._fall_time >= self.min_low_ms
+        ):
+            self._provisional_end = True
+            changed = True
+        return changed
+
+
+class _DoublePulseScanner:
+    """Online GpioEdges.double_pulse_zero_crossings: first match, then the next one after it."""
+
+    def __init__(self, window_ms):
+        self.window_ms = window_ms
+        self.zero_crossings = []
+        self._candidates = deque()  # [rising edge time, falling edges since], oldest first
+
+    def point(self, t, rising, falling):
+        candidates = self._candidates
+        # A double-pulse that has not ended yet can no longer end within the window
+        while candidates and t - candidates[0][0] >= self.window_ms:
+            candidates.popleft()
+        if falling:
+            for candidate in candidates:
+                candidate[1] += 1
+            if candidates and candidates[0][1] == 2:
+                self.zero_crossings.append((candidates[0][0] + t) / 2.0)
+                # The next double-pulse starts after this one
+                candidates.clear()
+                return True
+        elif rising:
+            candidates.append([t, 0])
+        return False
+
+
+def current_zero_crossings(times, values, start_time=None, end_time=None, hysteresis=0.0):
+    """
+    Zero-crossings of the current signal, interpolated linearly between samples.
+
+    The window is cut by binary search on the (increasing) time array: a
+    sample pair counts if its second sample lies in [start_time, end_time].
+    Without hysteresis every strict sign change (- to + or + to -) is a
+    crossing. With hysteresis > 0 the signal must move from <= -hysteresis
+    to >= +hysteresis (or back) to count, which rejects the double
+    crossings noise causes near zero; the crossing is then interpolated at
+    the last sign change before the threshold was reached, so on a noisy
+    signal it lags the true zero (about 0.5 ms for a 50 Hz sine with 10 %
+    noise, sampled at 10 kHz, and hysteresis 0.3 of its amplitude).
+
+    Args:
+        times: Sample times in ms
+        values: Signal values (V or kA)
+        start_time: Optional start of the detection window (ms)
+        end_time: Optional end of the detection window (ms)
+        hysteresis: Half-width of the dead band around zero (0 disables)
+
+    Returns:
+        List of zero-crossing timestamps in ms
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(times) < 2 or len(values) != len(times):
+        return []
+
+    first = 1
+    if start_time is not None:
+        first = max(1, int(np.searchsorted(times, start_time, side="left")))
+    stop = len(times)
+    if end_time is not None:
+        stop = int(np.searchsorted(times, end_time, side="right"))
+    if stop <= first:
+        return []
+
+    # Sample pairs (i - 1, i) for i in [first, stop)
+    t = times[first - 1 : stop]
+    v = values[first - 1 : stop]
+    if hysteresis > 0:
+        pairs = _hysteresis_crossings(v, hysteresis)
+    else:
+        before, after = v[:-1], v[1:]
+        pairs = np.flatnonzero(((before < 0) & (after > 0)) | ((before > 0) & (after < 0)))
+
+    # Interpolate all crossings at once
+    t0, t1 = t[pairs], t[pairs + 1]
+    v0, v1 = v[pairs], v[pairs + 1]
+    t_ratio = -v0 / (v1 - v0)
+    return (t0 + t_ratio * (t1 - t0)).tolist()
+
+
+def _hysteresis_crossings(values, hysteresis):
+    """Pair indices of the zero-crossings of a Schmitt trigger with thresholds +/- hysteresis."""
+    # Trigger state after each sample: +1 above, -1 below, carried through the dead band
+    state = np.where(values >= hysteresis, 1, np.where(values <= -hysteresis, -1, 0))
+    armed = np.flatnonzero(state)
+    if len(armed) < 2:
+        return np.zeros(0, dtype=np.int64)
+    switches = armed[1:][state[armed[1:]] != state[armed[:-1]]]
+
+    # Last sign change (pair index) before each switch
+    negative = values < 0
+    sign_changes = np.flatnonzero(negative[:-1] != negative[1:])
+    return sign_changes[np.searchsorted(sign_changes, switches, side="left") - 1]
+
+
+def analyze_gpio(times, levels):
+    """
+    Arc timing from the GPIO step series in one pass over its edges.
+
+    Args:
+        times: GPIO event times in ms
+        levels: Binary GPIO levels (0 or 1)
+
+    Returns:
+        dict with t_start, raw_end_time, pulse_pair_duration, t_end (raw end
+        corrected by half a pulse pair), t_arc and voltage_zero_crossings;
+        times that could not be detected are None
+    """
+    edges = GpioEdges(times, levels)
+    t_start = edges.arc_start()
+    raw_end_time, end_idx = edges.arc_end()
+    pulse_pair_duration = None
+    if end_idx is not None:
+        pulse_pair_duration = edges.pulse_pair_duration(end_idx)
+
+    # Calculate the corrected end time and arc duration
+    t_end = None
+    t_arc = None
+    if raw_end_time is not None:
+        t_end = raw_end_time - (pulse_pair_duration / 2.0)
+        if t_start is not None:
+            t_arc = raw_end_time - t_start - (pulse_pair_duration / 2.0)
+
+    return {
+        "t_start": t_start,
+        "raw_end_time": raw_end_time,
+        "pulse_pair_duration": pulse_pair_duration,
+        "t_end": t_end,
+        "t_arc": t_arc,
+        "voltage_zero_crossings": edges.double_pulse_zero_crossings(raw_end_time),
+    }
+
+
+def phase_analysis(voltage_zero_crossings, current_zero_crossings, max_pairs=5):
+    """
+    Phase angle between voltage and current from their zero-crossings.
+
+    The first crossing of each signal is skipped. The period is twice the
+    spacing of the next two voltage (else current) crossings, or the
+    nominal mains period. Each of the first max_pairs voltage crossings is
+    paired with the closest current crossing; the time difference, wrapped
+    into +/- half a period, gives the phase angle (positive: current lags).
+
+    Args:
+        voltage_zero_crossings: Voltage zero-crossing timestamps in ms
+        current_zero_crossings: Current zero-crossing timestamps in ms
+        max_pairs: Most voltage crossings to pair
+
+    Returns:
+        dict with pairs ((current, voltage, phase_deg) tuples), period_ms,
+        frequency_hz, mean/min/max_phase_deg, power_factor and load_type
+        ("Resistive", "Capacitive" or "Inductive"; the phase fields are None
+        without pairs), or None if either signal has fewer than 2 crossings
+    """
+    if len(voltage_zero_crossings) < 2 or len(current_zero_crossings) < 2:
+        return None
+    voltage = np.asarray(voltage_zero_crossings[1:], dtype=np.float64)
+    current = np.asarray(current_zero_crossings[1:], dtype=np.float64)
+
+    half_period_ms = None
+    if len(voltage) >= 2:
+        half_period_ms = voltage[1] - voltage[0]
+    elif len(current) >= 2:
+        half_period_ms = current[1] - current[0]
+    if half_period_ms is None or half_period_ms <= 0:
+        half_period_ms = 1000 / (NOMINAL_FREQUENCY_HZ * 2)
+    period_ms = float(half_period_ms * 2)
+
+    # Closest current crossing for each voltage crossing (first one on ties)
+    voltage = voltage[:max_pairs]
+    closest = current[np.argmin(np.abs(current[None, :] - voltage[:, None]), axis=1)]
+    time_diff_ms = closest - voltage
+    wrap = np.abs(time_diff_ms) > period_ms / 2
+    time_diff_ms[wrap] -= np.sign(time_diff_ms[wrap]) * period_ms
+    phases = time_diff_ms / period_ms * 360
+
+    result = {
+        "pairs": list(zip(closest.tolist(), voltage.tolist(), phases.tolist())),
+        "period_ms": period_ms,
+        "frequency_hz": 1000 / period_ms,
+        "mean_phase_deg": None,
+        "min_phase_deg": None,
+        "max_phase_deg": None,
+        "power_factor": None,
+        "load_type": None,
+    }
+    if len(phases):
+        mean_phase = sum(phases.tolist()) / len(phases)
+        result["mean_phase_deg"] = mean_phase
+        result["min_phase_deg"] = float(phases.min())
+        result["max_phase_deg"] = float(phases.max())
+        result["power_factor"] = abs(math.cos(math.radians(mean_phase)))
+        if abs(mean_phase) < RESISTIVE_PHASE_DEG:
+            result["load_type"] = "Resistive"
+        elif mean_phase < 0:  # Current leads voltage
+            result["load_type"] = "Capacitive"
+        else:
+            result["load_type"] = "Inductive"
+    return result
+
+
+def analyze_capture(
+    adc_times, current_values, gpio_times, gpio_levels, hysteresis=0.0, offset=0.0, timing=None
+):
+    """
+    Complete arc analysis of one capture: timing, zero-crossings and phase angle.
+
+    A pure function of the sample arrays, so it can run on a worker thread
+    or process against a snapshot of the capture. Current zero-crossings
+    are searched for CURRENT_WINDOW_MS from the arc start; if there is no
+    arc start or no crossing in that window, from the first GPIO timestamp.
+
+    Args:
+        adc_times: ADC sample times in ms
+        current_values: Signal for the current zero-crossings (dI/dt or integrated current)
+        gpio_times: GPIO step series times in ms
+        gpio_levels: Binary GPIO levels (0 or 1)
+        hysteresis: Dead band a current zero-crossing must clear
+        offset: Subtracted from current_values (ADC offset correction)
+        timing: analyze_gpio() results of the GPIO data if already known
+            (ArcTracker.results()); computed here otherwise
+
+    Returns:
+        dict with the analyze_gpio() results, current_zero_crossings and
+        phase (phase_analysis() of the corrected end time followed by the
+        voltage zero-crossings, and the current zero-crossings)
+    """
+    result = dict(timing) if timing is not None else analyze_gpio(gpio_times, gpio_levels)
+    t_start = result["t_start"]
+    if offset:
+        current_values = np.asarray(current_values) - offset
+
+    current = []
+    if t_start is not None:
+        current = current_zero_crossings(
+            adc_times, current_values, t_start, t_start + CURRENT_WINDOW_MS, hysteresis
+        )
+    if not current and len(gpio_times):
+        first = gpio_times[0]
+        current = current_zero_crossings(
+            adc_times, current_values, first, first + CURRENT_WINDOW_MS, hysteresis
+        )
+
+    voltage = [result["t_end"]] if result["t_end"] is not None else []
+    voltage += result["voltage_zero_crossings"]
+    result["current_zero_crossings"] = current
+    result["phase"] = phase_analysis(voltage, current)
+    return result
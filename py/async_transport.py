@@ -0,0 +1,170 @@
+"""
+asyncio transport for the serial reader.
+
+    python async_transport.py PORT [PORT ...] [--duration 5] [--mode trg|int]
+
+arms every device with one event loop, streams for --duration seconds and
+prints the packet counts per device.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from commands import INTMODE_CMD, START_CMD, STOP_CMD, TRGMODE_CMD
+from reader_core import ReaderCore
+
+READ_SIZE = 65536  # Most bytes taken per readiness callback
+
+
+class AsyncSerialTransport(ReaderCore):
+    """
+    ReaderCore driven by an asyncio event loop instead of a read thread.
+
+    open() registers the pyserial file descriptor with loop.add_reader, so
+    the loop wakes up as soon as bytes arrive, reads whatever is available
+    without blocking and feeds it to the same framer, batching and
+    recorder code as the thread. There is no read timeout to wait out:
+    close() takes effect immediately, and one loop can serve any number of
+    devices next to other coroutines. Callbacks run on the loop.
+
+    With batch_interval > 0 a loop timer delivers the batch in progress
+    when the line goes quiet, as the read timeout does for the thread.
+
+    Needs a selector event loop with add_reader (Linux and other POSIX
+    systems; not the Windows proactor loop).
+    """
+
+    def __init__(self, port, baudrate=115200, batch_interval=None, on_packet=None, on_batch=None):
+        super().__init__(port, baudrate, batch_interval, on_packet=on_packet, on_batch=on_batch)
+        self.read_thread = None
+        self.loop = None
+        self._fd = None
+        self._flush_handle = None
+        self._closed = None
+        self._read_ns = 0  # Start of the read that emptied the driver's buffer
+
+    async def open(self):
+        """Start reading on the running loop."""
+        self.loop = asyncio.get_running_loop()
+        self._fd = self.ser.fileno()
+        self._closed = self.loop.create_future()
+        self.loop.add_reader(self._fd, self._on_readable)
+        self.running = True
+        self._schedule_flush()
+
+    def start(self):
+        raise RuntimeError("AsyncSerialTransport is started with `await open()`")
+
+    def close(self):
+        """Stop reading and close the port; immediate, no read timeout to wait for."""
+        if self._fd is not None and self.loop is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.running = False
+        if self.batch_builder is not None:
+            self.emit_batches(force=True)
+        if self.ser.is_open:
+            self.ser.close()
+        if self._closed is not None and not self._closed.done():
+            self._closed.set_result(None)
+
+    stop = close
+
+    async def wait_closed(self):
+        """Wait until the transport is closed (by close() or a read error)."""
+        await self._closed
+
+    async def send_command(self, command):
+        """Send a command string (e.g. START_CMD) or raw bytes without blocking the loop."""
+        data = command.encode("ascii") if isinstance(command, str) else bytes(command)
+        fd = self.ser.fileno()
+        while data:
+            try:
+                written = os.write(fd, data)
+            except BlockingIOError:
+                written = 0
+            data = data[written:]
+            if data:
+                await self._writable(fd)
+
+    def _writable(self, fd):
+        future = self.loop.create_future()
+
+        def ready():
+            self.loop.remove_writer(fd)
+            if not future.done():
+                future.set_result(None)
+
+        self.loop.add_writer(fd, ready)
+        return future
+
+    def _on_readable(self):
+        read_start = time.time_ns()
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"[ERROR] Serial exception: {e}")
+            self.close()
+            return
+        if not data:
+            print("[ERROR] Serial port closed")
+            self.close()
+            return
+        # The bytes arrived after the last read that left nothing behind
+        earliest_ns = self._read_ns
+        if len(data) < READ_SIZE:
+            self._read_ns = read_start
+        self.feed(data, earliest_ns=earliest_ns)
+
+    def _schedule_flush(self):
+        if self.batch_builder is None or not self.batch_interval:
+            return
+        self._flush_handle = self.loop.call_later(self.batch_interval, self._flush)
+
+    def _flush(self):
+        # Deliver what a quiet line left in the builder
+        self.emit_batches()
+        self._schedule_flush()
+
+
+async def stream(ports, duration, mode_cmd):
+    transports = [AsyncSerialTransport(port) for port in ports]
+    for transport in transports:
+        await transport.open()
+        await transport.send_command(mode_cmd)
+        await transport.send_command(START_CMD)
+    t0 = time.monotonic()
+    await asyncio.sleep(duration)
+    for transport in transports:
+        await transport.send_command(STOP_CMD)
+    await asyncio.sleep(0.1)
+    elapsed = time.monotonic() - t0
+    for port, transport in zip(ports, transports):
+        transport.close()
+        counts = ", ".join(f"{h:02X}={n}" for h, n in sorted(transport.header_counts.items()))
+        print(
+            f"[ASYNC] {port}: {transport.packets_received} packets "
+            f"({transport.packets_received / elapsed:.0f}/s; {counts}), "
+            f"desync {transport.desync_bytes} B"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("ports", nargs="+")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--mode", choices=("trg", "int"), default="trg")
+    args = parser.parse_args()
+    mode_cmd = INTMODE_CMD if args.mode == "int" else TRGMODE_CMD
+    asyncio.run(stream(args.ports, args.duration, mode_cmd))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Offline arc analysis of a directory of captures.
+
+    python batch_analyze.py DIR [--recursive] [--jobs N] [--rate 2500]
+        [--integrated] [--offset] [--hysteresis 0] [--cache FILE] [--json out.json]
+
+Runs the live view's arc timing, zero-crossing and phase angle analysis
+over every capture in DIR: exports (adc_data_*.csv with their _gpio.csv)
+and recordings (*.cap, the capture after the last C0 sync). Captures are
+analyzed in a process pool, one worker per core by default.
+
+Results are cached in FILE (default DIR/.arc_analysis_cache.json), keyed
+by the sha256 of the capture's files and the analysis parameters, so a
+re-run only analyzes new or changed captures.
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from arc_analysis import analyze_capture
+from frame import FrameProcessor
+from gpio_decoder import decode_gpio_events, expand_gpio_steps
+from integrator import integrate_batch
+from offset_estimator import OffsetEstimator
+from packet_batch import ADC_HEADER, GPIO_HEADER, SYNC_HEADER
+from recorder import CaptureFile
+from timeline import AdcTimeline, read_windows, recorded_times
+
+# Part of every cache key; bump it when the analysis changes its results
+ANALYSIS_VERSION = 4
+
+CACHE_FILENAME = ".arc_analysis_cache.json"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def find_captures(directory, recursive=False):
+    """Paths of the captures in directory: .cap recordings and exported ADC .csv files."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".cap") or (name.endswith(".csv") and not name.endswith("_gpio.csv")):
+                paths.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return paths
+
+
+def capture_files(path):
+    """The files a capture consists of: the path, plus the GPIO edges of an export."""
+    gpio_path = path[: -len(".csv")] + "_gpio.csv"
+    if path.endswith(".csv") and os.path.exists(gpio_path):
+        return [path, gpio_path]
+    return [path]
+
+
+def capture_key(path, params):
+    """Cache key of a capture: sha256 of its files' contents and the analysis parameters."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([ANALYSIS_VERSION, params], sort_keys=True).encode())
+    for file_path in capture_files(path):
+        with open(file_path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def frame_processor(sample_rate_hz):
+    return FrameProcessor(sampling_rate_hz=sample_rate_hz)
+
+
+def gpio_steps(times_ms, high):
+    """GPIO step series as the live view builds it: LOW at 0 ms, then the events."""
+    times, _, levels = expand_gpio_steps(times_ms, high)
+    return np.concatenate(([0.0], times)), np.concatenate(([0], levels)).astype(np.uint8)
+
+
+def load_export(path, sample_rate_hz):
+    """ADC samples and GPIO step series of an export written by CaptureExporter."""
+    with open(path) as f:
+        if f.readline().strip() != "Time_ms,Signal_Level":
+            raise ValueError("not an ADC export (no Time_ms,Signal_Level header)")
+    adc = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    times_ms = np.zeros(0)
+    high = np.zeros(0, dtype=bool)
+    files = capture_files(path)
+    if len(files) > 1:
+        gpio = np.loadtxt(files[1], delimiter=",", skiprows=1, ndmin=2)
+        times_ms, high = gpio[:, 0], gpio[:, 1] != 0
+    return (adc[:, 0], adc[:, 1]) + gpio_steps(times_ms, high)
+
+
+def load_recording(path, sample_rate_hz):
+    """
+    ADC samples and GPIO step series of the last capture in a .cap recording.
+
+    Sample times come from an AdcTimeline, so frames lost while recording
+    leave gaps instead of shifting the rest of the capture.
+    """
+    capture = CaptureFile(path)
+    packets = capture.packets
+    headers = packets[:, 0]
+    syncs = np.flatnonzero(headers == SYNC_HEADER)
+    if not len(syncs):
+        raise ValueError("no C0 start packet")
+    start = syncs[-1]
+    t_ns = capture.t_ns
+    earliest_ns = read_windows(t_ns)
+    timeline = AdcTimeline(
+        sample_rate_hz,
+        int.from_bytes(packets[start, 1:5].tobytes(), "little"),
+        (int(earliest_ns[start]), int(t_ns[start])),
+    )
+    packets = packets[start + 1 :]
+    headers = headers[start + 1 :]
+
+    counts = np.ascontiguousarray(packets[headers == ADC_HEADER, 1:]).view("<u2").ravel()
+    voltages = frame_processor(sample_rate_hz).counts_to_voltage(counts)
+    times = recorded_times(timeline, headers, t_ns[start + 1 :], earliest_ns[start + 1 :])
+    times_ms, high = decode_gpio_events(packets[headers == GPIO_HEADER, 1:].tobytes())
+    return (times, voltages) + gpio_steps(times_ms, high)
+
+
+def analyze(adc_times, adc_values, gpio_times, gpio_levels, params):
+    """
+    Arc timing, zero-crossings and phase angle of one capture.
+
+    Args:
+        adc_times: ADC sample times in ms
+        adc_values: ADC voltages
+        gpio_times: GPIO step series times in ms
+        gpio_levels: Binary GPIO levels (0 or 1)
+        params: dict with integrated (find current zero-crossings in the
+            integrated current), offset (subtract the ADC offset estimate)
+            and hysteresis (zero-crossing dead band)
+
+    Returns:
+        analyze_capture() results with samples and gpio_events, JSON-serializable
+    """
+    values = np.asarray(adc_values, dtype=np.float64)
+    if params["integrated"]:
+        values = integrate_batch(adc_times, values)
+    elif params["offset"] and len(values):
+        processor = frame_processor(params["sample_rate_hz"])
+        resolution = processor.adc_resolution
+        estimator = OffsetEstimator(
+            window=2000,
+            levels=2**resolution,
+            scale=processor.vref / (2**resolution - 1),
+            zero=-1.65,
+        )
+        estimator.update(values)
+        values = values - estimator.estimate()
+
+    result = analyze_capture(
+        adc_times, values, gpio_times, gpio_levels, hysteresis=params["hysteresis"]
+    )
+    result.update(samples=len(adc_values), gpio_events=len(gpio_times))
+    return json.loads(json.dumps(result, default=float))
+
+
+def analyze_file(path, params):
+    """Load and analyze one capture (runs in a pool worker)."""
+    load = load_recording if path.endswith(".cap") else load_export
+    return analyze(*load(path, params["sample_rate_hz"]), params)
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(path, cache):
+    # Replace the file in one step, so an interrupted run keeps the old cache
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(temp_path, path)
+
+
+def run(paths, params, cache, jobs):
+    """
+    Analyze the captures that are not in the cache.
+
+    Returns:
+        list of (path, key, result, cached) in path order; result is
+        {"error": message} for captures that could not be analyzed
+    """
+    keys = [None] * len(paths)
+    results = [None] * len(paths)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        key_futures = [pool.submit(capture_key, path, params) for path in paths]
+        missing = {}
+        for i, future in enumerate(key_futures):
+            try:
+                keys[i] = future.result()
+            except OSError as e:
+                results[i] = {"error": str(e)}
+                continue
+            if keys[i] in cache:
+                results[i] = cache[keys[i]]
+            else:
+                missing[i] = pool.submit(analyze_file, paths[i], params)
+
+        for i, future in missing.items():
+            try:
+                results[i] = future.result()
+                cache[keys[i]] = results[i]
+            except Exception as e:
+                results[i] = {"error": f"{type(e).__name__}: {e}"}
+    return [
+        (path, key, result, i not in missing)
+        for i, (path, key, result) in enumerate(zip(paths, keys, results))
+    ]
+
+
+def format_ms(value):
+    return f"{value:9.3f}" if value is not None else f"{'-':>9}"
+
+
+def print_results(rows, directory):
+    print(
+        f"{'capture':40} {'samples':>9} {'start ms':>9} {'arc ms':>9} "
+        f"{'V zc':>5} {'I zc':>5} {'phase':>7} {'PF':>6} {'load':10}"
+    )
+    for path, _, result, cached in rows:
+        name = os.path.relpath(path, directory)
+        if "error" in result:
+            print(f"{name:40} [ERROR] {result['error']}")
+            continue
+        phase = result["phase"] or {}
+        mean_phase = phase.get("mean_phase_deg")
+        power_factor = phase.get("power_factor")
+        # The corrected end time counts as the first voltage zero-crossing
+        voltage_crossings = len(result["voltage_zero_crossings"]) + (result["t_end"] is not None)
+        print(
+            f"{name:40} {result['samples']:9d} {format_ms(result['t_start'])} "
+            f"{format_ms(result['t_arc'])} {voltage_crossings:5d} "
+            f"{len(result['current_zero_crossings']):5d} "
+            f"{mean_phase if mean_phase is not None else float('nan'):6.1f}° "
+            f"{power_factor if power_factor is not None else float('nan'):6.3f} "
+            f"{phase.get('load_type') or '-':10}" + (" (cached)" if cached else "")
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--recursive", action="store_true", help="include subdirectories")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--rate", type=float, default=2500, help="ADC sample rate of .cap files (Hz)")
+    parser.add_argument("--integrated", action="store_true", help="zero-crossings of the integrated current")
+    parser.add_argument("--offset", action="store_true", help="apply the ADC offset correction")
+    parser.add_argument("--hysteresis", type=float, default=0.0, help="zero-crossing dead band (V or kA)")
+    parser.add_argument("--cache", help=f"cache file (default DIR/{CACHE_FILENAME})")
+    parser.add_argument("--json", help="write all results to this file")
+    args = parser.parse_args()
+
+    params = {
+        "sample_rate_hz": args.rate,
+        "integrated": args.integrated,
+        "offset": args.offset,
+        "hysteresis": args.hysteresis,
+    }
+    cache_path = args.cache or os.path.join(args.directory, CACHE_FILENAME)
+    cache = load_cache(cache_path)
+    paths = find_captures(args.directory, args.recursive)
+
+    t0 = time.perf_counter()
+    rows = run(paths, params, cache, max(1, args.jobs))
+    elapsed = time.perf_counter() - t0
+    print_results(rows, args.directory)
+
+    analyzed = sum(1 for _, _, result, cached in rows if not cached and "error" not in result)
+    failed = sum(1 for _, _, result, _ in rows if "error" in result)
+    print(
+        f"[BATCH] {len(rows)} captures: {analyzed} analyzed, "
+        f"{len(rows) - analyzed - failed} from cache, {failed} failed in {elapsed:.2f} s"
+    )
+    if analyzed:
+        save_cache(cache_path, cache)
+
+    if args.json:
+        report = {
+            "params": params,
+            "results": [
+                dict(path=path, key=key, cached=cached, **result)
+                for path, key, result, cached in rows
+            ],
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Measure GUI-thread event-loop load for per-packet vs. batched delivery.
+
+A producer thread stands in for SerialReader.read_loop and pushes a
+synthetic A0/B0 stream into a real LivePlotter, either as one queued
+packet_received signal per packet or as PacketBatch objects per time
+slice. Reported per run:
+
+    slots     -- number of slot invocations on the GUI thread
+    busy      -- share of wall time the GUI thread spent inside the slots
+    lag p50/p99/max -- lateness of a 5 ms QTimer, i.e. how long other
+                 GUI events (repaints, clicks) had to wait
+
+    QT_QPA_PLATFORM=offscreen python bench_delivery.py [--seconds 3]
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from framer import PACKET_SIZE
+from main import BATCH_INTERVAL_S, LivePlotter
+from packet_batch import BatchBuilder
+
+
+class Producer(QObject):
+    packet_received = pyqtSignal(bytes)
+    packet_batch_received = pyqtSignal(object)
+
+    def __init__(self, packets_per_s, seconds, batch_interval):
+        super().__init__()
+        self.packets_per_s = packets_per_s
+        self.seconds = seconds
+        self.batch_interval = batch_interval
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        rng = np.random.default_rng(0)
+        builder = BatchBuilder()
+        period = 1.0 / self.packets_per_s
+        start = time.perf_counter()
+        last_batch = start
+        n = 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= self.seconds:
+                break
+            due = int((now - start) / period)
+            while n < due:
+                if n % 50 == 49:
+                    ticks = int((now - start) * 500000)
+                    payload = ticks.to_bytes(4, "little") + bytes([n // 50 % 2])
+                    packet = bytes([0xB0]) + payload + bytes(PACKET_SIZE - 6)
+                else:
+                    samples = rng.integers(1800, 2300, 10, dtype="<u2")
+                    packet = bytes([0xA0]) + samples.tobytes()
+                if self.batch_interval is None:
+                    self.packet_received.emit(packet)
+                else:
+                    builder.add(packet)
+                n += 1
+            if self.batch_interval is not None and now - last_batch >= self.batch_interval:
+                last_batch = now
+                for batch in builder.take(time.time_ns()):
+                    self.packet_batch_received.emit(batch)
+            time.sleep(0.001)
+
+
+def measure(app, packets_per_s, seconds, batch_interval):
+    plotter = LivePlotter()
+    plotter.export_dir = None
+    plotter.is_running = True
+    plotter.handle_sync(bytes(20))
+
+    busy = [0.0, 0]
+
+    def timed(slot):
+        def wrapper(arg):
+            t0 = time.perf_counter()
+            slot(arg)
+            busy[0] += time.perf_counter() - t0
+            busy[1] += 1
+
+        return wrapper
+
+    producer = Producer(packets_per_s, seconds, batch_interval)
+    producer.packet_received.connect(timed(plotter.handle_packet))
+    producer.packet_batch_received.connect(timed(plotter.handle_batch))
+
+    lags = []
+    expected = [time.perf_counter()]
+    tick = QTimer()
+    tick.setInterval(5)
+
+    def on_tick():
+        now = time.perf_counter()
+        lags.append(max(0.0, now - expected[0] - 0.005))
+        expected[0] = now
+
+    tick.timeout.connect(on_tick)
+    tick.start()
+
+    t0 = time.perf_counter()
+    producer.thread.start()
+    while producer.thread.is_alive() or time.perf_counter() - t0 < seconds:
+        app.processEvents()
+    # Drain whatever is still queued for the GUI thread
+    while time.perf_counter() - t0 < seconds + 60:
+        before = busy[1]
+        app.processEvents()
+        if busy[1] == before:
+            break
+    wall = time.perf_counter() - t0
+    tick.stop()
+    plotter.deleteLater()
+
+    lag_ms = np.array(lags) * 1000.0 if lags else np.zeros(1)
+    return {
+        "slots": busy[1],
+        "busy": busy[0] / wall,
+        "lag_p50": np.percentile(lag_ms, 50),
+        "lag_p99": np.percentile(lag_ms, 99),
+        "lag_max": lag_ms.max(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI-thread load per delivery mode")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rates", type=int, nargs="+", default=[500, 1000, 2000])
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    print(
+        f"{'pkt/s':>6} {'mode':10} {'slots':>7} {'busy':>6} "
+        f"{'lag p50':>8} {'lag p99':>8} {'lag max':>8}"
+    )
+    for rate in args.rates:
+        for label, interval in (("packet", None), ("batch", BATCH_INTERVAL_S)):
+            r = measure(app, rate, args.seconds, interval)
+            print(
+                f"{rate:6d} {label:10} {r['slots']:7d} {r['busy']:6.1%} "
+                f"{r['lag_p50']:7.1f}ms {r['lag_p99']:7.1f}ms {r['lag_max']:7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
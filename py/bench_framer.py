@@ -0,0 +1,101 @@
+"""
+Microbenchmark for the serial packet framer.
+
+Compares the original bytearray slicing loop of SerialReader.read_loop with
+PacketFramer on synthetic streams and reports throughput as a multiple of
+the 115200 baud line rate (8E1 framing, 11 bits per byte).
+
+    python bench_framer.py [--seconds 2] [--read-size 4096]
+"""
+
+import argparse
+import random
+import time
+
+from framer import PACKET_SIZE, VALID_HEADERS, PacketFramer
+
+LINE_BYTES_PER_S = 115200 / 11
+
+
+def make_stream(num_packets, noise_ratio=0.0, seed=1):
+    """Build a packet stream, optionally with runs of garbage between packets."""
+    rng = random.Random(seed)
+    headers = [0xA0] * 8 + [0xB0, 0xD0]
+    noise = [b for b in range(256) if b not in VALID_HEADERS]
+    out = bytearray()
+    for _ in range(num_packets):
+        if noise_ratio and rng.random() < noise_ratio:
+            out.extend(rng.choice(noise) for _ in range(rng.randint(1, 40)))
+        out.append(rng.choice(headers))
+        out.extend(rng.getrandbits(8) & 0x0F for _ in range(PACKET_SIZE - 1))
+    return bytes(out)
+
+
+def legacy_framer(chunks):
+    """The original read_loop framing, without the Qt emit."""
+    buffer = bytearray()
+    packets = 0
+    for data in chunks:
+        buffer.extend(data)
+        while len(buffer) >= PACKET_SIZE:
+            if buffer[0] in VALID_HEADERS:
+                packet = bytes(buffer[:PACKET_SIZE])
+                packets += 1
+                buffer = buffer[PACKET_SIZE:]
+            else:
+                buffer.pop(0)
+    return packets
+
+
+def ring_framer(chunks):
+    framer = PacketFramer()
+    packets = 0
+    for data in chunks:
+        for view in framer.feed(data):
+            packet = bytes(view)
+            packets += 1
+    return packets
+
+
+def split(stream, read_size):
+    return [stream[i : i + read_size] for i in range(0, len(stream), read_size)]
+
+
+def run(func, chunks, total_bytes, seconds):
+    loops = 0
+    elapsed = 0.0
+    packets = 0
+    while elapsed < seconds:
+        t0 = time.perf_counter()
+        packets = func(chunks)
+        elapsed += time.perf_counter() - t0
+        loops += 1
+    rate = total_bytes * loops / elapsed
+    return rate, packets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--read-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("clean, per-read chunks", make_stream(20000), args.read_size),
+        ("1% noise bursts", make_stream(20000, noise_ratio=0.01), args.read_size),
+        ("backlog (single 420 kB read)", make_stream(20000), None),
+    ]
+
+    print(f"{'scenario':32} {'framer':8} {'MB/s':>8} {'x line':>8} {'packets':>8}")
+    for name, stream, read_size in scenarios:
+        chunks = split(stream, read_size or len(stream))
+        for label, func in (("legacy", legacy_framer), ("ring", ring_framer)):
+            rate, packets = run(func, chunks, len(stream), args.seconds)
+            print(
+                f"{name:32} {label:8} {rate / 1e6:8.2f} "
+                f"{rate / LINE_BYTES_PER_S:8.0f} {packets:8d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
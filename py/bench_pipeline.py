@@ -0,0 +1,310 @@
+"""
+Benchmark suite for the host-side acquisition and analysis path.
+
+Builds a synthetic capture (the simulator's default Scenario: 50 Hz sine
+and repeated arc/double-pulse GPIO pattern) at several equivalent ADC
+sample rates and times each stage separately:
+
+    framer               -- PacketFramer + BatchBuilder per serial read, as in read_loop
+    parse_frame          -- FrameProcessor.parse_frame per A0 payload
+    adc_timeline         -- AdcTimeline.add (sample times and gap checks) per GUI batch
+    handle_gpio_data     -- LivePlotter.handle_gpio_data per GUI batch with B0 events
+    arc_tracker          -- ArcTracker.feed with the step points of each such batch
+    offset_update        -- OffsetEstimator.update with the voltages of each GUI batch
+    calculate_adc_offset -- LivePlotter.calculate_adc_offset (the estimate) per GUI batch
+    streaming_integrator -- StreamingIntegrator.process with the samples of each GUI batch
+    integrate_adc_signal -- LivePlotter.integrate_adc_signal over the whole capture
+    process_arc_analysis -- analyze_capture on LivePlotter.analysis_snapshot over the whole
+                            capture (the worker thread's job)
+    submit_arc_analysis  -- LivePlotter.process_arc_analysis (the GUI thread's part)
+
+For each stage and rate it reports throughput (items per second, items
+being bytes, samples or events), per-call latency percentiles and the
+peak memory allocated by one call (tracemalloc, measured in a separate
+pass so it does not distort the timings). --json writes the results for
+comparison with another run given to --compare.
+
+    QT_QPA_PLATFORM=offscreen python bench_pipeline.py [--rates 10000 100000 1000000]
+        [--seconds 1] [--repeat 5] [--json out.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from arc_analysis import ArcTracker, analyze_capture
+from frame import FrameProcessor
+from framer import PACKET_SIZE, PacketFramer
+from integrator import StreamingIntegrator
+from main import BATCH_INTERVAL_S, LivePlotter
+from offset_estimator import OffsetEstimator
+from packet_batch import BatchBuilder
+from simulator import ADC_HEADER, GPIO_EVENT_SIZE, GPIO_HEADER, PAYLOAD_SIZE, TICK_US, Scenario
+from timeline import AdcTimeline
+
+READ_SIZE = 4096  # Bytes per serial read
+SAMPLES_PER_PACKET = PAYLOAD_SIZE // 2
+EVENTS_PER_PACKET = PAYLOAD_SIZE // GPIO_EVENT_SIZE
+
+
+def make_stream(rate_hz, seconds, scenario):
+    """C0 + time-ordered A0/B0 packets for `seconds` of signal at rate_hz."""
+    samples = int(rate_hz * seconds) // SAMPLES_PER_PACKET * SAMPLES_PER_PACKET
+    t = np.arange(samples) / rate_hz
+    counts = np.clip(np.rint(scenario.adc_counts(t)), 0, 4095).astype("<u2")
+    adc = np.empty((samples // SAMPLES_PER_PACKET, PACKET_SIZE), dtype=np.uint8)
+    adc[:, 0] = ADC_HEADER
+    adc[:, 1:] = counts.view(np.uint8).reshape(len(adc), PAYLOAD_SIZE)
+    # An A0 packet goes out once its last sample is taken
+    adc_times = t[SAMPLES_PER_PACKET - 1 :: SAMPLES_PER_PACKET]
+
+    events = []
+    for t_event, level in scenario.gpio_events():
+        if t_event >= seconds:
+            break
+        events.append((t_event, level))
+    events += [(0.0, 0)] * (-len(events) % EVENTS_PER_PACKET)  # Zero slots are skipped
+    gpio_events = np.zeros(len(events), dtype=[("ticks", "<u4"), ("level", "u1")])
+    if events:
+        ev_t, ev_level = np.array(events).T
+        gpio_events["ticks"] = np.where(ev_t > 0, np.maximum(np.rint(ev_t * 1e6 / TICK_US), 1), 0)
+        gpio_events["level"] = ev_level
+    gpio = np.empty((len(events) // EVENTS_PER_PACKET, PACKET_SIZE), dtype=np.uint8)
+    gpio[:, 0] = GPIO_HEADER
+    gpio[:, 1:] = gpio_events.view(np.uint8).reshape(len(gpio), PAYLOAD_SIZE)
+    gpio_times = np.array([t for t, _ in events[EVENTS_PER_PACKET - 1 :: EVENTS_PER_PACKET]])
+
+    order = np.argsort(np.concatenate((adc_times, gpio_times)), kind="stable")
+    packets = np.concatenate((adc, gpio))[order]
+    packet_times = np.concatenate((adc_times, gpio_times))[order]
+    sync = bytes([0xC0]) + bytes(4) + b"\xff" * 16
+    return sync + packets.tobytes(), np.concatenate(([0.0], packet_times))
+
+
+def make_batches(stream, packet_times):
+    """Cut the stream into the GUI batches of BATCH_INTERVAL_S slices."""
+    builder = BatchBuilder()
+    batches = []
+    slice_end = BATCH_INTERVAL_S
+    for i, t in enumerate(packet_times):
+        if t >= slice_end:
+            batches += builder.take()
+            slice_end = (t // BATCH_INTERVAL_S + 1) * BATCH_INTERVAL_S
+        builder.add(stream[i * PACKET_SIZE : (i + 1) * PACKET_SIZE])
+    return batches + builder.take()
+
+
+class Stage:
+    """Per-call timings of one pipeline stage."""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.latencies = []
+        self.items = 0
+        self.largest = None  # (items, thunk) of the largest call, for the memory pass
+
+    def time(self, func, *args, items):
+        t0 = time.perf_counter()
+        func(*args)
+        self.latencies.append(time.perf_counter() - t0)
+        self.items += items
+        if self.largest is None or items > self.largest[0]:
+            self.largest = (items, lambda: func(*args))
+
+    def result(self, rate_hz):
+        latencies = np.array(self.latencies or [0.0]) * 1e6
+        total = float(np.sum(latencies)) / 1e6
+        return {
+            "stage": self.name,
+            "rate_hz": rate_hz,
+            "unit": self.unit,
+            "calls": len(self.latencies),
+            "items": self.items,
+            "throughput": self.items / total if total > 0 else None,
+            "p50_us": float(np.percentile(latencies, 50)),
+            "p90_us": float(np.percentile(latencies, 90)),
+            "p99_us": float(np.percentile(latencies, 99)),
+            "max_us": float(latencies.max()),
+            "peak_kib": peak_kib(self.largest[1]) if self.largest else None,
+        }
+
+
+def peak_kib(func):
+    """Peak memory allocated while func() runs, in KiB."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        return (tracemalloc.get_traced_memory()[1] - base) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_rate(rate_hz, seconds, repeat):
+    stream, packet_times = make_stream(rate_hz, seconds, Scenario(period_s=0.1))
+    batches = make_batches(stream, packet_times)
+    stages = {}
+
+    def stage(name, unit):
+        return stages.setdefault(name, Stage(name, unit))
+
+    # Serial read loop: frame every read and sort the packets into batches
+    framer = PacketFramer()
+    builder = BatchBuilder()
+
+    def read(data):
+        for view in framer.feed(data):
+            builder.add(view)
+        builder.take()
+
+    for i in range(0, len(stream), READ_SIZE):
+        chunk = stream[i : i + READ_SIZE]
+        stage("framer", "bytes").time(read, chunk, items=len(chunk))
+
+    processor = FrameProcessor(sampling_rate_hz=rate_hz)
+    for i in range(PACKET_SIZE, len(stream), PACKET_SIZE):
+        if stream[i] == ADC_HEADER:
+            payload = stream[i + 1 : i + PACKET_SIZE]
+            stage("parse_frame", "samples").time(
+                processor.parse_frame, payload, items=SAMPLES_PER_PACKET
+            )
+
+    # GUI thread: replay the batches into a LivePlotter
+    plotter = LivePlotter()
+    plotter.export_dir = None
+    plotter.frame_processor = processor
+    plotter.is_running = True
+    tracker = ArcTracker()
+    tracker.feed([0.0], [0])
+    timeline = AdcTimeline(rate_hz)
+    # Separate instances: the memory pass repeats the largest call
+    live = plotter.offset_estimator
+    estimator = OffsetEstimator(live.window, live.levels, live.scale, live.zero, live.asymmetry)
+    integrator = StreamingIntegrator()
+    for batch in batches:
+        if batch.adc.size or batch.status:
+            stage("adc_timeline", "samples").time(
+                timeline.add, batch.adc.size, batch.status_received, batch.adc_lost,
+                batch.adc_before_status(), items=batch.adc.size,
+            )
+        if batch.gpio:
+            stage("handle_gpio_data", "events").time(
+                plotter.handle_gpio_data, batch.gpio, items=len(batch.gpio) // GPIO_EVENT_SIZE
+            )
+            times, _, levels = plotter.handle_gpio_data(batch.gpio)
+            stage("arc_tracker", "points").time(tracker.feed, times, levels, items=len(times))
+        plotter.handle_batch(batch)
+        if batch.adc.size:
+            voltages = processor.counts_to_voltage(batch.adc)
+            stage("offset_update", "samples").time(
+                estimator.update, voltages, items=batch.adc.size
+            )
+            stage("calculate_adc_offset", "samples").time(
+                plotter.calculate_adc_offset, items=batch.adc.size
+            )
+            times = plotter.adc_time_data.view()[-batch.adc.size :]
+            stage("streaming_integrator", "samples").time(
+                integrator.process, times, voltages, items=batch.adc.size
+            )
+
+    # Whole-capture analysis
+    samples = len(plotter.adc_signal_data)
+    for _ in range(repeat):
+        stage("integrate_adc_signal", "samples").time(plotter.integrate_adc_signal, items=samples)
+        stage("process_arc_analysis", "samples").time(
+            lambda: analyze_capture(**plotter.analysis_snapshot()), items=samples
+        )
+    for _ in range(repeat):
+        stage("submit_arc_analysis", "samples").time(plotter.process_arc_analysis, items=samples)
+        plotter.analysis_worker.wait_idle()
+
+    results = [s.result(rate_hz) for s in stages.values()]
+    plotter.analysis_worker.stop()
+    plotter.deleteLater()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {}
+    if baseline:
+        previous = {(r["stage"], r["rate_hz"]): r for r in baseline["results"]}
+    header = (
+        f"{'stage':22} {'rate':>8} {'calls':>6} {'throughput':>16} "
+        f"{'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>9} {'peak KiB':>9}"
+    )
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    for r in results:
+        throughput = f"{r['throughput'] or 0:10.3g} {r['unit']}/s"
+        line = (
+            f"{r['stage']:22} {r['rate_hz']:8.0f} {r['calls']:6d} {throughput:>16} "
+            f"{r['p50_us']:9.1f} {r['p90_us']:9.1f} {r['p99_us']:9.1f} "
+            f"{r['max_us']:9.1f} {r['peak_kib'] or 0:9.1f}"
+        )
+        old = previous.get((r["stage"], r["rate_hz"]))
+        if old and old.get("throughput") and r["throughput"]:
+            # > 1: faster than the baseline
+            line += f" {r['throughput'] / old['throughput']:7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rates", type=float, nargs="+", default=[10_000, 100_000, 1_000_000],
+        help="equivalent ADC sample rates (Hz)",
+    )
+    parser.add_argument("--seconds", type=float, default=1.0, help="signal length per rate")
+    parser.add_argument("--repeat", type=int, default=5, help="calls of whole-capture stages")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results of an earlier run (--json) to compare with")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    results = []
+    for rate in args.rates:
+        results += run_rate(rate, args.seconds, args.repeat)
+        app.processEvents()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Baseline: {baseline.get('revision')}")
+    print_results(results, baseline)
+
+    if args.json:
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "seconds": args.seconds,
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
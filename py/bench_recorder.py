@@ -0,0 +1,76 @@
+"""
+Throughput benchmark for the capture recorder.
+
+Feeds synthetic packet chunks, as the reader thread would after each serial
+read, into a CaptureRecorder as fast as possible. Reports the cost of
+write() on the calling thread and the throughput of the background writer,
+once with an unbounded queue (sustained rate, nothing dropped) and once
+with the default bounded queue (overload: producer far faster than the
+disk, excess chunks dropped). Rates are also given as a multiple of the
+115200 baud line rate (8E1, 21-byte packets).
+
+    python bench_recorder.py [--packets 2000000] [--chunk 40] [--dir /tmp]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from framer import PACKET_SIZE
+from recorder import RECORD_DTYPE, CaptureRecorder
+
+LINE_PACKETS_PER_S = 115200 / 11 / PACKET_SIZE
+
+
+def make_chunk(packets, seed=1):
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, 16, (packets, PACKET_SIZE), dtype=np.uint8)
+    rows[:, 0] = 0xA0
+    rows[::8, 0] = 0xB0
+    return rows.tobytes()
+
+
+def run(chunk, calls, path, queue_size):
+    recorder = CaptureRecorder(path, queue_size=queue_size)
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        recorder.write(chunk)
+    t_write = time.perf_counter() - t0
+    recorder.close(timeout=None)
+    t_total = time.perf_counter() - t0
+    os.remove(path)
+    os.remove(recorder.index_path)
+    return recorder, t_write, t_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packets", type=int, default=2_000_000)
+    parser.add_argument("--chunk", type=int, default=40, help="packets per serial read")
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    chunk = make_chunk(args.chunk)
+    calls = args.packets // args.chunk
+    path = os.path.join(args.dir, "bench_recorder.cap")
+
+    print(f"{'queue':10} {'write() us':>10} {'written':>10} {'dropped':>10} "
+          f"{'index':>8} {'packets/s':>10} {'x line':>8} {'MB/s':>6}")
+    # Unbounded queue: sustained writer throughput; default queue: overload behaviour
+    for label, queue_size in (("unbounded", 0), ("default", 1024)):
+        recorder, t_write, t_total = run(chunk, calls, path, queue_size)
+        written = recorder.records_written
+        rate = written / t_total
+        print(
+            f"{label:10} {t_write / calls * 1e6:10.2f} {written:10d} "
+            f"{recorder.dropped_packets:10d} {recorder.index_entries:8d} "
+            f"{rate:10.0f} {rate / LINE_PACKETS_PER_S:8.0f} "
+            f"{rate * RECORD_DTYPE.itemsize / 1e6:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
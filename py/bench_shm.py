@@ -0,0 +1,132 @@
+"""
+Data loss under GUI stalls: reader thread vs. acquisition process.
+
+Runs the firmware simulator in its own process at a high sample rate and
+a fast (but, like a real UART, fixed-rate) line, arms it with START and stalls the GUI thread every
+--every-ms for --stall-ms with a call that holds the GIL (as a long
+render or analysis step does). The stream is read either by the
+in-process SerialReader thread or by SharedMemoryReader (acquisition
+process + shared-memory rings). Reported per run:
+
+    sent      -- ADC samples the simulated firmware produced
+    received  -- ADC samples delivered to the GUI thread
+    fw lost   -- samples dropped by the firmware ring because the host did
+                 not read the port in time
+    ring lost -- samples overwritten in the shared-memory ring before the
+                 GUI read them (overflow detection; forced in the last run
+                 with a deliberately small ring)
+
+    QT_QPA_PLATFORM=offscreen python bench_shm.py [--seconds 5] [--rate 80000] [--baud 4000000]
+        [--stall-ms 300] [--every-ms 1000]
+"""
+
+import argparse
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from commands import START_CMD, STOP_CMD
+from serial_reader import SerialReader
+from shm_reader import SharedMemoryReader
+
+SIMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulator.py")
+
+
+def hold_gil(seconds, calibration):
+    """Busy the calling thread for about `seconds` without releasing the GIL."""
+    sum(range(int(seconds * calibration)))
+
+
+def calibrate():
+    n = 2_000_000
+    t0 = time.perf_counter()
+    sum(range(n))
+    return n / (time.perf_counter() - t0)
+
+
+def start_simulator(rate, baud):
+    proc = subprocess.Popen(
+        [sys.executable, SIMULATOR, "--baud", str(baud), "--rate", str(rate), "--block", "100"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    port = re.search(r"(/dev/\S+)", line).group(1)
+    return proc, port
+
+
+def stop_simulator(proc):
+    proc.send_signal(signal.SIGINT)
+    out = proc.communicate(timeout=10)[0]
+    sent = int(re.search(r"A0=(\d+)", out).group(1)) * 10
+    overflow = int(re.search(r"ADC (\d+) B", out).group(1)) // 2
+    return sent, overflow
+
+
+def run(app, mode, args, calibration, adc_capacity=None):
+    proc, port = start_simulator(args.rate, args.baud)
+    if mode == "thread":
+        reader = SerialReader(port, batch_interval=0.02)
+    else:
+        kwargs = {"adc_capacity": adc_capacity} if adc_capacity else {}
+        reader = SharedMemoryReader(port, batch_interval=0.02, **kwargs)
+
+    received = [0]
+    reader.packet_batch_received.connect(lambda batch: received.__setitem__(0, received[0] + batch.adc.size))
+    stall = QTimer()
+    stall.timeout.connect(lambda: hold_gil(args.stall_ms / 1000, calibration))
+
+    reader.start()
+    if mode != "thread":
+        reader.wait_ready()
+    reader.send_signal(START_CMD.encode("ascii"))
+    stall.start(args.every_ms)
+    t_end = time.monotonic() + args.seconds
+    while time.monotonic() < t_end:
+        app.processEvents()
+        time.sleep(0.001)
+    stall.stop()
+    reader.send_signal(STOP_CMD.encode("ascii"))
+    # Let the backlog drain
+    t_end = time.monotonic() + 1.0
+    while time.monotonic() < t_end:
+        app.processEvents()
+        time.sleep(0.005)
+
+    ring_lost = getattr(reader, "lost_samples", 0)
+    reader.stop()
+    app.processEvents()
+    ring_lost = getattr(reader, "lost_samples", ring_lost)
+    sent, fw_lost = stop_simulator(proc)
+    return sent, received[0], fw_lost, ring_lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=int, default=80_000, help="simulated ADC sample rate (Hz)")
+    parser.add_argument("--baud", type=int, default=4_000_000, help="simulated line rate")
+    parser.add_argument("--stall-ms", type=int, default=300)
+    parser.add_argument("--every-ms", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    calibration = calibrate()
+    print(f"{'reader':28} {'sent':>10} {'received':>10} {'fw lost':>10} {'ring lost':>10}")
+    runs = (
+        ("thread (SerialReader)", "thread", None),
+        ("process (SharedMemoryReader)", "process", None),
+        ("process, 4096-sample ring", "process", 4096),
+    )
+    for label, mode, capacity in runs:
+        sent, received, fw_lost, ring_lost = run(app, mode, args, calibration, capacity)
+        print(f"{label:28} {sent:10d} {received:10d} {fw_lost:10d} {ring_lost:10d}")
+
+
+if __name__ == "__main__":
+    main()
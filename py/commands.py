@@ -0,0 +1,10 @@
+# 9-byte ASCII commands understood by the firmware (see Core/Inc/config.h)
+COMMAND_LENGTH = 9
+
+START_CMD = "START____"
+STOP_CMD = "STOP_____"
+TRGMODE_CMD = "TRGMODE__"
+INTMODE_CMD = "INTMODE__"
+RESET_CMD = "RESET____"
+
+COMMANDS = (START_CMD, STOP_CMD, TRGMODE_CMD, INTMODE_CMD, RESET_CMD)
@@ -0,0 +1,186 @@
+import numpy as np
+
+from sample_store import SampleBuffer
+
+
+def decimate_minmax(values, max_buckets):
+    """
+    One-shot min/max decimation of an array.
+
+    Splits values into at most max_buckets equal buckets and returns the
+    sorted sample indices of each bucket's minimum and maximum, so every
+    extreme survives. Arrays that already fit in 2 * max_buckets points
+    are returned in full.
+    """
+    n = len(values)
+    if n <= 2 * max_buckets:
+        return np.arange(n)
+    size = -(-n // max_buckets)  # Ceiling division
+    full = n // size
+    blocks = values[: full * size].reshape(full, size)
+    offsets = np.arange(full) * size
+    lo = offsets + blocks.argmin(axis=1)
+    hi = offsets + blocks.argmax(axis=1)
+    parts = [np.minimum(lo, hi), np.maximum(lo, hi)]
+    indices = np.column_stack(parts).ravel()
+    if full * size < n:
+        rest = values[full * size :]
+        tail = np.sort([full * size + rest.argmin(), full * size + rest.argmax()])
+        indices = np.concatenate((indices, tail))
+    return indices
+
+
+class MinMaxDecimator:
+    """
+    Incremental peak-preserving decimator for a growing sample series.
+
+    Samples are grouped into buckets of bucket_size consecutive samples
+    and only the index and value of each bucket's minimum and maximum are
+    kept. Appending a block only touches the open tail bucket and the new
+    buckets after it. When the number of buckets exceeds max_buckets,
+    neighbouring buckets are merged pairwise and bucket_size doubles, so
+    the output never exceeds about 2 * max_buckets points. Narrow spikes
+    survive because each bucket keeps its extremes.
+    """
+
+    def __init__(self, max_buckets=1000):
+        self.max_buckets = max(1, max_buckets)
+        self._min_idx = SampleBuffer(np.int64)
+        self._min_val = SampleBuffer(np.float64)
+        self._max_idx = SampleBuffer(np.int64)
+        self._max_val = SampleBuffer(np.float64)
+        self.reset()
+
+    def reset(self):
+        self.bucket_size = 1
+        self.count = 0
+        for buffer in (self._min_idx, self._min_val, self._max_idx, self._max_val):
+            buffer.clear()
+        # Open tail bucket: [samples, min_idx, min_val, max_idx, max_val]
+        self._tail = [0, 0, 0.0, 0, 0.0]
+
+    def rebuild(self, values, max_buckets=None):
+        """Start over from a complete series, e.g. after a resize or recomputation."""
+        if max_buckets is not None:
+            self.max_buckets = max(1, max_buckets)
+        self.reset()
+        self.append(values)
+
+    def append(self, values):
+        """Add the next block of samples of the series."""
+        values = np.asarray(values, dtype=np.float64)
+        pos = 0
+        n = len(values)
+
+        # Complete the open tail bucket first
+        if self._tail[0]:
+            take = min(self.bucket_size - self._tail[0], n)
+            if take:
+                self._merge_into_tail(values[:take], self.count)
+                pos = take
+            if self._tail[0] == self.bucket_size:
+                self._close_tail()
+
+        # Whole buckets in one vectorized step
+        size = self.bucket_size
+        whole = (n - pos) // size
+        if whole:
+            blocks = values[pos : pos + whole * size].reshape(whole, size)
+            offsets = self.count + pos + np.arange(whole) * size
+            lo = blocks.argmin(axis=1)
+            hi = blocks.argmax(axis=1)
+            rows = np.arange(whole)
+            self._min_idx.extend(offsets + lo)
+            self._min_val.extend(blocks[rows, lo])
+            self._max_idx.extend(offsets + hi)
+            self._max_val.extend(blocks[rows, hi])
+            pos += whole * size
+
+        # Remainder opens a new tail bucket
+        if pos < n:
+            self._merge_into_tail(values[pos:], self.count + pos)
+
+        self.count += n
+        while len(self._min_idx) > self.max_buckets:
+            self._merge_pairs()
+
+    def indices(self):
+        """Sorted sample indices to plot: each bucket's min and max, plus the last sample."""
+        lo = self._min_idx.view()
+        hi = self._max_idx.view()
+        parts = [np.column_stack((np.minimum(lo, hi), np.maximum(lo, hi))).ravel()]
+        if self._tail[0]:
+            parts.append(np.sort([self._tail[1], self._tail[3]]))
+        if self.count:
+            parts.append([self.count - 1])
+        indices = np.concatenate(parts).astype(np.int64)
+        if len(indices) > 1 and indices[-1] == indices[-2]:
+            indices = indices[:-1]
+        return indices
+
+    def _merge_into_tail(self, block, first_index):
+        lo = int(block.argmin())
+        hi = int(block.argmax())
+        tail = self._tail
+        if not tail[0] or block[lo] < tail[2]:
+            tail[1], tail[2] = first_index + lo, float(block[lo])
+        if not tail[0] or block[hi] > tail[4]:
+            tail[3], tail[4] = first_index + hi, float(block[hi])
+        tail[0] += len(block)
+
+    def _close_tail(self):
+        _, min_idx, min_val, max_idx, max_val = self._tail
+        self._min_idx.append(min_idx)
+        self._min_val.append(min_val)
+        self._max_idx.append(max_idx)
+        self._max_val.append(max_val)
+        self._tail = [0, 0, 0.0, 0, 0.0]
+
+    def _merge_pairs(self):
+        """Halve the number of buckets by merging neighbours; bucket_size doubles."""
+        min_idx = self._min_idx.view()
+        min_val = self._min_val.view()
+        max_idx = self._max_idx.view()
+        max_val = self._max_val.view()
+        pairs = len(min_idx) // 2
+        odd = len(min_idx) % 2
+
+        a, b = slice(0, 2 * pairs, 2), slice(1, 2 * pairs, 2)
+        take_b_min = min_val[b] < min_val[a]
+        take_b_max = max_val[b] > max_val[a]
+        new_min_idx = np.where(take_b_min, min_idx[b], min_idx[a])
+        new_min_val = np.where(take_b_min, min_val[b], min_val[a])
+        new_max_idx = np.where(take_b_max, max_idx[b], max_idx[a])
+        new_max_val = np.where(take_b_max, max_val[b], max_val[a])
+
+        # An unpaired last bucket joins the open tail, which stays smaller
+        # than the doubled bucket size
+        if odd:
+            last = [
+                self.bucket_size,
+                int(min_idx[-1]),
+                float(min_val[-1]),
+                int(max_idx[-1]),
+                float(max_val[-1]),
+            ]
+            tail = self._tail
+            if tail[0]:
+                if tail[2] < last[2]:
+                    last[1], last[2] = tail[1], tail[2]
+                if tail[4] > last[4]:
+                    last[3], last[4] = tail[3], tail[4]
+                last[0] += tail[0]
+            self._tail = last
+
+        for buffer, data in (
+            (self._min_idx, new_min_idx),
+            (self._min_val, new_min_val),
+            (self._max_idx, new_max_idx),
+            (self._max_val, new_max_val),
+        ):
+            buffer.clear()
+            buffer.extend(data)
+        self.bucket_size *= 2
+
+        if self._tail[0] == self.bucket_size:
+            self._close_tail()
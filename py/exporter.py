@@ -0,0 +1,179 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from gpio_decoder import decode_gpio_events
+
+_STOP = object()
+
+
+class CaptureExporter:
+    """
+    Incremental export of one capture, written by a background thread.
+
+    The GUI thread hands over new data as it arrives (add_adc, add_gpio,
+    write_analysis); those only put it on a bounded queue. The writer
+    thread appends it to
+
+        <base>.csv           -- ADC samples, Time_ms,Signal_Level (as before)
+        <base>_gpio.csv      -- GPIO edges, Time_ms,Level
+        <base>_analysis.json -- latest arc analysis results (replaced atomically)
+
+    formatting whole chunks at once, and flushes every flush_interval_s,
+    so a crash loses at most that much and closing only has to write the
+    last chunk. Items that do not fit on the queue are dropped and counted
+    in dropped_items. A write error ends the export: it is kept in `error`
+    and everything queued after it is discarded.
+    """
+
+    def __init__(self, base_path, queue_size=4096, flush_interval_s=0.5):
+        self.base_path = base_path
+        self.adc_path = base_path + ".csv"
+        self.gpio_path = base_path + "_gpio.csv"
+        self.analysis_path = base_path + "_analysis.json"
+        self.flush_interval_s = flush_interval_s
+
+        self.samples_written = 0
+        self.edges_written = 0
+        self.dropped_items = 0
+        self.closed = False
+        self.error = None  # The OSError (or ValueError) that ended the export
+
+        self._adc_file = open(self.adc_path, "w")
+        self._gpio_file = open(self.gpio_path, "w")
+        self._adc_file.write("Time_ms,Signal_Level\n")
+        self._gpio_file.write("Time_ms,Level\n")
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def add_adc(self, times_ms, voltages):
+        """Queue a block of ADC samples (arrays are not copied; do not modify them)."""
+        self._put(("adc", times_ms, voltages))
+
+    def add_gpio(self, payloads):
+        """Queue B0 payloads (bytes, back to back); they are decoded on the writer thread."""
+        self._put(("gpio", bytes(payloads)))
+
+    def write_analysis(self, results):
+        """Queue the current analysis results (a JSON-serializable dict)."""
+        self._put(("analysis", results))
+
+    def close(self, timeout=1.0):
+        """
+        Write what is still queued and close the files.
+
+        Waits at most `timeout` seconds; the writer thread finishes on its
+        own if the disk is slower than that.
+
+        Returns:
+            True if the export is complete, False if it is still being
+            written or failed (see error)
+        """
+        if not self.closed:
+            self.closed = True
+            self._stop.set()
+            try:
+                self._queue.put_nowait(_STOP)  # Wakes the writer; it also polls _stop
+            except queue.Full:
+                pass
+        self._thread.join(timeout)
+        return not self._thread.is_alive() and self.error is None
+
+    def _put(self, item):
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped_items += 1
+
+    def _write_loop(self):
+        try:
+            self._write_until_stopped()
+        except (OSError, ValueError) as e:
+            self.error = e
+            self.closed = True  # Stop taking new items
+            print(f"[ERROR] Export to {self.base_path} failed: {e}")
+            _drain(self._queue)
+        finally:
+            for f in (self._adc_file, self._gpio_file):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    def _write_until_stopped(self):
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            # Checked before taking the items: everything queued before close() is written
+            stopping = self._stop.is_set()
+            try:
+                items = [self._queue.get(timeout=self.flush_interval_s)]
+            except queue.Empty:
+                items = []
+            items += _drain(self._queue)
+            if _STOP in items:
+                stopping = True
+                items = items[: items.index(_STOP)]
+            self._write_items(items)
+            if stopping or time.monotonic() - last_flush >= self.flush_interval_s:
+                self._adc_file.flush()
+                self._gpio_file.flush()
+                last_flush = time.monotonic()
+
+    def _write_items(self, items):
+        adc = [item for item in items if item[0] == "adc"]
+        if adc:
+            times = np.concatenate([item[1] for item in adc])
+            values = np.concatenate([item[2] for item in adc])
+            self._adc_file.write(_format_columns(times, values, "%.6f,%.6f"))
+            self.samples_written += len(times)
+
+        gpio = b"".join(item[1] for item in items if item[0] == "gpio")
+        if gpio:
+            times_ms, high = decode_gpio_events(gpio)
+            self._gpio_file.write(_format_columns(times_ms, high.astype(np.uint8), "%.3f,%d"))
+            self.edges_written += len(times_ms)
+
+        analysis = [item[1] for item in items if item[0] == "analysis"]
+        if analysis:
+            # Only the latest result counts; replace the file in one step
+            temp_path = self.analysis_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(analysis[-1], f, indent=2, default=float)
+            os.replace(temp_path, self.analysis_path)
+
+
+def _drain(q):
+    """Take everything currently on a queue without blocking."""
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def _format_columns(first, second, fmt):
+    """CSV lines for two columns, formatted by a single %-operation in C."""
+    values = np.column_stack((first, second)).ravel().tolist()
+    return ((fmt + "\n") * len(first)) % tuple(values)
+
+
+def export_basename(directory=".", prefix="adc_data"):
+    """Timestamped base path for a new export, e.g. ./adc_data_20240101_120000."""
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    base = os.path.join(directory, f"{prefix}_{timestamp}")
+    candidate = base
+    n = 1
+    while os.path.exists(candidate + ".csv"):
+        candidate = f"{base}_{n}"
+        n += 1
+    return candidate
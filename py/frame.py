@@ -1,5 +1,7 @@
 import numpy as np
 
+PAYLOAD_SIZE = 20  # Bytes of samples per A0 packet (10 samples)
+
 
 class FrameProcessor:
     def __init__(self, adc_resolution=12, vref=3.3, sampling_rate_hz=2500):
@@ -13,18 +15,48 @@ class FrameProcessor:
 
     def parse_frame(self, packet_bytes):
         """
-        Convert raw ADC frame bytes to a list of voltage values.
+        Convert raw ADC frame bytes to an array of voltage values.
         Assumes little-endian 16-bit samples.
         Centers the signal around 0V instead of 1.65V.
         """
-        voltages = []
-        for i in range(0, len(packet_bytes), 2):
-            raw = int.from_bytes(packet_bytes[i : i + 2], byteorder="little")
-            voltage = (raw / (2**self.adc_resolution - 1)) * self.vref
-            # Center around 0V by subtracting 1.65V
-            voltage = voltage - 1.65
-            voltages.append(voltage)
-        return np.array(voltages)
+        counts = np.frombuffer(packet_bytes, dtype="<u2", count=len(packet_bytes) // 2)
+        return self.counts_to_voltage(counts)
+
+    def parse_frames(self, payloads, keep_raw=False, flatten=True):
+        """
+        Convert many A0 payloads in one step.
+
+        payloads is either one bytes-like object holding the payloads back
+        to back or an iterable of payloads. All payloads must have the same
+        even length (20 bytes from the firmware).
+
+        Returns a float array of voltages, flattened in arrival order or
+        shaped (frames, samples_per_frame) if flatten is False. With
+        keep_raw the uint16 ADC counts are returned as well, as
+        (voltages, counts) with the same shape.
+        """
+        if isinstance(payloads, (bytes, bytearray, memoryview)):
+            data = payloads
+            frame_len = PAYLOAD_SIZE
+        else:
+            payloads = list(payloads)
+            data = b"".join(payloads)
+            frame_len = len(payloads[0]) if payloads else PAYLOAD_SIZE
+
+        counts = np.frombuffer(data, dtype="<u2", count=len(data) // 2)
+        if not flatten:
+            counts = counts.reshape(-1, frame_len // 2)
+        voltages = self.counts_to_voltage(counts)
+        if keep_raw:
+            return voltages, counts
+        return voltages
+
+    def counts_to_voltage(self, counts):
+        """
+        Convert an array of raw ADC counts to voltages centered around 0V.
+        Used by parse_frame/parse_frames and for batched A0 samples.
+        """
+        return (counts / (2**self.adc_resolution - 1)) * self.vref - 1.65
 
     def generate_time_axis(self, num_samples):
         """Generate time axis in seconds based on sampling rate"""
@@ -0,0 +1,120 @@
+import re
+
+PACKET_SIZE = 21
+VALID_HEADERS = {0xA0, 0xB0, 0xC0, 0xD0}
+
+
+class PacketFramer:
+    """
+    Fixed-capacity framer that splits a raw UART byte stream into packets.
+
+    Incoming bytes are copied once into a preallocated buffer. Complete
+    packets are handed out as memoryview slices of that buffer, so no
+    per-packet copy is made. A view is only valid until the next packet
+    is requested; callers that keep a packet longer must copy it
+    (bytes(view)).
+
+    Bytes that do not start a packet are skipped in bulk with a C-level
+    search for the next valid header. Each run of skipped bytes is
+    reported once through on_desync(count, first_byte) instead of once
+    per byte.
+    """
+
+    def __init__(self, capacity=65536, on_desync=None):
+        if capacity < 2 * PACKET_SIZE:
+            raise ValueError(f"capacity must be at least {2 * PACKET_SIZE} bytes")
+        self.capacity = capacity
+        self.on_desync = on_desync
+
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # First unconsumed byte
+        self._end = 0  # One past the last valid byte
+
+        # Matches any byte that can start a packet
+        self._header_re = re.compile(
+            b"[" + b"".join(re.escape(bytes([h])) for h in sorted(VALID_HEADERS)) + b"]"
+        )
+
+        # Current desync run (reported once it ends)
+        self._desync_run = 0
+        self._desync_first = None
+
+        # Statistics
+        self.packet_count = 0
+        self.desync_bytes = 0
+        self.desync_events = 0
+
+    def __len__(self):
+        """Number of buffered bytes not yet framed"""
+        return self._end - self._start
+
+    def reset(self):
+        """Drop all buffered bytes and any pending desync run."""
+        self._start = 0
+        self._end = 0
+        self._desync_run = 0
+        self._desync_first = None
+
+    def feed(self, data):
+        """
+        Append raw bytes and yield every complete packet as a memoryview.
+
+        Input larger than the free space is consumed in capacity-sized
+        chunks, so memory use stays fixed regardless of backlog size.
+        """
+        data = memoryview(data)
+        pos = 0
+        while pos < len(data):
+            self._compact()
+            n = min(len(data) - pos, self.capacity - self._end)
+            self._buffer[self._end : self._end + n] = data[pos : pos + n]
+            self._end += n
+            pos += n
+            yield from self._frames()
+
+    def flush_desync(self):
+        """Report a desync run that is still open, e.g. when the stream stops."""
+        if self._desync_run:
+            self._report_desync()
+
+    def _compact(self):
+        """Move the unconsumed tail (always < one packet after framing) to the front."""
+        if self._start == 0:
+            return
+        remaining = self._end - self._start
+        if remaining:
+            self._buffer[:remaining] = self._buffer[self._start : self._end]
+        self._start = 0
+        self._end = remaining
+
+    def _frames(self):
+        buffer = self._buffer
+        view = self._view
+        while self._end - self._start >= PACKET_SIZE:
+            start = self._start
+            if buffer[start] in VALID_HEADERS:
+                if self._desync_run:
+                    self._report_desync()
+                self._start = start + PACKET_SIZE
+                self.packet_count += 1
+                yield view[start : start + PACKET_SIZE]
+                continue
+
+            # Skip ahead to the next possible header in one scan
+            match = self._header_re.search(buffer, start, self._end)
+            skip_to = match.start() if match else self._end
+            if not self._desync_run:
+                self._desync_first = buffer[start]
+            self._desync_run += skip_to - start
+            self._start = skip_to
+
+    def _report_desync(self):
+        count = self._desync_run
+        first = self._desync_first
+        self._desync_run = 0
+        self._desync_first = None
+        self.desync_bytes += count
+        self.desync_events += 1
+        if self.on_desync:
+            self.on_desync(count, first)
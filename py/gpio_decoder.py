@@ -0,0 +1,70 @@
+import numpy as np
+
+# One GPIO event of a B0 payload: TIM2 timestamp and pin level
+GPIO_EVENT_DTYPE = np.dtype([("ticks", "<u4"), ("level", "u1")])
+
+# TIM2 runs at 500 kHz, so one tick is 2 µs
+TICK_MS = 2 / 1000.0
+
+# Display level of the GPIO step curve for HIGH (LOW is 0)
+HIGH_DISPLAY_LEVEL = 0.5
+
+
+def decode_gpio_events(payloads):
+    """
+    Decode B0 payloads into GPIO events.
+
+    payloads is either one bytes-like object holding the payloads back to
+    back (e.g. PacketBatch.gpio) or an iterable of payloads. Events with a
+    zero timestamp are unused slots and are dropped; a trailing partial
+    event is ignored.
+
+    Returns:
+        (times_ms, high): float64 event times in ms and a bool array of levels
+    """
+    if not isinstance(payloads, (bytes, bytearray, memoryview)):
+        payloads = b"".join(payloads)
+    count = len(payloads) // GPIO_EVENT_DTYPE.itemsize
+    events = np.frombuffer(payloads, dtype=GPIO_EVENT_DTYPE, count=count)
+    events = events[events["ticks"] != 0]
+    times_ms = events["ticks"].astype(np.float64) * TICK_MS
+    return times_ms, events["level"] != 0
+
+
+def expand_gpio_steps(times_ms, high, prev_display=0.0, prev_binary=None):
+    """
+    Build the step-plot points of a block of GPIO events.
+
+    Every event becomes one point at its level; when the level changes, a
+    point at the previous level and the same time is inserted before it,
+    so the curve draws a vertical edge. prev_display/prev_binary are the
+    levels the curve ends with so far (binary defaults to prev_display > 0).
+
+    Returns:
+        (times, display_levels, binary_levels) as numpy arrays
+    """
+    if prev_binary is None:
+        prev_binary = 1 if prev_display > 0 else 0
+    n = len(times_ms)
+    if n == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.uint8)
+
+    display = np.where(high, HIGH_DISPLAY_LEVEL, 0.0)
+    binary = high.astype(np.uint8)
+    before_display = np.concatenate(([prev_display], display[:-1]))
+    before_binary = np.concatenate(([prev_binary], binary[:-1]))
+    edges = display != before_display
+
+    # Each event takes one output point, plus one for its edge
+    counts = 1 + edges
+    positions = np.cumsum(counts) - 1
+    edge_positions = positions[edges] - 1
+
+    times = np.repeat(np.asarray(times_ms, dtype=np.float64), counts)
+    display_levels = np.empty(len(times))
+    display_levels[positions] = display
+    display_levels[edge_positions] = before_display[edges]
+    binary_levels = np.empty(len(times), dtype=np.uint8)
+    binary_levels[positions] = binary
+    binary_levels[edge_positions] = before_binary[edges]
+    return times, display_levels, binary_levels
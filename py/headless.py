@@ -0,0 +1,129 @@
+"""
+Headless acquisition: arm the device and stream every packet to a capture file.
+
+No Qt is imported; the serial path is ReaderCore feeding a CaptureRecorder.
+Live statistics (packet rate per type, line throughput, dropped bytes and
+packets) are printed every --interval seconds and, with --metrics-port,
+served on http://127.0.0.1:PORT/metrics for dashboards. Ctrl+C (or
+--duration) sends STOP and closes the capture.
+
+    python headless.py PORT [--mode trg|int] [--out FILE_OR_DIR] [--duration S]
+                            [--interval 1] [--baud 115200] [--metrics-port 9464]
+"""
+
+import argparse
+import os
+import time
+
+from commands import INTMODE_CMD, START_CMD, STOP_CMD, TRGMODE_CMD
+from framer import PACKET_SIZE
+from metrics import MetricsCollector, MetricsServer, register_reader_metrics
+from reader_core import ReaderCore
+from recorder import CaptureRecorder, capture_filename
+
+HEADERS = ((0xA0, "A0"), (0xB0, "B0"), (0xC0, "C0"), (0xD0, "D0"))
+
+
+class RateMonitor:
+    """Prints rate and loss statistics of a ReaderCore/CaptureRecorder pair."""
+
+    def __init__(self, reader, recorder, baudrate):
+        self.reader = reader
+        self.recorder = recorder
+        self.line_packets_per_s = baudrate / 11 / PACKET_SIZE  # 8E1
+        self.t_start = time.monotonic()
+        self._last = (self.t_start, 0, {})
+
+    def report(self):
+        now = time.monotonic()
+        reader = self.reader
+        last_t, last_packets, last_counts = self._last
+        dt = max(now - last_t, 1e-9)
+        counts = dict(reader.header_counts)
+        rate = (reader.packets_received - last_packets) / dt
+        per_type = " ".join(
+            f"{name} {(counts.get(h, 0) - last_counts.get(h, 0)) / dt:.0f}" for h, name in HEADERS
+        )
+        print(
+            f"[HEADLESS] {now - self.t_start:7.1f} s  {rate:6.0f} packets/s "
+            f"({rate / self.line_packets_per_s:4.0%} of line)  {per_type}  "
+            f"desync {reader.desync_bytes} B  dropped {self.recorder.dropped_packets}  "
+            f"written {self.recorder.records_written}"
+        )
+        self._last = (now, reader.packets_received, counts)
+
+    def summary(self):
+        reader = self.reader
+        elapsed = time.monotonic() - self.t_start
+        counts = ", ".join(f"{name}={reader.header_counts.get(h, 0)}" for h, name in HEADERS)
+        print(
+            f"[HEADLESS] {reader.packets_received} packets in {elapsed:.1f} s ({counts}), "
+            f"{reader.bytes_received} bytes, desync {reader.desync_bytes} B, "
+            f"recorder dropped {self.recorder.dropped_packets}, "
+            f"written {self.recorder.records_written} to {self.recorder.path}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("port", help="serial port, e.g. /dev/ttyUSB0 or COM7")
+    parser.add_argument("--mode", choices=("trg", "int"), default="trg",
+                        help="continuous (TRGMODE) or interrupt (INTMODE) acquisition")
+    parser.add_argument("--out", default=".", help="capture file or directory")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--interval", type=float, default=1.0, help="statistics interval (s)")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--metrics-port", type=int, help="serve metrics on this localhost port")
+    args = parser.parse_args()
+
+    path = capture_filename(args.out) if os.path.isdir(args.out) else args.out
+    reader = ReaderCore(args.port, baudrate=args.baud)
+    recorder = CaptureRecorder(path)
+    reader.recorder = recorder
+    monitor = RateMonitor(reader, recorder, args.baud)
+
+    metrics = server = None
+    if args.metrics_port is not None:
+        metrics = MetricsCollector()
+        register_reader_metrics(metrics, lambda: reader)
+        metrics.counter(
+            "recorder_dropped_packets_total", lambda: recorder.dropped_packets,
+            "Packets the capture recorder had to drop",
+        )
+        server = MetricsServer(metrics, args.metrics_port)
+        server.start()
+        metrics.sample()
+        print(f"[HEADLESS] Metrics on http://127.0.0.1:{server.port}/metrics")
+    reader.start()
+    print(f"[HEADLESS] Recording {args.port} to {path}")
+
+    mode_cmd = INTMODE_CMD if args.mode == "int" else TRGMODE_CMD
+    reader.send_signal(mode_cmd.encode("ascii"))
+    reader.send_signal(START_CMD.encode("ascii"))
+
+    t_end = time.monotonic() + args.duration if args.duration else None
+    try:
+        while reader.running:
+            now = time.monotonic()
+            if t_end is not None and now >= t_end:
+                break
+            wait = args.interval if t_end is None else min(args.interval, t_end - now)
+            time.sleep(max(wait, 0.0))
+            monitor.report()
+            if metrics is not None:
+                metrics.sample()
+    except KeyboardInterrupt:
+        pass
+
+    reader.send_signal(STOP_CMD.encode("ascii"))
+    time.sleep(0.1)  # Packets already on the line still go to the capture
+    reader.stop()
+    if not recorder.close() and recorder.error is None:
+        print(f"[INFO] Recording to {recorder.path} is still being written")
+    monitor.summary()
+    if server is not None:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import numpy as np
+
+# Rogowski coil calibration: 2.5 Kiloamperes per Volt (2500A/V ÷ 1000)
+CALIBRATION_KA_PER_V = 2.5
+
+# Moving-average window (samples) of the drift-removing high-pass filter
+HIGH_PASS_WINDOW = 30
+
+
+def integrate_batch(times, signal, calibration=CALIBRATION_KA_PER_V):
+    """
+    Integrate a whole Rogowski coil capture (dI/dt) to current in one pass.
+
+    This is the offline algorithm the live view has always used: remove the
+    mean of the complete signal, integrate with the trapezoidal rule,
+    subtract a centered moving average of up to HIGH_PASS_WINDOW samples
+    and scale to kA. Use it for re-analysis of a finished capture.
+
+    Args:
+        times: Sample times in ms
+        signal: Coil voltages in V
+        calibration: kA per V
+
+    Returns:
+        Integrated current in kA (numpy array, empty for < 2 samples)
+    """
+    times = np.asarray(times, dtype=np.float64)
+    signal = np.asarray(signal, dtype=np.float64)
+    if len(times) < 2 or len(signal) < 2:
+        return np.zeros(0)
+
+    # Remove any DC offset from the input signal first
+    # This helps prevent linear drift in the integrated result
+    centered_signal = signal - signal.mean()
+
+    # Use cumulative trapezoidal integration
+    # Trapezoidal rule: area = (y1+y2)/2 * dt
+    areas = (centered_signal[1:] + centered_signal[:-1]) / 2 * np.diff(times)
+    integrated = np.empty(len(signal))
+    integrated[0] = 0  # Start with zero as initial condition
+    np.cumsum(areas, out=integrated[1:])
+
+    # Apply a high-pass filter to remove remaining drift
+    if len(integrated) > 10:
+        window_size = min(HIGH_PASS_WINDOW, len(integrated) // 4)
+        if window_size > 1:
+            moving_avg = np.convolve(
+                integrated, np.ones(window_size) / window_size, mode="same"
+            )
+            # Subtract moving average (acts as high-pass filter)
+            integrated -= moving_avg
+
+    integrated *= calibration
+    return integrated
+
+
+class StreamingIntegrator:
+    """
+    Frame-by-frame Rogowski coil integrator for the live view.
+
+    Only the new samples of each block are processed; the state needed to
+    continue (sample count and sum, last sample, running integral and the
+    integral values still inside the filter window) is carried between
+    calls. The stages mirror integrate_batch:
+
+        1. DC removal with the running mean of all samples so far
+        2. Trapezoidal integration continuing from the previous block
+        3. High-pass: subtract the centered HIGH_PASS_WINDOW moving average
+        4. Calibration to kA
+
+    The centered filter needs (window - 1) // 2 samples of look-ahead, so
+    output lags the input by `delay` samples: the last `delay` samples of a
+    capture get no live value. (integrate_batch has no look-ahead there
+    either; it zero-pads, and its last values are dominated by the padding.)
+
+    Output k differs from integrate_batch only through the running mean
+    m_j used instead of the capture mean m. The high-pass removes the
+    integral of that difference except for its change within the window,
+    so with sample period dt the error at k is at most
+
+        calibration * (window / 2) * dt * max |m_j - m|, j within window / 2 of k
+
+    a start-up transient: m_j settles like 1 / j, so this is large over
+    the first few hundred samples and negligible after a few thousand.
+    Use integrate_batch for offline re-analysis of a finished capture.
+    """
+
+    def __init__(self, calibration=CALIBRATION_KA_PER_V, window=HIGH_PASS_WINDOW):
+        self.calibration = calibration
+        self.window = window
+        # Same alignment as np.convolve(..., mode="same")
+        self.delay = (window - 1) // 2
+        self.reset()
+
+    def reset(self):
+        """Forget all state, e.g. at the start of a new capture."""
+        self.count = 0
+        self.signal_sum = 0.0
+        self.integral = 0.0
+        self._last_time = None
+        self._last_centered = 0.0
+        # Integral values inside the filter window; zero-padded at the start
+        # like the batch convolution
+        self._history = np.zeros(self.window - 1 - self.delay)
+
+    def process(self, times, signal):
+        """
+        Integrate a block of new samples.
+
+        Args:
+            times: Sample times in ms of the new samples
+            signal: Coil voltages in V of the new samples
+
+        Returns:
+            Integrated current in kA for every sample that is now complete.
+            After the first `delay` samples this is one value per input
+            sample, trailing the input by `delay` samples.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        signal = np.asarray(signal, dtype=np.float64)
+        n = len(signal)
+        if n == 0:
+            return np.zeros(0)
+
+        # 1. Running mean over everything seen so far, per sample
+        running_sum = self.signal_sum + np.cumsum(signal)
+        running_mean = running_sum / (self.count + np.arange(1, n + 1))
+        centered = signal - running_mean
+
+        # 2. Trapezoidal integration, continuing from the previous block
+        if self._last_time is None:
+            prev_times = np.concatenate(([times[0]], times[:-1]))
+            prev_centered = np.concatenate(([centered[0]], centered[:-1]))
+        else:
+            prev_times = np.concatenate(([self._last_time], times[:-1]))
+            prev_centered = np.concatenate(([self._last_centered], centered[:-1]))
+        areas = (centered + prev_centered) / 2 * (times - prev_times)
+        integrated = self.integral + np.cumsum(areas)
+
+        self.count += n
+        self.signal_sum = running_sum[-1]
+        self.integral = integrated[-1]
+        self._last_time = times[-1]
+        self._last_centered = centered[-1]
+
+        # 3./4. High-pass over every window that is now complete
+        self._history = np.concatenate((self._history, integrated))
+        return self._filter(len(self._history) - self.window + 1)
+
+    def _filter(self, count):
+        if count <= 0:
+            return np.zeros(0)
+        history = self._history
+        sums = np.cumsum(np.concatenate(([0.0], history)))
+        moving_avg = (sums[self.window : self.window + count] - sums[:count]) / self.window
+        lead = self.window - 1 - self.delay
+        values = history[lead : lead + count]
+        self._history = history[count:]
+        return (values - moving_avg) * self.calibration
@@ -1,5 +1,6 @@
 import sys
-import math
+import time
+import argparse
 import numpy as np
 from PyQt5.QtWidgets import (
     QApplication,
@@ -8,26 +9,70 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QPushButton,
     QComboBox,
+    QLabel,
 )
 from PyQt5.QtWidgets import QTextEdit
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 import pyqtgraph as pg
 import serial.tools.list_ports
 
 from serial_reader import SerialReader
 from frame import FrameProcessor
-import datetime
+from sample_store import SampleStore
+from integrator import StreamingIntegrator, integrate_batch
+from render_scheduler import RenderScheduler
+from decimator import MinMaxDecimator, decimate_minmax
+from offset_estimator import OffsetEstimator
+from throttled_log import ThrottledLog
+from packet_log import PacketLog, PacketLogView
+from gpio_decoder import decode_gpio_events, expand_gpio_steps
+from arc_analysis import (
+    ArcTracker,
+    analyze_capture,
+    phase_analysis,
+)
+from analysis_worker import AnalysisWorker
+from timeline import AdcTimeline
+from metrics import MetricsCollector, MetricsServer, register_reader_metrics
+from recorder import CaptureRecorder, capture_filename
+from exporter import CaptureExporter, export_basename
+from replay import ReplayReader
+from shm_reader import SharedMemoryReader
+from commands import START_CMD, STOP_CMD, TRGMODE_CMD, INTMODE_CMD, RESET_CMD
+
+# Packets are delivered to the GUI thread in batches, one per time slice (s)
+BATCH_INTERVAL_S = 0.02
+
+# Plot redraw rate (frames per second), independent of the packet rate
+RENDER_FPS = 30
+
+# Record the raw packets of every capture to capture_<timestamp>.cap in this directory
+# (None disables recording)
+CAPTURE_DIR = "."
+
+# Export every capture (ADC samples, GPIO edges, analysis results) to
+# adc_data_<timestamp>*.csv/json in this directory while it runs (None disables export)
+EXPORT_DIR = "."
 
-# Define the command constants
-START_CMD = "START____"
-STOP_CMD = "STOP_____"
-TRGMODE_CMD = "TRGMODE__"
-INTMODE_CMD = "INTMODE__"
-RESET_CMD = "RESET____"
+# Text color of each load type in the phase angle analysis
+LOAD_TYPE_COLORS = {"Resistive": "#9C27B0", "Capacitive": "#2196F3", "Inductive": "#FF9800"}
+
+# Longest time closing the window waits for the export to be written (s)
+EXPORT_CLOSE_TIMEOUT_S = 1.0
+
+# Serve the acquisition metrics on http://127.0.0.1:<port>/metrics (Prometheus text)
+# and /metrics.json (None disables the endpoint; the status panel stays)
+METRICS_PORT = 9464
+
+# Metrics sampling and status panel refresh interval (s)
+METRICS_INTERVAL_S = 1.0
 
 
 class LivePlotter(QWidget):
-    def __init__(self):
+    # (generation, results) of an arc analysis, posted from the worker thread
+    analysis_finished = pyqtSignal(int, object)
+
+    def __init__(self, render_fps=RENDER_FPS):
         super().__init__()
         self.setWindowTitle("Arc Analysis System")
         self.resize(1200, 800)
@@ -45,6 +90,12 @@ class LivePlotter(QWidget):
                 background-color: white;
                 padding: 5px;
             }
+            QListView {
+                border: 1px solid #cccccc;
+                border-radius: 4px;
+                background-color: white;
+                font-family: Consolas, 'Courier New', monospace;
+            }
             QPushButton {
                 background-color: #4285f4;
                 color: white;
@@ -72,18 +123,40 @@ class LivePlotter(QWidget):
         self.start_time_us = None
 
         # Data buffers
-        self.adc_time_data = []
-        self.adc_signal_data = []
-        self.integrated_adc_data = []  # Store integrated current values
+        self.sample_store = SampleStore()
+        self.adc_time_data = self.sample_store.add("adc_time", np.float64)
+        self.adc_signal_data = self.sample_store.add("adc_signal", np.float64)
+        # Store integrated current values
+        self.integrated_adc_data = self.sample_store.add("adc_integrated", np.float64)
 
         # Digital signal data
-        self.gpio_time_data = []
-        self.gpio_signal_data = []
-        self.gpio_binary_data = []
+        self.gpio_time_data = self.sample_store.add("gpio_time", np.float64)
+        self.gpio_signal_data = self.sample_store.add("gpio_signal", np.float32)
+        self.gpio_binary_data = self.sample_store.add("gpio_binary", np.uint8)
 
         # Serial Reader and Frame Processor
         self.serial_reader = None
+        self.recorder = None
+        self.export_dir = EXPORT_DIR
+        self.exporter = None
+        # Read the port in a separate acquisition process (SharedMemoryReader)
+        self.use_acquisition_process = False
         self.frame_processor = FrameProcessor()
+        self.integrator = StreamingIntegrator()
+
+        # Arc analysis runs on a worker thread against a snapshot of the capture
+        # (see analysis_snapshot)
+        self.analysis_worker = AnalysisWorker(self.analysis_finished.emit)
+        self.analysis_finished.connect(self.handle_analysis_result)
+        # Arc timing, updated with every GPIO event as it arrives
+        self.arc_tracker = ArcTracker()
+        # Firmware times of the ADC samples and the gaps of the capture (new at each C0)
+        self.adc_timeline = AdcTimeline(self.frame_processor.sampling_rate_hz)
+        self.reader_desync_bytes = 0  # desync_bytes of the serial reader at the last batch
+
+        # Peak-preserving decimation of the ADC curves for display
+        self.adc_decimator = MinMaxDecimator()
+        self.integrated_decimator = MinMaxDecimator()
 
         # Flag to track plotting state
         self.is_running = False
@@ -142,6 +215,31 @@ class LivePlotter(QWidget):
         # Add legend to the plot
         self.plot_widget.addLegend(offset=(-30, 30))
 
+        # Curves are redrawn at a fixed frame rate; ingestion only marks them dirty
+        self.render_scheduler = RenderScheduler(render_fps, self)
+        self.render_scheduler.register("adc", self.render_adc_curve)
+        self.render_scheduler.register("gpio", self.render_gpio_curve)
+        self.render_scheduler.start()
+
+        # Acquisition metrics, sampled once per interval into the status panel
+        # and the metrics endpoint
+        self.metrics = MetricsCollector()
+        self.metrics_server = None
+        self.deliveries_handled = 0  # Packets/batches of the current reader handled so far
+        self.handle_latency = self.metrics.histogram(
+            "handle_seconds", "Time to handle one packet or batch on the GUI thread"
+        )
+        self.render_scheduler.frame_histogram = self.metrics.histogram(
+            "render_seconds", "Time to render one frame"
+        )
+        self.register_metrics()
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_metrics)
+        self.metrics_timer.start(int(METRICS_INTERVAL_S * 1000))
+        self.plot_widget.getViewBox().sigXRangeChanged.connect(
+            lambda *_: self.render_scheduler.mark_dirty("adc")
+        )
+
         # --- Controls ---
         self.port_selector = QComboBox()
         self.refresh_ports()
@@ -184,6 +282,20 @@ class LivePlotter(QWidget):
         self.adc_offset = 0.0  # Store calculated offset value
         self.offset_window_size = 500  # Number of samples to use for offset calculation
 
+        # Dead band (V or kA) a current zero-crossing must clear; 0 disables
+        self.zero_crossing_hysteresis = 0.0
+
+        # Sliding-window offset estimate over the last 2000 samples, updated
+        # per block; works on ADC codes, so it needs the voltage mapping
+        resolution = self.frame_processor.adc_resolution
+        self.offset_estimator = OffsetEstimator(
+            window=2000,
+            levels=2**resolution,
+            scale=self.frame_processor.vref / (2**resolution - 1),
+            zero=-1.65,
+        )
+        self.offset_log = ThrottledLog(interval_s=1.0)
+
         self.start_btn.clicked.connect(self.start_plotting)
         self.stop_btn.clicked.connect(self.stop_plotting)
         self.trgmode_btn.clicked.connect(lambda: self.send_command(TRGMODE_CMD))
@@ -211,10 +323,11 @@ class LivePlotter(QWidget):
         self.update_signal_widget()
         self.update_gpio_widget()
 
-        # Left widget for hex data
-        self.log_output = QTextEdit()
-        self.log_output.setReadOnly(True)
+        # Left widget for hex data: bounded packet log, refreshed once per frame
+        self.packet_log = PacketLog()
+        self.log_output = PacketLogView(self.packet_log)
         self.log_output.setMinimumHeight(150)
+        self.render_scheduler.register("log", self.log_output.refresh)
 
         # Middle widget for system information
         self.system_info_widget = QTextEdit()
@@ -226,6 +339,10 @@ class LivePlotter(QWidget):
         self.phase_angle_widget.setReadOnly(True)
         self.phase_angle_widget.setMinimumHeight(150)
 
+        # One-line acquisition status panel (see update_metrics)
+        self.status_label = QLabel("No data yet")
+        self.status_label.setStyleSheet("font-family: monospace; color: #555555;")
+
         # Create bottom layout to hold the three widgets
         bottom_layout = QHBoxLayout()
         bottom_layout.addWidget(self.log_output)
@@ -239,6 +356,7 @@ class LivePlotter(QWidget):
         main_layout.addLayout(
             bottom_layout, 1
         )  # Bottom layout gets equal stretch factor of 1
+        main_layout.addWidget(self.status_label)
 
     def update_system_widget(self):
         """Update the system overview widget"""
@@ -486,71 +604,40 @@ class LivePlotter(QWidget):
     def integrate_adc_signal(self):
         """
         Integrate the Rogowski coil signal (dI/dt) to get the actual current (I).
-        Uses the trapezoidal rule for numerical integration with improved drift correction
-        and proper scaling.
+        Batch version over the whole capture, used for offline re-analysis;
+        during capture the StreamingIntegrator processes only new samples.
         """
-        if len(self.adc_time_data) < 2 or len(self.adc_signal_data) < 2:
-            return []
-
-        # Reset integrated data
-        integrated = []
-
-        # Remove any DC offset from the input signal first
-        # This helps prevent linear drift in the integrated result
-        signal_mean = sum(self.adc_signal_data) / len(self.adc_signal_data)
-        centered_signal = [val - signal_mean for val in self.adc_signal_data]
-
-        # Use cumulative trapezoidal integration
-        # This is more efficient than the previous point-by-point approach
-        dt_values = []
-        for i in range(1, len(self.adc_time_data)):
-            dt_values.append(self.adc_time_data[i] - self.adc_time_data[i - 1])
-
-        # Handle the first point separately
-        integrated.append(0)  # Start with zero as initial condition
-
-        # Perform trapezoidal integration
-        for i in range(1, len(centered_signal)):
-            # Trapezoidal rule: area = (y1+y2)/2 * dt
-            y_avg = (centered_signal[i] + centered_signal[i - 1]) / 2
-            area = y_avg * dt_values[i - 1]
-            integrated.append(integrated[-1] + area)
-
-        # Apply a high-pass filter to remove remaining drift
-        if len(integrated) > 10:
-            # Improved high-pass filter with better parameters
-            window_size = min(30, len(integrated) // 4)
-            if window_size > 1:
-                # Use numpy for more efficient computation
-                moving_avg = np.convolve(
-                    integrated, np.ones(window_size) / window_size, mode="same"
-                )
-                # Subtract moving average (acts as high-pass filter)
-                integrated = [
-                    integrated[i] - moving_avg[i] for i in range(len(integrated))
-                ]
-
-        # Apply calibration factor of 2.5kA/V for the Rogowski coil
-        # This converts the integrated signal from Volts to Kiloamperes
-        calibration_factor = 2.5  # 2.5 Kiloamperes per Volt (2500A/V ÷ 1000)
-        integrated = [val * calibration_factor for val in integrated]
+        return integrate_batch(self.adc_time_data.view(), self.adc_signal_data.view())
 
-        return integrated
+    def update_integrated_data(self):
+        """Recompute the integrated current for the whole capture."""
+        # The buffer is rewritten in place, under a running analysis
+        self.analysis_worker.cancel()
+        self.integrated_adc_data.clear()
+        self.integrated_adc_data.extend(self.integrate_adc_signal())
+        self.integrated_decimator.rebuild(self.integrated_adc_data.view())
 
     def start_plotting(self):
         if not self.is_running:
             self.is_running = True
             self.set_controls_enabled(False)  # Disable other controls
+            # The buffers are rewritten in place, under the analysis stop_plotting started
+            self.analysis_worker.cancel()
             self.adc_time_data.clear()
             self.adc_signal_data.clear()
             self.integrated_adc_data.clear()
             self.gpio_time_data.clear()
             self.gpio_signal_data.clear()
             self.gpio_binary_data.clear()
-            self.adc_curve.setData([], [])
-            self.gpio_curve.setData([], [])
+            self.arc_tracker.reset()
+            self.integrator.reset()
+            self.adc_decimator.reset()
+            self.integrated_decimator.reset()
+            self.offset_estimator.reset()
+            self.render_scheduler.mark_dirty("adc", "gpio")
             self.start_time_us = None
             print("[INFO] Plotting started.")
+            self.start_recording()
             self.send_command(START_CMD)
 
     def set_controls_enabled(self, enabled):
@@ -570,9 +657,58 @@ class LivePlotter(QWidget):
         if self.is_running:
             self.is_running = False
             self.set_controls_enabled(True)  # Re-enable other controls
+            # Replace the live (causal) integration by the offline result
+            self.update_integrated_data()
+            self.render_scheduler.mark_dirty("adc", "gpio")
             self.process_arc_analysis()
             print("[INFO] Plotting stopped.")
+            print(f"[INFO] Sample store: {self.sample_store.summary()}")
+            timeline = self.adc_timeline
+            print(
+                f"[INFO] ADC timeline: {timeline.received_samples} samples received, "
+                f"{timeline.lost_samples} lost in {len(timeline.gaps)} gap(s), "
+                f"{timeline.duplicate_samples} repeated, {timeline.desync_events} desync(s)"
+            )
             self.send_command(STOP_CMD)
+            self.stop_recording()
+
+    def start_recording(self):
+        """Record the raw packets of the capture that is starting."""
+        self.stop_recording()
+        if CAPTURE_DIR is None:
+            return
+        if isinstance(self.serial_reader, SharedMemoryReader):
+            # The acquisition process has the raw packets and records them itself
+            path = capture_filename(CAPTURE_DIR)
+            self.serial_reader.record(path)
+            print(f"[INFO] Recording to {path}")
+            return
+        if not isinstance(self.serial_reader, SerialReader):
+            return
+        try:
+            self.recorder = CaptureRecorder(capture_filename(CAPTURE_DIR))
+        except OSError as e:
+            print(f"[ERROR] Could not start recording: {e}")
+            return
+        self.serial_reader.recorder = self.recorder
+        print(f"[INFO] Recording to {self.recorder.path}")
+
+    def stop_recording(self):
+        """Detach the recorder and write out everything it still holds."""
+        if isinstance(self.serial_reader, SharedMemoryReader):
+            self.serial_reader.record(None)
+        if not self.recorder:
+            return
+        if self.serial_reader:
+            self.serial_reader.recorder = None
+        complete = self.recorder.close()
+        print(
+            f"[INFO] Recorded {self.recorder.records_written} packets "
+            f"({self.recorder.dropped_packets} dropped) to {self.recorder.path}"
+        )
+        if not complete and self.recorder.error is None:
+            print(f"[INFO] Recording to {self.recorder.path} is still being written")
+        self.recorder = None
 
     def refresh_ports(self):
         ports = serial.tools.list_ports.comports()
@@ -587,24 +723,122 @@ class LivePlotter(QWidget):
 
         if port_name:
             try:
-                self.serial_reader = SerialReader(port_name)
-                self.serial_reader.packet_received.connect(self.handle_packet)
+                reader_class = (
+                    SharedMemoryReader if self.use_acquisition_process else SerialReader
+                )
+                self.serial_reader = reader_class(
+                    port_name, batch_interval=BATCH_INTERVAL_S
+                )
+                self.serial_reader.packet_batch_received.connect(self.handle_batch)
+                self.deliveries_handled = 0
                 if not self.serial_reader.running:
                     self.serial_reader.start()
                 print(f"[INFO] Connected to {port_name}")
             except Exception as e:
                 print(f"[ERROR] Could not connect: {e}")
 
+    def open_replay(self, path, speed=1.0):
+        """
+        Replay a recorded capture instead of reading a serial port.
+
+        Args:
+            path: .cap file written by CaptureRecorder
+            speed: 1 for real time, N for N times faster, 0 for as fast as possible
+        """
+        if self.serial_reader:
+            self.serial_reader.stop()
+        self.serial_reader = ReplayReader(
+            path, speed=speed, batch_interval=BATCH_INTERVAL_S, parent=self
+        )
+        self.serial_reader.packet_batch_received.connect(self.handle_batch)
+        self.deliveries_handled = 0
+        self.serial_reader.start()
+
     def send_command(self, cmd_str):
-        if self.serial_reader and self.serial_reader.ser.is_open:
+        if self.serial_reader and self.serial_reader.running:
             print(f"[CMD] Sending: {cmd_str}")
-            self.serial_reader.ser.write(cmd_str.encode("ascii"))
+            self.serial_reader.send_signal(cmd_str.encode("ascii"))
+
+    def register_metrics(self):
+        """Register the metric sources; they are read only when the metrics are sampled."""
+        metrics = self.metrics
+        register_reader_metrics(metrics, lambda: self.serial_reader)
+        metrics.counter(
+            "lost_adc_samples_total", lambda: self.adc_timeline.lost_samples,
+            "ADC samples of the current capture found missing",
+        )
+        metrics.gauge(
+            "delivery_queue_depth",
+            lambda: self.serial_reader.deliveries - self.deliveries_handled,
+            "Packets or batches emitted by the reader thread and not yet handled",
+        )
+        metrics.gauge(
+            "sample_store_bytes", lambda: self.sample_store.nbytes,
+            "Memory of the capture buffers",
+        )
 
-    def log_packet(self, packet: bytes):
-        hex_str = " ".join(f"{b:02X}" for b in packet)
-        self.log_output.append(hex_str)
+    def start_metrics_server(self, port=METRICS_PORT):
+        """Serve the metrics on localhost (see metrics.MetricsServer)."""
+        if port is None:
+            return
+        try:
+            self.metrics_server = MetricsServer(self.metrics, port)
+        except OSError as e:
+            print(f"[ERROR] Could not serve metrics on port {port}: {e}")
+            return
+        self.metrics_server.start()
+        print(f"[INFO] Metrics on http://127.0.0.1:{self.metrics_server.port}/metrics")
+
+    def update_metrics(self):
+        """Sample the metrics and show them in the status panel."""
+        snapshot = self.metrics.sample()
+        counters = snapshot["counters"]
+        rates = snapshot["rates"]
+        gauges = snapshot["gauges"]
+        histograms = snapshot["histograms"]
+
+        parts = []
+        if rates.get("bytes_received_total") is not None:
+            parts.append(
+                f"{rates['bytes_received_total'] / 1000:.1f} kB/s, "
+                f"{rates['packets_received_total']:.0f} packets/s"
+            )
+        if rates.get("packets_total"):
+            parts.append(
+                " ".join(f"{h} {rate:.0f}" for h, rate in sorted(rates["packets_total"].items()))
+            )
+        if counters.get("desync_bytes_total") is not None:
+            parts.append(f"desync {counters['desync_bytes_total']} B")
+        if gauges.get("reader_backlog_bytes") is not None:
+            parts.append(
+                f"backlog {gauges['reader_backlog_bytes']} B "
+                f"(peak {gauges['reader_backlog_peak_bytes']} B)"
+            )
+        if gauges.get("delivery_queue_depth") is not None:
+            parts.append(f"queue {gauges['delivery_queue_depth']}")
+        # Over the last interval; /metrics has the cumulative buckets
+        for name, label in (("handle_seconds", "handle"), ("render_seconds", "render")):
+            p99 = histograms[name]["recent"]["p99"]
+            if p99 is not None:
+                parts.append(f"{label} p99 {p99 * 1000:.2g} ms")
+        parts.append(f"store {gauges['sample_store_bytes'] / (1024 * 1024):.1f} MiB")
+        if counters["lost_adc_samples_total"]:
+            parts.append(f"lost {counters['lost_adc_samples_total']} samples")
+        self.status_label.setText(" | ".join(parts))
+
+    def log_packet(self, packet: bytes, t_ns=None):
+        """Add one packet, or several back to back, to the packet log."""
+        self.packet_log.add(packet, t_ns)
+        self.render_scheduler.mark_dirty("log")
 
     def handle_packet(self, packet):
+        """Handle one packet from the serial reader (timed for the metrics)."""
+        t0 = time.perf_counter()
+        self.process_packet(packet)
+        self.handle_latency.observe(time.perf_counter() - t0)
+        self.deliveries_handled += 1
+
+    def process_packet(self, packet):
         # print(f"Packet header: 0x{packet[0]:02X}")
 
         self.log_packet(packet)
@@ -613,428 +847,311 @@ class LivePlotter(QWidget):
         data = packet[1:]
 
         if header == 0xC0:  # Start timestamp
-            if len(data) >= 4:
-                self.start_time_us = int.from_bytes(
-                    data[:4], byteorder="little"
-                )  # Use all 4 bytes for timestamp
-                self.adc_time_data.clear()
-                self.adc_signal_data.clear()
-                self.integrated_adc_data.clear()
-                self.gpio_time_data.clear()
-                self.gpio_signal_data.clear()
-                self.gpio_binary_data.clear()
-
-                # Initialize digital signal with a starting point at time 0
-                self.gpio_time_data.append(0)
-                self.gpio_signal_data.append(0)  # Assume starting at LOW
-                self.gpio_binary_data.append(0)
-                self.gpio_curve.setData(self.gpio_time_data, self.gpio_signal_data)
-
-                self.adc_curve.setData([], [])
-                print(f"[SYNC] Start time: {self.start_time_us} µs")
-            else:
-                print(f"Invalid data for timestamp: {data}")
-                return
+            self.handle_sync(data)
 
         elif header == 0xA0 and self.start_time_us is not None:
+            voltages = self.frame_processor.parse_frame(data)
+            times = self.adc_timeline.add(len(voltages))
             if self.is_running:
                 if len(data) > 0:
-                    voltages = self.frame_processor.parse_frame(data)
-
-                    # Generate relative time values in ms using the frame processor
-                    relative_times_ms = (
-                        self.frame_processor.generate_time_axis(len(voltages)) * 1000.0
-                    )
-
-                    # Determine where the time continues from
-                    last_time = (
-                        self.adc_time_data[-1]
-                        + self.frame_processor.sample_period * 1000
-                        if self.adc_time_data
-                        else 0
-                    )
-
-                    # Shift the new times to continue smoothly
-                    times = [last_time + t for t in relative_times_ms]
-
-                    # Update time and voltage data
-                    self.adc_time_data.extend(times)
-                    self.adc_signal_data.extend(voltages)
-
-                    # Calculate/update signal offset if needed
-                    if self.offset_correction_enabled:
-                        # Recalculate offset periodically to adapt to signal changes
-                        # Only recalculate if we have at least 100 new data points since last calculation
-                        if not self.adc_offset or len(self.adc_signal_data) % 100 == 0:
-                            self.calculate_adc_offset()
-
-                    # Integrate the ADC signal to get current
-                    self.integrated_adc_data = self.integrate_adc_signal()
-
-                    # Update the plot with either raw or integrated data based on toggle state
-                    if hasattr(self, "showing_integrated") and self.showing_integrated:
-                        plot_data = self.integrated_adc_data
-                    else:
-                        # Apply offset correction if enabled
-                        if self.offset_correction_enabled:
-                            plot_data = [
-                                v - self.adc_offset for v in self.adc_signal_data
-                            ]
-                        else:
-                            plot_data = self.adc_signal_data
-
-                    self.adc_curve.setData(self.adc_time_data, plot_data)
-
+                    self.handle_adc_voltages(voltages, times)
                 else:
                     print("No ADC data found")
                     return
 
+        elif header == 0xD0 and self.start_time_us is not None:
+            # Without receive times only the block alignment can be checked
+            self.adc_timeline.add(0, caught_up=0)
+
         elif header == 0xB0 and self.start_time_us is not None:
             # print(f"[DEBUG] GPIO packet received! Data length: {len(data)} bytes")
             # print(f"[DEBUG] Raw GPIO data: {' '.join([f'{b:02X}' for b in data])}")
 
             if len(data) % 5 == 0:  # GPIO event format (timestamp + level)
-                new_time_data, new_display_data, new_binary_data = (
-                    self.handle_gpio_data(data)
-                )
-                self.gpio_time_data.extend(new_time_data)
-                self.gpio_signal_data.extend(new_display_data)
-                self.gpio_binary_data.extend(new_binary_data)
-                # print("Adding GPIO data to plot")
-                self.gpio_curve.setData(self.gpio_time_data, self.gpio_signal_data)
+                self.handle_gpio_events(data)
 
-                # Process arc analysis when GPIO events are detected
+    def handle_batch(self, batch):
+        """Handle a PacketBatch from the serial reader (timed for the metrics)."""
+        t0 = time.perf_counter()
+        self.process_batch(batch)
+        self.handle_latency.observe(time.perf_counter() - t0)
+        self.deliveries_handled += 1
 
-                # Log packet
-                self.log_packet(packet)
-
-    def detect_arc_start_time(self, gpio_times, gpio_levels):
+    def process_batch(self, batch):
         """
-        Detect the arc start time (first rising edge of GPIO signal).
-
-        Args:
-            gpio_times: List of GPIO event timestamps
-            gpio_levels: List of GPIO signal levels (0 or 1)
+        Apply a PacketBatch from the serial reader.
 
-        Returns:
-            Arc start time in ms, or None if not found
+        All A0 samples and B0 events of the batch are appended in one step,
+        so decoding and integration run once per batch instead of once per
+        packet.
         """
-        if not gpio_times or len(gpio_times) < 2:
-            return None
+        self.log_packet(batch.raw, batch.t_ns or None)
 
-        # Find the first rising edge (transition from 0 to 1)
-        for i in range(1, len(gpio_levels)):
-            if gpio_levels[i - 1] == 0 and gpio_levels[i] == 1:
-                return gpio_times[i]
+        if batch.sync is not None:
+            self.handle_sync(batch.sync, batch.sync_received)
 
-        return None
+        desync_bytes = getattr(self.serial_reader, "desync_bytes", 0)
+        if desync_bytes > self.reader_desync_bytes and self.start_time_us is not None:
+            self.adc_timeline.desync(desync_bytes - self.reader_desync_bytes)
+        self.reader_desync_bytes = desync_bytes
 
-    def detect_arc_end_time(self, gpio_times, gpio_levels):
-        """
-        Detect the raw arc end time (falling edge after which signal stays LOW for ≥5ms).
-
-        Args:
-            gpio_times: List of GPIO event timestamps
-            gpio_levels: List of GPIO signal levels (0 or 1)
+        if self.start_time_us is None:
+            return
 
-        Returns:
-            Tuple of (raw_end_time, pulse_pair_duration) in ms, or (None, None) if not found
-        """
-        if not gpio_times or len(gpio_times) < 2:
-            return None, None
-
-        # Find falling edges
-        falling_edges = []
-        for i in range(1, len(gpio_levels)):
-            if gpio_levels[i - 1] == 1 and gpio_levels[i] == 0:
-                falling_edges.append((i, gpio_times[i]))
-
-        # Check each falling edge to see if signal stays LOW for at least 5ms
-        for idx, (i, time) in enumerate(falling_edges):
-            # Check if this is the last falling edge
-            if idx == len(falling_edges) - 1:
-                if i < len(gpio_times) - 1 and gpio_times[-1] - time >= 5.0:
-                    # If we're at the last falling edge and there's 5ms of data after it
-                    # Find the last pulse pair duration
-                    last_pair_duration = self.find_last_pulse_pair_duration(
-                        gpio_times, gpio_levels, i
-                    )
-                    return time, last_pair_duration
-            else:
-                # Check if signal stays LOW until next rising edge
-                next_rising_idx = None
-                for j in range(i + 1, len(gpio_levels)):
-                    if gpio_levels[j] == 1:
-                        next_rising_idx = j
-                        break
-
-                if next_rising_idx is None:
-                    # No more rising edges, check if we have 5ms of data after this falling edge
-                    if gpio_times[-1] - time >= 5.0:
-                        last_pair_duration = self.find_last_pulse_pair_duration(
-                            gpio_times, gpio_levels, i
-                        )
-                        return time, last_pair_duration
-                elif gpio_times[next_rising_idx] - time >= 5.0:
-                    # Next rising edge is more than 5ms away
-                    last_pair_duration = self.find_last_pulse_pair_duration(
-                        gpio_times, gpio_levels, i
-                    )
-                    return time, last_pair_duration
-
-        return None, None
-
-    def find_last_pulse_pair_duration(self, gpio_times, gpio_levels, end_idx):
-        """
-        Find the duration of the first pulse pair AFTER the arc end.
+        if batch.adc.size or batch.status or batch.adc_lost:
+            # Samples keep counting while stopped, so the gap checks stay valid
+            times = self.adc_timeline.add(
+                batch.adc.size, batch.status_received, batch.adc_lost, batch.adc_before_status()
+            )
+            if batch.adc.size and self.is_running:
+                self.handle_adc_voltages(
+                    self.frame_processor.counts_to_voltage(batch.adc), times
+                )
 
-        Args:
-            gpio_times: List of GPIO event timestamps
-            gpio_levels: List of GPIO signal levels (0 or 1)
-            end_idx: Index of the falling edge that marks the end of the arc
+        if batch.gpio:
+            self.handle_gpio_events(batch.gpio)
 
-        Returns:
-            Duration of the pulse pair in ms, or 0 if not found
+    def handle_sync(self, data, received=None):
         """
-        # Look forward from end_idx to find the first complete pulse pair after the arc end
-        if end_idx >= len(gpio_times) - 1:
-            return 0  # Not enough data after end_idx
-
-        # Find the first two rising edges and two falling edges after end_idx
-        rising_edges = []
-        falling_edges = []
-
-        # Start searching from the index after end_idx
-        i = end_idx + 1
-        while i < len(gpio_levels) and (
-            len(rising_edges) < 2 or len(falling_edges) < 2
-        ):
-            if i > 0:
-                # Detect rising edge
-                if gpio_levels[i - 1] == 0 and gpio_levels[i] == 1:
-                    rising_edges.append(i)
-                # Detect falling edge
-                elif gpio_levels[i - 1] == 1 and gpio_levels[i] == 0:
-                    falling_edges.append(i)
-            i += 1
-
-        # If we found at least 2 rising edges and 2 falling edges, we can calculate the pulse pair duration
-        if len(rising_edges) >= 2 and len(falling_edges) >= 2:
-            # First rising edge to second falling edge
-            t_rising1 = gpio_times[rising_edges[0]]
-            t_falling2 = gpio_times[falling_edges[1]]
-
-            # Calculate the duration from first rising edge to second falling edge
-            return t_falling2 - t_rising1
-
-        return 0  # Default if we can't find a valid pulse pair
-
-    def find_zero_crossings(self, gpio_times, gpio_levels, raw_end_time=None):
+        Handle a C0 start timestamp: reset all buffers for a new capture.
+
+        received is the receive window (earliest_ns, latest_ns) of the
+        packet, or None if unknown: the wall clock reference of the ADC
+        timeline's loss checks.
         """
-        Find all voltage zero-crossing timestamps from GPIO double-pulses.
-        If raw_end_time is provided, only include zero-crossings after this time.
+        if len(data) < 4:
+            print(f"Invalid data for timestamp: {data}")
+            return
 
-        Args:
-            gpio_times: List of GPIO event timestamps
-            gpio_levels: List of GPIO signal levels (0 or 1)
-            raw_end_time: Optional, only include zero-crossings after this time
+        self.start_time_us = int.from_bytes(
+            data[:4], byteorder="little"
+        )  # Use all 4 bytes for timestamp
+        self.adc_time_data.clear()
+        self.adc_signal_data.clear()
+        self.integrated_adc_data.clear()
+        self.gpio_time_data.clear()
+        self.gpio_signal_data.clear()
+        self.gpio_binary_data.clear()
+        self.integrator.reset()
+        self.adc_decimator.reset()
+        self.integrated_decimator.reset()
+        self.offset_estimator.reset()
+        self.adc_timeline = AdcTimeline(
+            self.frame_processor.sampling_rate_hz, self.start_time_us, received
+        )
+        # Results of an analysis of the previous capture are no longer wanted
+        self.analysis_worker.cancel()
+        self.start_export()
+
+        # Initialize digital signal with a starting point at time 0
+        self.gpio_time_data.append(0)
+        self.gpio_signal_data.append(0)  # Assume starting at LOW
+        self.gpio_binary_data.append(0)
+        self.arc_tracker.reset()
+        self.arc_tracker.feed([0.0], [0])
+
+        self.render_scheduler.mark_dirty("adc", "gpio")
+        print(f"[SYNC] Start time: {self.start_time_us} µs")
+
+    def start_export(self):
+        """Export the capture that is starting, replacing the export of the previous one."""
+        self.stop_export()
+        if self.export_dir is None:
+            return
+        try:
+            self.exporter = CaptureExporter(export_basename(self.export_dir))
+        except OSError as e:
+            print(f"[ERROR] Could not start export: {e}")
+            return
+        print(f"[INFO] Exporting to {self.exporter.adc_path}")
 
-        Returns:
-            List of zero-crossing timestamps in ms
+    def stop_export(self, timeout=EXPORT_CLOSE_TIMEOUT_S):
+        """Close the current export, waiting at most `timeout` seconds for it."""
+        if not self.exporter:
+            return
+        exporter = self.exporter
+        self.exporter = None
+        if exporter.close(timeout):
+            print(
+                f"[INFO] Exported {exporter.samples_written} samples and "
+                f"{exporter.edges_written} GPIO edges to {exporter.adc_path}"
+            )
+        elif exporter.error is None:
+            print(f"[INFO] Export to {exporter.adc_path} is still being written")
+        if exporter.dropped_items:
+            print(f"[ERROR] Export dropped {exporter.dropped_items} blocks")
+
+    def handle_adc_voltages(self, voltages, times=None):
         """
-        zero_crossings = []
-
-        # We need to identify double-pulse patterns
-        # A double-pulse consists of two closely spaced pulses
-        i = 0
-        while (
-            i < len(gpio_times) - 3
-        ):  # Need at least 4 points for a complete double-pulse
-            # Check for rising edge
-            if i > 0 and gpio_levels[i - 1] == 0 and gpio_levels[i] == 1:
-                # Found first rising edge (t1)
-                t1 = gpio_times[i]
-
-                # Skip if this is before the raw end time
-                if raw_end_time is not None and t1 < raw_end_time:
-                    i += 1
-                    continue
-
-                # Look for the second falling edge within a reasonable timeframe
-                # Double-pulses should be close together (e.g., within 2ms)
-                j = i + 1
-                found_second_falling = False
-
-                while j < len(gpio_times) and gpio_times[j] - t1 < 2.0:
-                    # Check for second falling edge
-                    if j > 0 and gpio_levels[j - 1] == 1 and gpio_levels[j] == 0:
-                        # This could be our second falling edge
-                        # Check if there's a rising edge between i and j
-                        has_rising_edge = False
-                        for k in range(i + 1, j):
-                            if gpio_levels[k - 1] == 0 and gpio_levels[k] == 1:
-                                has_rising_edge = True
-                                break
-
-                        if has_rising_edge:
-                            # Found a complete double-pulse pattern
-                            t2 = gpio_times[j]
-                            zero_crossing = (t1 + t2) / 2.0
-                            zero_crossings.append(zero_crossing)
-                            found_second_falling = True
-                            i = j  # Skip ahead
-                            break
-                    j += 1
-
-                if not found_second_falling:
-                    i += 1
-            else:
-                i += 1
-
-        return zero_crossings
-
-    def detect_current_zero_crossings(
-        self, adc_times, adc_values, start_time=None, end_time=None
-    ):
+        Append a block of ADC voltages (one or more A0 frames).
+
+        times are the sample times in ms from the ADC timeline; if not
+        given, the samples are assigned the next times of the timeline.
         """
-        Detect zero-crossings in the current signal.
+        if times is None:
+            times = self.adc_timeline.add(len(voltages))
+
+        # Update time and voltage data
+        samples_before = len(self.adc_signal_data)
+        self.adc_time_data.extend(times)
+        self.adc_signal_data.extend(voltages)
+        self.adc_decimator.append(voltages)
+        self.offset_estimator.update(voltages)
+        if self.exporter:
+            self.exporter.add_adc(times, voltages)
+
+        # Calculate/update signal offset if needed
+        if self.offset_correction_enabled:
+            # Recalculate offset periodically to adapt to signal changes
+            # Only recalculate if we crossed a multiple of 100 samples since last calculation
+            if (
+                not self.adc_offset
+                or len(self.adc_signal_data) // 100 != samples_before // 100
+            ):
+                self.calculate_adc_offset()
+
+        # Integrate the new samples to get current
+        integrated = self.integrator.process(times, voltages)
+        self.integrated_adc_data.extend(integrated)
+        self.integrated_decimator.append(integrated)
+
+        self.render_scheduler.mark_dirty("adc")
+
+    def handle_gpio_events(self, data):
+        """Append one or more B0 payloads (5-byte events)."""
+        new_time_data, new_display_data, new_binary_data = self.handle_gpio_data(data)
+        self.gpio_time_data.extend(new_time_data)
+        self.gpio_signal_data.extend(new_display_data)
+        self.gpio_binary_data.extend(new_binary_data)
+        if self.exporter:
+            self.exporter.add_gpio(data)
+
+        # Show arc timing and zero-crossings as soon as they are determined
+        if self.arc_tracker.feed(new_time_data, new_binary_data):
+            self.process_arc_analysis()
 
-        Args:
-            adc_times: List of timestamps in ms
-            adc_values: List of ADC values
-            start_time: Optional start time to limit detection window
-            end_time: Optional end time to limit detection window
+        self.render_scheduler.mark_dirty("gpio")
 
-        Returns:
-            List of zero-crossing timestamps in ms
+    def render_adc_curve(self):
         """
-        if not adc_times or len(adc_times) < 2 or len(adc_values) != len(adc_times):
-            return []
-
-        # Use integrated values for zero-crossing detection if available and same length
-        values_to_use = (
-            self.integrated_adc_data
-            if hasattr(self, "showing_integrated")
-            and self.showing_integrated
-            and len(self.integrated_adc_data) == len(adc_values)
-            else adc_values
-        )
+        Redraw the ADC curve with either raw or integrated data based on toggle state.
 
-        # Apply time window if specified
-        if start_time is None and end_time is None:
-            # If no time window is specified, use the GPIO trigger time as start
-            # and 60ms after that as end (as per requirements)
-            if hasattr(self, "gpio_time_data") and self.gpio_time_data:
-                start_time = self.gpio_time_data[0]  # First GPIO timestamp
-                end_time = start_time + 60.0  # 60ms after trigger
-
-        # Find zero-crossings (where the signal changes sign)
-        zero_crossings = []
-        for i in range(1, len(adc_times)):
-            # Check if this point is within our time window
-            if start_time is not None and adc_times[i] < start_time:
-                continue
-            if end_time is not None and adc_times[i] > end_time:
-                break
-
-            # Check for sign change (zero crossing)
-            if (values_to_use[i - 1] < 0 and values_to_use[i] > 0) or (
-                values_to_use[i - 1] > 0 and values_to_use[i] < 0
-            ):
+        At most about two points per horizontal pixel are drawn: the min and
+        max of each pixel bucket, so narrow arc transients stay visible.
+        """
+        if hasattr(self, "showing_integrated") and self.showing_integrated:
+            # The live integration trails the input by a few samples
+            data = self.integrated_adc_data.view()
+            decimator = self.integrated_decimator
+            offset = 0.0
+        else:
+            data = self.adc_signal_data.view()
+            decimator = self.adc_decimator
+            # Apply offset correction if enabled
+            offset = self.adc_offset if self.offset_correction_enabled else 0.0
+
+        times = self.adc_time_data[: len(data)]
+        width = max(100, self.plot_widget.width())
+        if decimator.max_buckets != width:
+            decimator.rebuild(data, width)
+
+        view_box = self.plot_widget.getViewBox()
+        x_min, x_max = view_box.viewRange()[0]
+        first, last = np.searchsorted(times, [x_min, x_max])
+        first, last = max(first - 1, 0), min(last + 1, len(data))
+        if view_box.autoRangeEnabled()[0]:
+            # Auto-range follows the data: use the incrementally maintained buckets
+            indices = decimator.indices()
+        elif last - first > len(data) // 2:
+            # Mostly zoomed out: the whole-capture buckets are fine enough
+            indices = decimator.indices()
+            indices = indices[(indices >= first) & (indices < last)]
+        else:
+            # Zoomed in: decimate just the visible part at full resolution
+            indices = first + decimate_minmax(data[first:last], width)
 
-                # Use linear interpolation to find the exact zero-crossing time
-                if values_to_use[i] != values_to_use[i - 1]:  # Avoid division by zero
-                    t_ratio = -values_to_use[i - 1] / (
-                        values_to_use[i] - values_to_use[i - 1]
-                    )
-                    t_zero = adc_times[i - 1] + t_ratio * (
-                        adc_times[i] - adc_times[i - 1]
-                    )
-                    zero_crossings.append(t_zero)
+        self.adc_curve.setData(times[indices], data[indices] - offset)
 
-        return zero_crossings
+    def render_gpio_curve(self):
+        """Redraw the GPIO step curve"""
+        self.gpio_curve.setData(
+            self.gpio_time_data.view(), self.gpio_signal_data.view()
+        )
 
     def process_arc_analysis(self):
         """
-        Process arc analysis based on GPIO and ADC data.
-
-        This method detects arc start/end times, calculates arc duration,
-        and finds zero-crossings in both voltage (GPIO) and current (ADC) signals.
+        Start the arc analysis of the current capture on the worker thread.
+
+        The analysis (arc start/end times, arc duration, zero-crossings in
+        both voltage (GPIO) and current (ADC) signals, phase angle) runs on
+        views of the capture buffers (see analysis_snapshot), so the GUI
+        stays responsive on long captures.
+        A newer request supersedes one that has not finished; the results
+        arrive in handle_analysis_result.
         """
         # Check if we have enough data
         if not self.gpio_time_data or not self.gpio_signal_data:
             return
+        self.analysis_worker.submit(analyze_capture, **self.analysis_snapshot())
+
+    def analysis_snapshot(self):
+        """
+        The data of the current capture as analyze_capture keyword arguments.
 
+        The arrays are views, not copies: while a capture runs the buffers
+        only grow, so a view keeps showing the samples it was taken with.
+        Whatever rewrites a buffer in place (start_plotting, handle_sync,
+        update_integrated_data) cancels the running analysis.
+        """
         # Use binary data for analysis if available, otherwise convert display data
-        if hasattr(self, "gpio_binary_data") and len(self.gpio_binary_data) == len(
-            self.gpio_time_data
-        ):
-            gpio_levels = self.gpio_binary_data
+        if len(self.gpio_binary_data) == len(self.gpio_time_data):
+            gpio_levels = self.gpio_binary_data.view()
         else:
             # Convert display levels to binary (0/1) for analysis
-            gpio_levels = [1 if level > 0 else 0 for level in self.gpio_signal_data]
-
-        # Get arc start time
-        t_start = self.detect_arc_start_time(self.gpio_time_data, gpio_levels)
-
-        # Get arc end time
-        raw_end_time, pulse_pair_duration = self.detect_arc_end_time(
-            self.gpio_time_data, gpio_levels
-        )
+            gpio_levels = (self.gpio_signal_data.view() > 0).astype(np.uint8)
 
-        # Find voltage zero-crossings (GPIO) after the raw end time
-        voltage_zero_crossings = self.find_zero_crossings(
-            self.gpio_time_data, gpio_levels, raw_end_time
-        )
-
-        # Calculate the corrected end time
-        t_end = None
-        if raw_end_time is not None:
-            if pulse_pair_duration is not None:
-                t_end = raw_end_time - (pulse_pair_duration / 2.0)
-            else:
-                t_end = raw_end_time
-
-        # Calculate arc duration
-        t_arc = None
-        if t_start is not None and raw_end_time is not None:
-            if pulse_pair_duration is not None:
-                t_arc = raw_end_time - t_start - (pulse_pair_duration / 2.0)
-            else:
-                t_arc = raw_end_time - t_start
-
-        # Find current zero-crossings from ADC data
-        current_zero_crossings = []
-        if (
-            self.adc_time_data
-            and self.adc_signal_data
-            and len(self.adc_time_data) == len(self.adc_signal_data)
-        ):
-            # Prepare the signal data for analysis - apply offset correction if enabled
-            analysis_data = self.adc_signal_data
+        # Current zero-crossings in the integrated current if it is shown,
+        # otherwise in the signal with the offset correction (if enabled)
+        offset = 0.0
+        if self.showing_integrated and len(self.integrated_adc_data) == len(self.adc_signal_data):
+            current_values = self.integrated_adc_data.view()
+        else:
+            current_values = self.adc_signal_data.view()
             if self.offset_correction_enabled:
-                # Use the offset-corrected signal for analysis
-                analysis_data = [v - self.adc_offset for v in self.adc_signal_data]
-
-            # Detect zero-crossings in the specified time window (from GPIO trigger to 60ms after)
-            current_zero_crossings = self.detect_current_zero_crossings(
-                self.adc_time_data,
-                analysis_data,
-                t_start,  # Start from GPIO trigger
-                (
-                    t_start + 60.0 if t_start is not None else None
-                ),  # End 60ms after trigger
-            )
+                offset = self.adc_offset
+
+        # The arc timing is known already if the tracker has seen every point
+        timing = None
+        if self.arc_tracker.points == len(self.gpio_time_data) == len(self.gpio_binary_data):
+            timing = self.arc_tracker.results()
+
+        return {
+            "adc_times": self.adc_time_data.view(),
+            "current_values": current_values,
+            "gpio_times": self.gpio_time_data.view(),
+            "gpio_levels": gpio_levels,
+            "hysteresis": self.zero_crossing_hysteresis,
+            "offset": offset,
+            "timing": timing,
+        }
+
+    def handle_analysis_result(self, generation, results):
+        """Show the results of an arc analysis, unless a newer one is on its way."""
+        if not self.analysis_worker.is_current(generation):
+            return
+
+        if self.exporter:
+            self.exporter.write_analysis(dict(results, timeline=self.adc_timeline.summary()))
 
         # Update the display with our findings
         self.update_arc_analysis_display(
-            t_start,
-            raw_end_time,
-            pulse_pair_duration,
-            t_end,
-            t_arc,
-            voltage_zero_crossings,
-            current_zero_crossings,
+            results["t_start"],
+            results["raw_end_time"],
+            results["pulse_pair_duration"],
+            results["t_end"],
+            results["t_arc"],
+            results["voltage_zero_crossings"],
+            results["current_zero_crossings"],
         )
 
     def update_arc_analysis_display(
@@ -1050,23 +1167,8 @@ class LivePlotter(QWidget):
         """
         Update the middle widget with arc analysis results.
         """
-        # If no current zero-crossings were provided but we have ADC data, detect them directly
-        if current_zero_crossings is None or len(current_zero_crossings) == 0:
-            if (
-                self.adc_time_data
-                and self.adc_signal_data
-                and len(self.adc_time_data) == len(self.adc_signal_data)
-            ):
-                # Prepare the signal data for analysis - apply offset correction if enabled
-                analysis_data = self.adc_signal_data
-                if self.offset_correction_enabled:
-                    # Use the offset-corrected signal for analysis
-                    analysis_data = [v - self.adc_offset for v in self.adc_signal_data]
-
-                # Detect all zero-crossings in the signal
-                current_zero_crossings = self.detect_current_zero_crossings(
-                    self.adc_time_data, analysis_data
-                )
+        if current_zero_crossings is None:
+            current_zero_crossings = []
         # Clear previous content
         self.system_info_widget.clear()
 
@@ -1143,6 +1245,28 @@ class LivePlotter(QWidget):
                     f"  ... and {len(current_zero_crossings) - 10} more"
                 )
 
+        # Report lost data, if any: the times above are firmware times across the gaps
+        timeline = self.adc_timeline
+        if timeline.lost_samples or timeline.duplicate_samples or timeline.desync_events:
+            self.system_info_widget.append("<h4>Data Integrity</h4>")
+            self.system_info_widget.append(
+                f"<b>Lost ADC Samples:</b> {timeline.lost_samples} "
+                f"in {len(timeline.gaps)} gap(s)"
+            )
+            for gap in timeline.gaps[:10]:
+                self.system_info_widget.append(
+                    f"  {gap['time_ms']:.3f} ms: {gap['samples']} samples ({gap['reason']})"
+                )
+            if timeline.duplicate_samples:
+                self.system_info_widget.append(
+                    f"<b>Repeated ADC Samples:</b> {timeline.duplicate_samples}"
+                )
+            if timeline.desync_events:
+                self.system_info_widget.append(
+                    f"<b>Desync Events:</b> {timeline.desync_events} "
+                    f"({timeline.desync_bytes} bytes)"
+                )
+
         # Calculate phase angle between voltage and current
         self.update_phase_angle_display(all_voltage_crossings, current_zero_crossings)
 
@@ -1181,7 +1305,8 @@ class LivePlotter(QWidget):
 
         # Check if we have both voltage and current zero-crossings
         # Now we need at least 2 crossings of each type to proceed (since we're skipping the first ones)
-        if len(voltage_zero_crossings) < 2 or len(current_zero_crossings) < 2:
+        phase = phase_analysis(voltage_zero_crossings, current_zero_crossings)
+        if phase is None:
             html_content = """
             <div style="text-align: center; padding: 20px; color: #757575;">
                 <p>⚠️ Insufficient zero-crossings detected ⚠️</p>
@@ -1191,99 +1316,28 @@ class LivePlotter(QWidget):
             self.phase_angle_widget.setHtml(html_content)
             return
 
-        # Skip the first zero-crossing for both voltage and current signals
-        # Use zero-crossings starting from the second one (index 1)
-        voltage_zero_crossings = voltage_zero_crossings[1:]
-        current_zero_crossings = current_zero_crossings[1:]
-
-        # Calculate the period of the signal
-        half_period_ms = None
-        if len(voltage_zero_crossings) >= 2:
-            half_period_ms = voltage_zero_crossings[1] - voltage_zero_crossings[0]
-        elif len(current_zero_crossings) >= 2:
-            half_period_ms = current_zero_crossings[1] - current_zero_crossings[0]
-
-        # If we couldn't determine the half-period, assume 50Hz (20ms period, 10ms half-period)
-        if half_period_ms is None or half_period_ms <= 0:
-            half_period_ms = 1000 / (50 * 2)  # 50Hz = 20ms period, 10ms half-period
-
-        # Full period is twice the time between consecutive zero-crossings (one full AC cycle)
-        period_ms = half_period_ms * 2
-
-        # Calculate frequency from the full period
-        frequency = 1000 / period_ms if period_ms > 0 else 50
-
-        # For each voltage zero-crossing, find the closest current zero-crossing
-        phase_angles = []
-        pairs_analyzed = 0
-
-        # Limit analysis to first 5 voltage zero-crossings to avoid overwhelming the display
-        for v_idx, v_zc in enumerate(voltage_zero_crossings[:5]):
-            # Find the closest current zero-crossing
-            closest_c_zc = None
-            min_distance = float("inf")
-
-            for c_zc in current_zero_crossings:
-                distance = abs(c_zc - v_zc)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_c_zc = c_zc
-
-            if closest_c_zc is not None:
-                # Calculate phase angle
-                time_diff_ms = closest_c_zc - v_zc
-                
-                # Normalize the time difference if it exceeds half a period
-                # This accounts for cases where the closest crossing is in the next or previous cycle
-                if abs(time_diff_ms) > period_ms / 2:
-                    if time_diff_ms > 0:
-                        time_diff_ms -= period_ms
-                    else:
-                        time_diff_ms += period_ms
-
-                phase_angle = (time_diff_ms / period_ms) * 360
-                phase_angles.append(phase_angle)
-
-                # Determine if current leads or lags voltage
-                direction = "→" if phase_angle > 0 else "←"
-
-                # Display the pair and calculation
-                self.phase_angle_widget.append(
-                    f"• Current @ <b>{closest_c_zc:.3f}</b> ms — Voltage @ <b>{v_zc:.3f}</b> ms ⇒ Φ = <b>{phase_angle:.1f}°</b>"
-                )
-                pairs_analyzed += 1
-
-        # Calculate statistics if we have phase angles
-        if phase_angles:
-            mean_phase = sum(phase_angles) / len(phase_angles)
-            min_phase = min(phase_angles)
-            max_phase = max(phase_angles)
+        # Display each voltage zero-crossing with its closest current zero-crossing
+        for closest_c_zc, v_zc, phase_angle in phase["pairs"]:
+            self.phase_angle_widget.append(
+                f"• Current @ <b>{closest_c_zc:.3f}</b> ms — Voltage @ <b>{v_zc:.3f}</b> ms ⇒ Φ = <b>{phase_angle:.1f}°</b>"
+            )
 
+        # Display statistics if we have phase angles
+        if phase["pairs"]:
             # Display statistics with color coding
             self.phase_angle_widget.append("<br>")
             self.phase_angle_widget.append(
-                f"<span style='color:#4CAF50;'>📊 Mean Phase Angle: <b>{mean_phase:.1f}°</b></span>"
+                f"<span style='color:#4CAF50;'>📊 Mean Phase Angle: <b>{phase['mean_phase_deg']:.1f}°</b></span>"
             )
             self.phase_angle_widget.append(
-                f"<span style='color:#2196F3;'>📉 Min: <b>{min_phase:.1f}°</b>, 📈 Max: <b>{max_phase:.1f}°</b></span>"
+                f"<span style='color:#2196F3;'>📉 Min: <b>{phase['min_phase_deg']:.1f}°</b>, 📈 Max: <b>{phase['max_phase_deg']:.1f}°</b></span>"
             )
             self.phase_angle_widget.append(
-                f"<span style='color:#FFC107;'>🔍 Pairs Analyzed: <b>{pairs_analyzed}</b></span>"
+                f"<span style='color:#FFC107;'>🔍 Pairs Analyzed: <b>{len(phase['pairs'])}</b></span>"
             )
 
-            # Calculate power factor based on mean phase angle
-            power_factor = abs(math.cos(math.radians(mean_phase)))
-
-            # Determine load type based on phase angle
-            if abs(mean_phase) < 5:  # Close to 0 degrees
-                load_type = "Resistive"
-                color = "#9C27B0"
-            elif mean_phase < 0:  # Current leads voltage
-                load_type = "Capacitive"
-                color = "#2196F3"
-            else:  # Voltage leads current
-                load_type = "Inductive"
-                color = "#FF9800"
+            load_type = phase["load_type"]
+            color = LOAD_TYPE_COLORS[load_type]
 
             # Add a legend
             self.phase_angle_widget.append("<br>")
@@ -1298,9 +1352,9 @@ class LivePlotter(QWidget):
             self.phase_angle_widget.append(
                 f"<span style='color:{color};'><b>Load Type:</b> {load_type}</span>"
             )
-            self.phase_angle_widget.append(f"<b>Power Factor:</b> {power_factor:.3f}")
-            self.phase_angle_widget.append(f"<b>Signal Period:</b> {period_ms:.2f} ms")
-            self.phase_angle_widget.append(f"<b>Frequency:</b> {frequency:.1f} Hz")
+            self.phase_angle_widget.append(f"<b>Power Factor:</b> {phase['power_factor']:.3f}")
+            self.phase_angle_widget.append(f"<b>Signal Period:</b> {phase['period_ms']:.2f} ms")
+            self.phase_angle_widget.append(f"<b>Frequency:</b> {phase['frequency_hz']:.1f} Hz")
         else:
             self.phase_angle_widget.append(
                 "<b>Phase Angle:</b> Could not calculate - insufficient data pairs"
@@ -1311,8 +1365,8 @@ class LivePlotter(QWidget):
 
         if self.showing_integrated:
             # Show integrated signal
-            self.integrated_adc_data = self.integrate_adc_signal()
-            self.adc_curve.setData(self.adc_time_data, self.integrated_adc_data)
+            self.update_integrated_data()
+            self.render_scheduler.mark_dirty("adc")
             self.adc_curve.setPen(
                 pg.mkPen("#FF8C00", width=2)
             )  # Change to orange for integrated signal
@@ -1335,12 +1389,7 @@ class LivePlotter(QWidget):
             )
             # Restore Y axis label to show Voltage
             self.plot_widget.setLabel("left", "Voltage", "V")
-            # Apply offset correction if enabled
-            if self.offset_correction_enabled:
-                plot_data = [v - self.adc_offset for v in self.adc_signal_data]
-                self.adc_curve.setData(self.adc_time_data, plot_data)
-            else:
-                self.adc_curve.setData(self.adc_time_data, self.adc_signal_data)
+            self.render_scheduler.mark_dirty("adc")
 
             # Update the zero-crossing detection and phase angle analysis with the raw data
             self.process_arc_analysis()
@@ -1353,19 +1402,16 @@ class LivePlotter(QWidget):
             self.offset_correction_btn.setText("Remove Offset Correction")
             self.calculate_adc_offset()
 
-            # Apply correction immediately
-            if not self.showing_integrated:
-                plot_data = [v - self.adc_offset for v in self.adc_signal_data]
-                self.adc_curve.setData(self.adc_time_data, plot_data)
+            # Apply correction on the next frame
+            self.render_scheduler.mark_dirty("adc")
 
             # Show the zero reference line
             self.zero_line.setVisible(True)
         else:
             self.offset_correction_btn.setText("Apply Offset Correction")
 
-            # Remove correction immediately
-            if not self.showing_integrated:
-                self.adc_curve.setData(self.adc_time_data, self.adc_signal_data)
+            # Remove correction on the next frame
+            self.render_scheduler.mark_dirty("adc")
 
             # Hide the zero reference line
             self.zero_line.setVisible(False)
@@ -1377,125 +1423,96 @@ class LivePlotter(QWidget):
         """
         Calculate the offset of the ADC signal using a robust method that accounts for signal asymmetry.
         This improved algorithm ensures better zero-centering even with distorted waveforms.
-        """
-        if not self.adc_signal_data:
-            self.adc_offset = 0.0
-            return
 
-        # Use a larger window size for more stable offset calculation
-        # This helps to cover multiple complete cycles for better accuracy
-        window_size = min(2000, len(self.adc_signal_data))
-        recent_data = self.adc_signal_data[-window_size:]
-
-        if not recent_data:
+        The blend of min-max midpoint, mean, median and zero-crossing average
+        over the last 2000 samples comes from the streaming OffsetEstimator,
+        which is updated as samples arrive, so no window is copied or sorted here.
+        """
+        offset = self.offset_estimator.estimate()
+        if offset is None:
             self.adc_offset = 0.0
             return
-
-        # Method 1: Standard min-max midpoint
-        min_val = min(recent_data)
-        max_val = max(recent_data)
-        midpoint_offset = (min_val + max_val) / 2
-
-        # Method 2: Mean value (works better for asymmetrical waveforms)
-        mean_offset = sum(recent_data) / len(recent_data)
-
-        # Method 3: Median (robust against outliers)
-        sorted_data = sorted(recent_data)
-        median_offset = sorted_data[len(sorted_data) // 2]
-
-        # Method 4: Zero-crossing average (finds the values just before zero crossings)
-        zero_cross_values = []
-        for i in range(1, len(recent_data)):
-            if (recent_data[i-1] < midpoint_offset and recent_data[i] >= midpoint_offset) or \
-               (recent_data[i-1] >= midpoint_offset and recent_data[i] < midpoint_offset):
-                # Average the values around potential zero crossing
-                zero_cross_values.append((recent_data[i-1] + recent_data[i]) / 2)
-        
-        zero_crossing_offset = sum(zero_cross_values) / len(zero_cross_values) if zero_cross_values else midpoint_offset
-
-        # Weighted combination of all methods for robust offset calculation
-        # For sine waves, mean and median should be very close to the true offset
-        # If they differ, we likely have an asymmetrical or distorted waveform
-        if abs(mean_offset - median_offset) < 0.1:  # Small difference indicates symmetrical signal
-            self.adc_offset = (mean_offset * 0.5) + (midpoint_offset * 0.3) + (zero_crossing_offset * 0.2)
-        else:  # Larger difference suggests asymmetry
-            # For asymmetrical signals, the median and zero-crossing methods often work better
-            self.adc_offset = (median_offset * 0.4) + (zero_crossing_offset * 0.4) + (mean_offset * 0.2)
+        self.adc_offset = offset
 
         # Apply a small amount of smoothing with previous offset (if it exists)
         if hasattr(self, 'prev_adc_offset'):
             self.adc_offset = 0.8 * self.adc_offset + 0.2 * self.prev_adc_offset
-        
+
         # Store current offset for future smoothing
         self.prev_adc_offset = self.adc_offset
 
-        print(
-            f"Calculated ADC offset: {self.adc_offset:.4f} V "
-            f"(min: {min_val:.4f}, max: {max_val:.4f}, mean: {mean_offset:.4f}, median: {median_offset:.4f})"
+        estimator = self.offset_estimator
+        self.offset_log.log(
+            "Calculated ADC offset: %.4f V (min: %.4f, max: %.4f, mean: %.4f, median: %.4f)",
+            self.adc_offset,
+            estimator.minimum,
+            estimator.maximum,
+            estimator.mean,
+            estimator.median,
         )
 
     def handle_gpio_data(self, data):
-        # Initialize with safe defaults if no previous data exists
-        timestamps = [self.gpio_time_data[-1]] if self.gpio_time_data else [0.0]
-        display_levels = [self.gpio_signal_data[-1]] if self.gpio_signal_data else [0.0]
-        binary_levels = [
-            1 if display_levels[0] > 0 else 0
-        ]  # Binary version for analysis
-
-        for i in range(0, len(data), 5):
-            ts_ms = int.from_bytes(data[i : i + 4], byteorder="little") * 2 / 1000.0
-            if ts_ms == 0:
-                continue
-
-            # Get the binary level (0 or 1)
-            is_high = bool(data[i + 4])
-
-            # For display: use 0 for LOW and 0.5 for HIGH
-            display_level = 0 if not is_high else 0.5
-
-            # For analysis: use binary 0/1
-            binary_level = 0 if not is_high else 1
+        """
+        Decode B0 payloads (one or many, back to back) into step-curve points.
 
-            # Draw a vertical edge only if level changed (for display)
-            if display_levels[-1] != display_level:
-                timestamps.append(ts_ms)
-                display_levels.append(display_levels[-1])  # Previous level
-                binary_levels.append(binary_levels[-1])  # Previous binary level
+        Continues from the last stored level, so a vertical edge is added
+        whenever the first new event changes it.
 
-            # Add the new point
-            timestamps.append(ts_ms)
-            display_levels.append(display_level)
-            binary_levels.append(binary_level)
+        Returns:
+            (timestamps, display_levels, binary_levels) as numpy arrays
+        """
+        # Initialize with safe defaults if no previous data exists
+        prev_display = self.gpio_signal_data[-1] if self.gpio_signal_data else 0.0
 
-        # Skip the first point which was just for continuity
-        return timestamps[1:], display_levels[1:], binary_levels[1:]
+        times_ms, high = decode_gpio_events(data)
+        return expand_gpio_steps(times_ms, high, prev_display)
 
     def closeEvent(self, event):
         # Stop the serial reader first
         if self.serial_reader:
             self.serial_reader.stop()
+        self.stop_recording()
 
-        # Save GPIO data arrays if available
-        try:
-            if self.gpio_time_data and self.gpio_signal_data:
-                # Create a timestamp for the filename
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"adc_data_{timestamp}.csv"
-
-                # Save data as CSV file with time,value pairs
-                with open(filename, "w") as f:
-                    f.write("Time_ms,Signal_Level\n")  # Header
-                    for t, v in zip(self.adc_time_data, self.adc_signal_data):
-                        f.write(f"{t:.6f},{v:.6f}\n")
-                print(f"[INFO] ADC data saved to {filename}")
-        except Exception as e:
-            print(f"[ERROR] Failed to save ADC data: {str(e)}")
+        self.analysis_worker.stop()
+        self.metrics_timer.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+
+        # The capture has been exported while it ran; only the last chunk is left
+        self.stop_export()
 
         event.accept()
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Arc Analysis System")
+    parser.add_argument(
+        "--replay", metavar="CAPTURE", help="replay a recorded .cap file instead of a serial port"
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay speed: 1 = real time, N = N times faster, 0 = as fast as possible",
+    )
+    parser.add_argument(
+        "--shm",
+        action="store_true",
+        help="read the serial port in a separate process and share the data over shared memory",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help=f"localhost port of the metrics endpoint (default {METRICS_PORT})",
+    )
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     win = LivePlotter()
+    win.use_acquisition_process = args.shm
+    win.start_metrics_server(args.metrics_port)
+    if args.replay:
+        win.open_replay(args.replay, args.speed)
     win.show()
     sys.exit(app.exec_())
@@ -0,0 +1,298 @@
+"""
+Acquisition metrics: counters, gauges and latency histograms, published as
+JSON or Prometheus text on a localhost HTTP endpoint.
+
+    curl http://127.0.0.1:9464/metrics       # Prometheus text format
+    curl http://127.0.0.1:9464/metrics.json  # latest snapshot as JSON
+"""
+
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (s) of the latency histogram buckets
+LATENCY_BUCKETS_S = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+METRIC_PREFIX = "adc_uart_"
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, like a Prometheus histogram.
+
+    observe() is a binary search and a few additions, cheap enough for every
+    batch or frame. Quantiles are estimated from the buckets (upper bound
+    of the bucket the quantile falls into). The counts are cumulative over
+    the lifetime of the histogram, as Prometheus expects; quantiles of a
+    recent interval come from the difference of two snapshots.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS_S):
+        self.bounds = tuple(bounds)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q, counts=None):
+        """Upper bound of the bucket holding quantile q (0..1), max for the +Inf bucket."""
+        counts = self.counts if counts is None else counts
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self, previous=None):
+        """
+        Cumulative counts and quantiles, plus the quantiles since `previous`.
+
+        previous is an earlier snapshot; its bucket counts are subtracted
+        for "recent" (all counts if None, or if the histogram was reset).
+        """
+        counts = list(self.counts)
+        recent = counts
+        if previous is not None:
+            last = [n for _, n in previous["buckets"]]
+            if all(n >= old for n, old in zip(counts, last)):
+                recent = [n - old for n, old in zip(counts, last)]
+        return {
+            "count": sum(counts),
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5, counts),
+            "p90": self.quantile(0.9, counts),
+            "p99": self.quantile(0.99, counts),
+            "buckets": [[bound, n] for bound, n in zip(self.bounds + ("+Inf",), counts)],
+            "recent": {
+                "count": sum(recent),
+                "p50": self.quantile(0.5, recent),
+                "p90": self.quantile(0.9, recent),
+                "p99": self.quantile(0.99, recent),
+            },
+        }
+
+
+class MetricsCollector:
+    """
+    Periodic snapshot of the acquisition metrics.
+
+    Counters and gauges are registered as callables that return the
+    current value (a number, or a dict of label value -> number), so the
+    data path only keeps the plain counters it has anyway. sample() reads
+    them, derives per-second rates of the counters since the previous
+    sample and publishes the result in `snapshot`, replaced in one step,
+    so other threads (MetricsServer) can read it at any time. Histograms
+    are published cumulative, with the quantiles of the observations since
+    the previous sample under "recent".
+    """
+
+    def __init__(self):
+        self._counters = {}  # name -> (read, label, help)
+        self._gauges = {}
+        self._histograms = {}  # name -> (Histogram, help)
+        self._last = None  # (time, counter values) of the previous sample
+        self.t_start = time.monotonic()
+        self.snapshot = {}
+
+    def counter(self, name, read, help="", label=None):
+        """Register a monotonic counter; label names the keys if read() returns a dict."""
+        self._counters[name] = (read, label, help)
+
+    def gauge(self, name, read, help="", label=None):
+        self._gauges[name] = (read, label, help)
+
+    def histogram(self, name, help="", bounds=LATENCY_BUCKETS_S):
+        """Create and register a Histogram; the caller observes into it."""
+        histogram = Histogram(bounds)
+        self._histograms[name] = (histogram, help)
+        return histogram
+
+    def sample(self):
+        """Read all sources, compute the rates and publish a new snapshot."""
+        now = time.monotonic()
+        counters = {name: _read(read) for name, (read, _, _) in self._counters.items()}
+        rates = {}
+        if self._last is not None:
+            last_time, last_counters = self._last
+            dt = max(now - last_time, 1e-9)
+            for name, value in counters.items():
+                rates[name] = _rate(value, last_counters.get(name), dt)
+        self._last = (now, counters)
+
+        last_histograms = self.snapshot.get("histograms", {})
+        self.snapshot = {
+            "time": time.time(),
+            "uptime_s": now - self.t_start,
+            "counters": counters,
+            "rates": rates,
+            "gauges": {name: _read(read) for name, (read, _, _) in self._gauges.items()},
+            "histograms": {
+                name: h.snapshot(last_histograms.get(name))
+                for name, (h, _) in self._histograms.items()
+            },
+        }
+        return self.snapshot
+
+    def to_json(self):
+        return json.dumps(self.snapshot, indent=2)
+
+    def to_prometheus(self):
+        """The latest snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot
+        lines = []
+        for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+            values = snapshot.get(kind + "s", {})
+            for name, (_, label, help) in metrics.items():
+                if name not in values:
+                    continue
+                full_name = METRIC_PREFIX + name
+                lines += [f"# HELP {full_name} {help}", f"# TYPE {full_name} {kind}"]
+                value = values[name]
+                if isinstance(value, dict):
+                    lines += [
+                        f'{full_name}{{{label}="{key}"}} {_number(v)}' for key, v in value.items()
+                    ]
+                elif value is not None:
+                    lines.append(f"{full_name} {_number(value)}")
+
+        for name, (_, help) in self._histograms.items():
+            values = snapshot.get("histograms", {}).get(name)
+            if values is None:
+                continue
+            full_name = METRIC_PREFIX + name
+            lines += [f"# HELP {full_name} {help}", f"# TYPE {full_name} histogram"]
+            cumulative = 0
+            for bound, count in values["buckets"]:
+                cumulative += count
+                lines.append(f'{full_name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{full_name}_sum {_number(values['sum'])}")
+            lines.append(f"{full_name}_count {values['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves a MetricsCollector's latest snapshot over HTTP on a thread.
+
+        /metrics       -- Prometheus text format
+        /metrics.json  -- JSON
+
+    Requests only read the published snapshot; they never touch the
+    acquisition or GUI state. Binds to localhost only.
+    """
+
+    def __init__(self, collector, port, host="127.0.0.1"):
+        self.collector = collector
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = collector.to_prometheus()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = collector.to_json()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # One line per scrape would flood stdout
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def register_reader_metrics(collector, reader):
+    """
+    Register the counters of a ReaderCore (or a reader exposing the same ones).
+
+    reader is a callable returning the current reader, so the metrics
+    follow a reconnect; values are missing while it returns None.
+    """
+    collector.counter(
+        "bytes_received_total", lambda: reader().bytes_received,
+        "Bytes read from the serial port",
+    )
+    collector.counter(
+        "packets_received_total", lambda: reader().packets_received,
+        "Packets framed by the reader",
+    )
+    collector.counter(
+        "packets_total",
+        lambda: {f"{h:02X}": n for h, n in dict(reader().header_counts).items()},
+        "Packets framed by the reader, by header byte",
+        label="header",
+    )
+    collector.counter(
+        "desync_bytes_total", lambda: reader().desync_bytes,
+        "Bytes dropped by the framer while resynchronizing",
+    )
+    collector.gauge(
+        "reader_backlog_bytes", lambda: reader().backlog_bytes,
+        "Bytes waiting in the serial driver at the latest read",
+    )
+    collector.gauge(
+        "reader_backlog_peak_bytes", lambda: reader().peak_backlog_bytes,
+        "Most bytes seen waiting in the serial driver",
+    )
+
+
+def _read(read):
+    try:
+        value = read()
+    except Exception:
+        return None
+    return dict(value) if isinstance(value, dict) else value
+
+
+def _rate(value, last, dt):
+    if value is None or last is None:
+        return None
+    if isinstance(value, dict):
+        return {key: _delta(v, last.get(key, 0)) / dt for key, v in value.items()}
+    return _delta(value, last) / dt
+
+
+def _delta(value, last):
+    # A counter that went down was reset (e.g. a new reader): count from zero
+    return value - last if value >= last else value
+
+
+def _number(value):
+    return "NaN" if value is None else repr(value)
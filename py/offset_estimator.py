@@ -0,0 +1,143 @@
+import math
+
+import numpy as np
+
+
+class OffsetEstimator:
+    """
+    Sliding-window ADC offset estimator with constant cost per sample.
+
+    Computes the same blend as the original LivePlotter.calculate_adc_offset
+    over the last `window` samples: min/max midpoint, mean, median and the
+    average of the sample pairs that cross the midpoint.
+
+    ADC samples are quantized to `levels` codes, so the window is kept as
+    per-code histograms instead of sorted structures:
+
+        hist            -- samples per code (median, min, max)
+        lo/hi count/sum -- adjacent sample pairs by their lower/higher
+                           code, so the pairs straddling any midpoint m
+                           are those with lo < m <= hi
+
+    update() adds a block and evicts the oldest samples with vectorized
+    histogram updates (O(1) per sample). estimate() scans the fixed-size
+    histograms (O(levels), independent of the window) into preallocated
+    buffers. Values are mapped to codes with value = code * scale + zero.
+    """
+
+    def __init__(self, window=2000, levels=4096, scale=1.0, zero=0.0, asymmetry=0.1):
+        self.window = window
+        self.levels = levels
+        self.scale = scale
+        self.zero = zero
+        self.asymmetry = asymmetry  # mean/median difference (value units) for asymmetric blend
+
+        self._ring = np.zeros(window, dtype=np.int64)
+        self._hist = np.zeros(levels, dtype=np.int64)
+        self._lo_count = np.zeros(levels, dtype=np.int64)
+        self._lo_sum = np.zeros(levels, dtype=np.int64)
+        self._hi_count = np.zeros(levels, dtype=np.int64)
+        self._hi_sum = np.zeros(levels, dtype=np.int64)
+        self._cumulative = np.zeros(levels, dtype=np.int64)
+        self.reset()
+
+    def __len__(self):
+        """Number of samples currently in the window"""
+        return self._size
+
+    def reset(self):
+        self._ring.fill(0)
+        for array in (self._hist, self._lo_count, self._lo_sum, self._hi_count, self._hi_sum):
+            array.fill(0)
+        self._head = 0  # Next write position in the ring
+        self._size = 0
+        self._sum = 0
+
+        # Components of the last estimate, in value units
+        self.minimum = self.maximum = None
+        self.mean = self.median = self.midpoint = self.crossing_mean = None
+
+    def update(self, values):
+        """Add a block of new samples (in value units) to the window."""
+        codes = np.rint((np.asarray(values, dtype=np.float64) - self.zero) / self.scale)
+        codes = np.clip(codes, 0, self.levels - 1).astype(np.int64)
+        if len(codes) >= self.window:
+            self.reset()
+            codes = codes[-self.window :]
+        n = len(codes)
+        if n == 0:
+            return
+
+        # Evict the oldest samples and the pairs that start at them
+        evict = self._size + n - self.window
+        if evict > 0:
+            oldest = (self._head - self._size + np.arange(evict + 1)) % self.window
+            old = self._ring[oldest]
+            np.add.at(self._hist, old[:-1], -1)
+            self._sum -= int(old[:-1].sum())
+            self._add_pairs(old[:-1], old[1:], -1)
+            self._size -= evict
+
+        # New pairs, continuing from the newest sample still in the window
+        if self._size:
+            previous = self._ring[(self._head - 1) % self.window]
+            self._add_pairs(np.concatenate(([previous], codes[:-1])), codes, 1)
+        else:
+            self._add_pairs(codes[:-1], codes[1:], 1)
+
+        np.add.at(self._hist, codes, 1)
+        self._sum += int(codes.sum())
+        self._ring[(self._head + np.arange(n)) % self.window] = codes
+        self._head = (self._head + n) % self.window
+        self._size += n
+
+    def estimate(self):
+        """Return the blended offset of the current window (value units), or None if empty."""
+        size = self._size
+        if not size:
+            return None
+        hist = self._hist
+
+        # Method 1: Standard min-max midpoint
+        code_min = int(np.argmax(hist > 0))
+        code_max = self.levels - 1 - int(np.argmax(hist[::-1] > 0))
+        midpoint = (code_min + code_max) / 2
+
+        # Method 2: Mean value
+        mean = self._sum / size
+
+        # Method 3: Median (upper median, as sorted[len // 2])
+        np.cumsum(hist, out=self._cumulative)
+        median = int(np.searchsorted(self._cumulative, size // 2, side="right"))
+
+        # Method 4: Average of the pairs that cross the midpoint
+        below = math.ceil(midpoint)  # Codes strictly below the midpoint
+        crossings = int(self._lo_count[:below].sum() - self._hi_count[:below].sum())
+        pair_sum = int(self._lo_sum[:below].sum() - self._hi_sum[:below].sum())
+        crossing_mean = pair_sum / (2 * crossings) if crossings else midpoint
+
+        self.minimum = self._to_value(code_min)
+        self.maximum = self._to_value(code_max)
+        self.midpoint = self._to_value(midpoint)
+        self.mean = self._to_value(mean)
+        self.median = self._to_value(median)
+        self.crossing_mean = self._to_value(crossing_mean)
+
+        # Weighted combination, as in the original algorithm
+        if abs(self.mean - self.median) < self.asymmetry:
+            return self.mean * 0.5 + self.midpoint * 0.3 + self.crossing_mean * 0.2
+        return self.median * 0.4 + self.crossing_mean * 0.4 + self.mean * 0.2
+
+    def _to_value(self, code):
+        return code * self.scale + self.zero
+
+    def _add_pairs(self, first, second, sign):
+        if len(first) == 0:
+            return
+        lo = np.minimum(first, second)
+        hi = np.maximum(first, second)
+        sums = (first + second) * sign
+        np.add.at(self._lo_count, lo, sign)
+        np.add.at(self._lo_sum, lo, sums)
+        np.add.at(self._hi_count, hi, sign)
+        np.add.at(self._hi_sum, hi, sums)
@@ -0,0 +1,128 @@
+import numpy as np
+
+from framer import PACKET_SIZE
+
+SYNC_HEADER = 0xC0
+ADC_HEADER = 0xA0
+GPIO_HEADER = 0xB0
+STATUS_HEADER = 0xD0
+
+
+class PacketBatch:
+    """
+    Packets from one serial read (or one time slice), grouped by type.
+
+    A C0 sync packet always starts a new batch, so everything in a batch
+    belongs to the same capture and the GUI can apply it in one step:
+
+        sync    -- C0 payload (20 bytes) or None
+        adc     -- A0 samples as little-endian uint16 ADC counts
+        gpio    -- concatenated B0 payloads (5-byte timestamp/level events)
+        status  -- list of D0 payloads
+        raw     -- every packet of the batch back to back, in arrival order
+        adc_lost -- A0 samples the host lost right before the batch's
+                    samples (e.g. in an overrun shared memory ring)
+
+    sync_received and status_received are the receive windows
+    (earliest_ns, latest_ns) of the C0 and of the last D0 packet, or None:
+    the packet reached the driver between the serial read before the one
+    that returned it and that read.
+    """
+
+    def __init__(self, sync=None, adc=b"", gpio=b"", status=(), raw=b"", t_ns=0, adc_lost=0,
+                 sync_received=None, status_received=None):
+        self.sync = sync
+        self.adc = np.frombuffer(adc, dtype="<u2")
+        self.adc_frames = len(adc) // (PACKET_SIZE - 1)
+        self.gpio = gpio
+        self.status = list(status)
+        self.raw = raw
+        self.t_ns = t_ns  # Receive time of the last read in the batch
+        self.adc_lost = adc_lost
+        self.sync_received = sync_received
+        self.status_received = status_received
+
+    def __len__(self):
+        """Number of packets in the batch"""
+        return len(self.raw) // PACKET_SIZE
+
+    def adc_before_status(self):
+        """Number of A0 samples that arrived before the last D0 packet, or None without D0."""
+        if not self.status:
+            return None
+        headers = np.frombuffer(self.raw, dtype=np.uint8)[::PACKET_SIZE]
+        status = np.flatnonzero(headers == STATUS_HEADER)
+        if not len(status):
+            return None
+        frames = np.count_nonzero(headers[: status[-1]] == ADC_HEADER)
+        return int(frames) * ((PACKET_SIZE - 1) // 2)
+
+    def packets(self):
+        """Iterate over the raw packets of the batch in arrival order."""
+        for i in range(0, len(self.raw), PACKET_SIZE):
+            yield self.raw[i : i + PACKET_SIZE]
+
+
+class BatchBuilder:
+    """Collects framed packets on the reader thread and cuts them into PacketBatch objects."""
+
+    def __init__(self):
+        self._batches = []
+        # Receive window (earliest_ns, latest_ns) of the packets being added;
+        # the reader sets it once per serial read
+        self.received = None
+        self._start_batch(None)
+
+    def __len__(self):
+        """Number of packets collected and not yet taken"""
+        return sum(len(b) for b in self._batches) + len(self._raw) // PACKET_SIZE
+
+    def add(self, packet):
+        """Add one 21-byte packet (bytes or memoryview)."""
+        header = packet[0]
+        if header == SYNC_HEADER:
+            self._close_batch()
+            self._start_batch(bytes(packet[1:]))
+            self._sync_received = self.received
+        elif header == ADC_HEADER:
+            self._adc += packet[1:]
+        elif header == GPIO_HEADER:
+            self._gpio += packet[1:]
+        elif header == STATUS_HEADER:
+            self._status.append(bytes(packet[1:]))
+            self._status_received = self.received
+        self._raw += packet
+
+    def take(self, t_ns=0):
+        """Return all complete batches, including the one in progress, and start over."""
+        self._close_batch()
+        batches = self._batches
+        self._batches = []
+        for batch in batches:
+            batch.t_ns = t_ns
+        return batches
+
+    def _start_batch(self, sync):
+        self._sync = sync
+        self._adc = bytearray()
+        self._gpio = bytearray()
+        self._status = []
+        self._raw = bytearray()
+        self._sync_received = None
+        self._status_received = None
+
+    def _close_batch(self):
+        if not self._raw:
+            return
+        self._batches.append(
+            PacketBatch(
+                sync=self._sync,
+                adc=bytes(self._adc),
+                gpio=bytes(self._gpio),
+                status=self._status,
+                raw=bytes(self._raw),
+                sync_received=self._sync_received,
+                status_received=self._status_received,
+            )
+        )
+        self._start_batch(None)
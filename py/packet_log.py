@@ -0,0 +1,272 @@
+import datetime
+import math
+import time
+
+import numpy as np
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import (
+    QComboBox,
+    QHBoxLayout,
+    QLabel,
+    QListView,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from framer import PACKET_SIZE
+from packet_batch import ADC_HEADER, GPIO_HEADER, STATUS_HEADER, SYNC_HEADER
+
+# Header filter choices of the log view: (label, header byte or None for all)
+HEADER_FILTERS = [
+    ("All packets", None),
+    ("A0 ADC", ADC_HEADER),
+    ("B0 GPIO", GPIO_HEADER),
+    ("C0 Sync", SYNC_HEADER),
+    ("D0 Status", STATUS_HEADER),
+]
+
+
+class PacketRing:
+    """
+    Fixed-size ring of raw packets.
+
+    Packets are stored as rows of a preallocated N x 21 uint8 array with
+    their receive time. Every packet gets a sequence number (0, 1, 2, ...);
+    the ring keeps the last `capacity` of them, sequence numbers
+    first .. count - 1.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.packets = np.zeros((capacity, PACKET_SIZE), dtype=np.uint8)
+        self.times_ns = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def first(self):
+        """Sequence number of the oldest retained packet"""
+        return max(0, self.count - self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    def extend(self, rows, t_ns):
+        """Append an n x 21 array of packets received at t_ns."""
+        n = len(rows)
+        if n > self.capacity:
+            self.count += n - self.capacity
+            rows = rows[-self.capacity :]
+            n = self.capacity
+        start = self.count % self.capacity
+        head = min(n, self.capacity - start)
+        self.packets[start : start + head] = rows[:head]
+        self.times_ns[start : start + head] = t_ns
+        if head < n:
+            self.packets[: n - head] = rows[head:]
+            self.times_ns[: n - head] = t_ns
+        self.count += n
+
+    def headers(self, seqs):
+        """Header bytes of the packets with the given sequence numbers."""
+        return self.packets[seqs % self.capacity, 0]
+
+    def format(self, seq):
+        """One log line: receive time and the packet in hex."""
+        slot = seq % self.capacity
+        t = datetime.datetime.fromtimestamp(self.times_ns[slot] / 1e9)
+        return f"{t:%H:%M:%S.%f}"[:-3] + "  " + self.packets[slot].tobytes().hex(" ").upper()
+
+
+class PacketLog:
+    """
+    Capture side of the packet log.
+
+    Adds whole blocks of raw packets to a PacketRing. While paused nothing
+    is stored. When packets arrive faster than max_rate per second, only
+    every n-th A0/D0 packet is stored (B0 and C0 are always kept); the
+    stride is re-evaluated once per second from the measured rate.
+    """
+
+    def __init__(self, capacity=10000, max_rate=250):
+        self.ring = PacketRing(capacity)
+        self.max_rate = max_rate
+        self.capturing = True
+        self.received = 0  # Packets offered to the log
+        self.logged = 0  # Packets stored in the ring
+        self.stride = 1  # Current sampling stride of A0/D0 packets
+        self._sample_pos = 0
+        self._window_start = None
+        self._window_count = 0
+
+    def clear(self):
+        self.ring.clear()
+        self.received = self.logged = 0
+
+    def add(self, raw, t_ns=None):
+        """Log one packet or several back-to-back packets (bytes-like)."""
+        if t_ns is None:
+            t_ns = time.time_ns()
+        rows = np.frombuffer(raw, dtype=np.uint8)
+        rows = rows[: len(rows) - len(rows) % PACKET_SIZE].reshape(-1, PACKET_SIZE)
+        n = len(rows)
+        self.received += n
+        self._update_stride(n, t_ns)
+        if not self.capturing or n == 0:
+            return
+
+        if self.stride > 1:
+            positions = self._sample_pos + np.arange(n)
+            headers = rows[:, 0]
+            keep = (positions % self.stride == 0) | (
+                (headers != ADC_HEADER) & (headers != STATUS_HEADER)
+            )
+            self._sample_pos += n
+            rows = rows[keep]
+
+        self.ring.extend(rows, t_ns)
+        self.logged += len(rows)
+
+    def _update_stride(self, n, t_ns):
+        if self._window_start is None:
+            self._window_start = t_ns
+        self._window_count += n
+        elapsed = (t_ns - self._window_start) / 1e9
+        if elapsed >= 1.0:
+            rate = self._window_count / elapsed
+            self.stride = max(1, math.ceil(rate / self.max_rate))
+            self._window_start = t_ns
+            self._window_count = 0
+
+
+class PacketLogModel(QAbstractListModel):
+    """
+    List model over a PacketRing.
+
+    The model holds only the sequence numbers of the rows that pass the
+    header filter; the hex text of a row is formatted in data(), i.e. only
+    for the rows the view actually paints. refresh() appends new packets
+    and drops the ones the ring has overwritten as row inserts/removes, so
+    the view keeps its scroll position.
+    """
+
+    def __init__(self, ring, parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.header_filter = None
+        self._seqs = np.zeros(0, dtype=np.int64)
+        self._next = 0  # First sequence number not yet looked at
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._seqs)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self.ring.format(int(self._seqs[index.row()]))
+
+    def set_filter(self, header):
+        """Show only packets with this header byte (None for all)."""
+        self.beginResetModel()
+        self.header_filter = header
+        self._seqs = self._matching(self.ring.first, self.ring.count)
+        self._next = self.ring.count
+        self.endResetModel()
+
+    def reset(self):
+        self.set_filter(self.header_filter)
+
+    def refresh(self):
+        ring = self.ring
+        if ring.count < self._next:  # Ring was cleared
+            self.reset()
+            return
+
+        removed = int(np.searchsorted(self._seqs, ring.first))
+        if removed:
+            self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            self._seqs = self._seqs[removed:]
+            self.endRemoveRows()
+
+        new = self._matching(max(self._next, ring.first), ring.count)
+        self._next = ring.count
+        if len(new):
+            rows = len(self._seqs)
+            self.beginInsertRows(QModelIndex(), rows, rows + len(new) - 1)
+            self._seqs = np.concatenate((self._seqs, new))
+            self.endInsertRows()
+
+    def _matching(self, start, stop):
+        seqs = np.arange(start, stop, dtype=np.int64)
+        if self.header_filter is not None and len(seqs):
+            seqs = seqs[self.ring.headers(seqs) == self.header_filter]
+        return seqs
+
+
+class PacketLogView(QWidget):
+    """Packet log panel: virtualized hex list, capture/pause toggle, header filter and counters."""
+
+    def __init__(self, packet_log, parent=None):
+        super().__init__(parent)
+        self.packet_log = packet_log
+        self.model = PacketLogModel(packet_log.ring, self)
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+
+        self.capture_btn = QPushButton("Pause Log")
+        self.capture_btn.setCheckable(True)
+        self.capture_btn.toggled.connect(self.set_paused)
+
+        self.filter_selector = QComboBox()
+        for label, header in HEADER_FILTERS:
+            self.filter_selector.addItem(label, header)
+        self.filter_selector.currentIndexChanged.connect(self.filter_changed)
+
+        self.status_label = QLabel()
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.capture_btn)
+        controls.addWidget(self.filter_selector)
+        controls.addWidget(self.status_label, 1)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(controls)
+        layout.addWidget(self.list_view)
+        self.refresh()
+
+    def set_paused(self, paused):
+        self.packet_log.capturing = not paused
+        self.capture_btn.setText("Resume Log" if paused else "Pause Log")
+        self.refresh()
+
+    def filter_changed(self, index):
+        self.model.set_filter(self.filter_selector.itemData(index))
+        self.list_view.scrollToBottom()
+
+    def clear(self):
+        self.packet_log.clear()
+        self.refresh()
+
+    def refresh(self):
+        """Show new packets; keep following the end if the view is scrolled to the bottom."""
+        scrollbar = self.list_view.verticalScrollBar()
+        following = scrollbar.value() >= scrollbar.maximum()
+        self.model.refresh()
+        if following:
+            self.list_view.scrollToBottom()
+
+        log = self.packet_log
+        status = f"{log.logged}/{log.received} logged"
+        if log.stride > 1:
+            status += f", A0/D0 sampled 1 in {log.stride}"
+        if not log.capturing:
+            status += " (paused)"
+        self.status_label.setText(status)
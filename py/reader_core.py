@@ -0,0 +1,156 @@
+import threading
+import time
+
+import serial
+
+from framer import PacketFramer
+
+
+class ReaderCore:
+    """
+    Qt-free serial reader: reads the UART, frames packets and hands them on.
+
+    Packets are delivered on the reader thread through plain callables:
+    on_packet(bytes) per packet when batch_interval is None, otherwise
+    on_batch(PacketBatch) per serial read (0) or per time slice (seconds).
+    A CaptureRecorder set as `recorder` gets every framed packet. SerialReader
+    adds Qt signals on top; headless.py uses it directly.
+
+    Counters for rate/loss statistics: bytes_received, packets_received,
+    header_counts (packets per header byte), desync_bytes (bytes dropped
+    by the framer) and deliveries (on_packet/on_batch calls). backlog_bytes
+    and peak_backlog_bytes are the bytes waiting in the driver at the
+    latest read and at most.
+    """
+
+    def __init__(self, port, baudrate=115200, batch_interval=None, on_packet=None, on_batch=None):
+        self.framer = PacketFramer(on_desync=self.log_desync)
+        self.batch_interval = batch_interval
+        self.on_packet = on_packet
+        self.on_batch = on_batch
+        self.batch_builder = None
+        if batch_interval is not None:
+            # numpy is only needed for batches
+            from packet_batch import BatchBuilder
+
+            self.batch_builder = BatchBuilder()
+        self._last_batch_time = time.monotonic()
+        self.recorder = None  # Optional CaptureRecorder that gets every framed packet
+
+        self.bytes_received = 0
+        self.packets_received = 0
+        self.header_counts = {}
+        self.desync_bytes = 0
+        self.deliveries = 0
+        self.backlog_bytes = 0
+        self.peak_backlog_bytes = 0
+
+        self.ser = serial.Serial(
+            port,
+            baudrate=baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_EVEN,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=1,  # Prevent blocking forever
+        )
+        self.running = False
+        self.read_thread = threading.Thread(target=self.read_loop, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.read_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.ser.is_open:
+            self.ser.close()
+
+    def send_signal(self, signal_bytes):
+        if self.ser.is_open:
+            self.ser.write(signal_bytes)
+
+    def log_desync(self, count: int, first_byte: int):
+        self.desync_bytes += count
+        print(f"[DESYNC] Dropped {count} byte(s) starting at: {first_byte:02X}")
+
+    def emit_batches(self, force=False):
+        """Deliver the collected packets as batches if the current time slice is over."""
+        now = time.monotonic()
+        if not force and now - self._last_batch_time < self.batch_interval:
+            return
+        self._last_batch_time = now
+        for batch in self.batch_builder.take(time.time_ns()):
+            if self.on_batch is not None:
+                self.deliveries += 1
+                self.on_batch(batch)
+
+    def feed(self, data, t_ns=None, earliest_ns=0):
+        """
+        Frame the bytes of one read and deliver the packets (and batches if due).
+
+        t_ns is the receive time of the read (now if None) and earliest_ns
+        the time after which its bytes arrived (0 if unknown).
+        """
+        if t_ns is None:
+            t_ns = time.time_ns()
+        self.bytes_received += len(data)
+        recorder = self.recorder
+        frames = bytearray() if recorder is not None else None
+        batch_builder = self.batch_builder
+        on_packet = self.on_packet
+        header_counts = self.header_counts
+
+        if batch_builder is not None:
+            batch_builder.received = (earliest_ns, t_ns)
+
+        packets = 0
+        for view in self.framer.feed(data):
+            packets += 1
+            header = view[0]
+            header_counts[header] = header_counts.get(header, 0) + 1
+            if frames is not None:
+                frames += view
+            if batch_builder is not None:
+                batch_builder.add(view)
+            elif on_packet is not None:
+                on_packet(bytes(view))
+        self.packets_received += packets
+        if batch_builder is None and on_packet is not None:
+            self.deliveries += packets
+
+        if frames:
+            recorder.write(frames, t_ns)
+        if batch_builder is not None:
+            self.emit_batches()
+
+    def read_loop(self):
+        batched = self.batch_builder is not None
+        previous_start = 0
+        while self.running:
+            try:
+                read_start = time.time_ns()
+                waiting = self.ser.in_waiting
+                self.backlog_bytes = waiting
+                if waiting > self.peak_backlog_bytes:
+                    self.peak_backlog_bytes = waiting
+                data = self.ser.read(waiting or 1)
+                # Bytes that were waiting arrived after the previous read started,
+                # otherwise after this one started
+                earliest_ns = previous_start if waiting else read_start
+                previous_start = read_start
+                if not data:
+                    if batched:
+                        self.emit_batches(force=True)
+                    continue
+                self.feed(data, earliest_ns=earliest_ns)
+
+            except serial.SerialException as e:
+                if self.running:  # Closing the port in stop() ends the read with an error
+                    print(f"[ERROR] Serial exception: {e}")
+                self.running = False
+                break
+            except Exception as e:
+                if self.running:
+                    print(f"[ERROR] Unexpected exception: {e}")
+                self.running = False
+                break
@@ -0,0 +1,348 @@
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from framer import PACKET_SIZE
+
+# File header of .cap and .idx files: magic, format version, item size, reserved
+FILE_HEADER = struct.Struct("<8sHHI")
+CAPTURE_MAGIC = b"ADCCAP01"
+INDEX_MAGIC = b"ADCIDX01"
+FORMAT_VERSION = 1
+
+# One record of a .cap file: receive time (time.time_ns) and the raw 21-byte packet
+RECORD_DTYPE = np.dtype([("t_ns", "<u8"), ("packet", "u1", (PACKET_SIZE,))])
+
+# One entry of the side index: a run of consecutive packets with the same header.
+# Byte offset of a record in the .cap file: FILE_HEADER.size + record * RECORD_DTYPE.itemsize
+INDEX_DTYPE = np.dtype(
+    [("record", "<u8"), ("count", "<u4"), ("header", "u1"), ("t_ns", "<u8")]
+)
+
+_STOP = object()
+
+
+class CaptureRecorder:
+    """
+    Append-only binary recorder of raw packets.
+
+    write() is called from the reader thread with the framed packets of a
+    serial read; it only puts the chunk on a bounded queue and never
+    blocks. A background thread turns chunks into fixed-size records
+    (receive time + packet) in `path` and run-length index entries (first
+    record, count, header, time) in `path` + ".idx", and flushes both
+    every flush_interval_s, so a crash loses at most that much. If the
+    queue is full the chunk is dropped and counted in dropped_packets. A
+    write error ends the recording: it is kept in `error` and everything
+    queued after it is discarded.
+    """
+
+    def __init__(self, path, queue_size=1024, flush_interval_s=0.5):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.flush_interval_s = flush_interval_s
+
+        self.records_written = 0
+        self.index_entries = 0
+        self.dropped_packets = 0
+        self.closed = False
+        self.error = None  # The OSError that ended the recording
+
+        self._file = open(path, "wb")
+        self._index_file = open(self.index_path, "wb")
+        self._file.write(
+            FILE_HEADER.pack(CAPTURE_MAGIC, FORMAT_VERSION, RECORD_DTYPE.itemsize, 0)
+        )
+        self._index_file.write(
+            FILE_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, INDEX_DTYPE.itemsize, 0)
+        )
+        self._run = None  # Open index run: [record, count, header, t_ns]
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def bytes_written(self):
+        return FILE_HEADER.size + self.records_written * RECORD_DTYPE.itemsize
+
+    def write(self, packets, t_ns=None):
+        """Queue one or more back-to-back 21-byte packets (bytes-like) received at t_ns."""
+        if self.closed or not packets:
+            return
+        if t_ns is None:
+            t_ns = time.time_ns()
+        try:
+            self._queue.put_nowait((bytes(packets), t_ns))
+        except queue.Full:
+            self.dropped_packets += len(packets) // PACKET_SIZE
+
+    def close(self, timeout=5.0):
+        """
+        Write everything still queued, then close both files.
+
+        Waits at most `timeout` seconds (None: until done).
+
+        Returns:
+            True if the recording is complete, False if it is still being
+            written or failed (see error)
+        """
+        if not self.closed:
+            self.closed = True
+            self._stop.set()
+            try:
+                self._queue.put_nowait(_STOP)  # Wakes the writer; it also polls _stop
+            except queue.Full:
+                pass
+        self._thread.join(timeout)
+        return not self._thread.is_alive() and self.error is None
+
+    def _write_loop(self):
+        try:
+            self._write_until_stopped()
+        except OSError as e:
+            self.error = e
+            self.closed = True  # Stop taking new chunks
+            print(f"[ERROR] Recording to {self.path} failed: {e}")
+            _drain(self._queue)
+        finally:
+            for f in (self._file, self._index_file):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    def _write_until_stopped(self):
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            # Checked before taking the chunks: everything queued before close() is written
+            stopping = self._stop.is_set()
+            try:
+                chunks = [self._queue.get(timeout=self.flush_interval_s)]
+            except queue.Empty:
+                chunks = []
+            # Drain whatever else is queued so it is written in one go
+            chunks += _drain(self._queue)
+            if _STOP in chunks:
+                stopping = True
+                chunks = chunks[: chunks.index(_STOP)]
+            if chunks:
+                self._write_chunks(chunks)
+            if stopping or time.monotonic() - last_flush >= self.flush_interval_s:
+                self._flush()
+                last_flush = time.monotonic()
+
+    def _write_chunks(self, chunks):
+        # Coalesce all drained chunks so the numpy work runs once per wake-up
+        data = b"".join(packets for packets, _ in chunks)
+        counts = [len(packets) // PACKET_SIZE for packets, _ in chunks]
+        total = len(data) // PACKET_SIZE
+        rows = np.frombuffer(data, dtype=np.uint8, count=total * PACKET_SIZE)
+        records = np.empty(total, dtype=RECORD_DTYPE)
+        records["t_ns"] = np.repeat([t_ns for _, t_ns in chunks], counts)
+        records["packet"] = rows.reshape(total, PACKET_SIZE)
+        self._index_runs(records, self.records_written)
+        self._file.write(records.tobytes())
+        self.records_written += total
+
+    def _index_runs(self, records, first_record):
+        headers = records["packet"][:, 0]
+        if not len(headers):
+            return
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(headers)) + 1))
+        counts = np.diff(np.append(starts, len(headers)))
+
+        # The first run may continue the open one
+        run = self._run
+        if run is not None and run[2] == headers[0]:
+            run[1] += int(counts[0])
+            starts, counts = starts[1:], counts[1:]
+        if not len(starts):
+            return
+
+        entries = np.empty(len(starts), dtype=INDEX_DTYPE)
+        entries["record"] = first_record + starts
+        entries["count"] = counts
+        entries["header"] = headers[starts]
+        entries["t_ns"] = records["t_ns"][starts]
+        # All new runs but the last are complete
+        self._write_run()
+        self._write_index(entries[:-1])
+        last = entries[-1]
+        self._run = [
+            int(last["record"]),
+            int(last["count"]),
+            int(last["header"]),
+            int(last["t_ns"]),
+        ]
+
+    def _write_run(self):
+        if self._run is None:
+            return
+        entry = np.empty(1, dtype=INDEX_DTYPE)
+        entry[0] = tuple(self._run)
+        self._write_index(entry)
+        self._run = None
+
+    def _write_index(self, entries):
+        if len(entries):
+            self._index_file.write(entries.tobytes())
+            self.index_entries += len(entries)
+
+    def _flush(self):
+        # Close the open run so the index on disk covers every record written
+        self._write_run()
+        self._file.flush()
+        self._index_file.flush()
+
+
+class CaptureFile:
+    """
+    Read-only view of a .cap file written by CaptureRecorder.
+
+    The records are memory-mapped, so opening is instant regardless of the
+    file size and only the pages that are actually read are loaded. A
+    trailing partial record (e.g. after a crash) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self._index = None
+        self._index_records = 0
+        with open(path, "rb") as f:
+            magic, version, record_size, _ = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != CAPTURE_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a capture file")
+        if record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: unexpected record size {record_size}")
+
+        count = (os.path.getsize(path) - FILE_HEADER.size) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(
+                path, dtype=RECORD_DTYPE, mode="r", offset=FILE_HEADER.size, shape=(count,)
+            )
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def t_ns(self):
+        """Receive times of all records (ns)"""
+        return self.records["t_ns"]
+
+    @property
+    def packets(self):
+        """All packets as an N x 21 uint8 array"""
+        return self.records["packet"]
+
+    @property
+    def duration_s(self):
+        if len(self.records) < 2:
+            return 0.0
+        return (int(self.t_ns[-1]) - int(self.t_ns[0])) / 1e9
+
+    def index(self):
+        """
+        Run-length index (INDEX_DTYPE) of the packet types.
+
+        Read from the side .idx file; records it does not cover yet (a
+        crash, or a recording still in progress) are indexed from their
+        headers. A missing or unreadable .idx is rebuilt once and written
+        next to the capture, so the O(n) scan is not repeated. The result
+        is kept until the capture grows.
+        """
+        if self._index is not None and self._index_records == len(self):
+            return self._index
+
+        entries = self._read_index()
+        covered = int(entries["count"].sum()) if entries is not None else 0
+        if covered > len(self):
+            entries, covered = None, 0  # Not the index of this capture
+        tail = _index_entries(self.packets[covered:, 0], self.t_ns[covered:], covered)
+        if entries is None:
+            entries = tail
+            self._write_index(entries)
+        elif len(tail):
+            entries = np.concatenate((entries, tail))
+
+        self._index = entries
+        self._index_records = len(self)
+        return entries
+
+    def _read_index(self):
+        """Entries of the .idx file, or None if it is missing or not a valid index."""
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(FILE_HEADER.size)
+                data = f.read()
+        except OSError:
+            return None
+        if len(header) < FILE_HEADER.size:
+            return None
+        magic, version, entry_size, _ = FILE_HEADER.unpack(header)
+        if magic != INDEX_MAGIC or version != FORMAT_VERSION or entry_size != INDEX_DTYPE.itemsize:
+            return None
+        # A trailing partial entry (e.g. after a crash) is ignored
+        count = len(data) // INDEX_DTYPE.itemsize
+        entries = np.frombuffer(data, dtype=INDEX_DTYPE, count=count)
+        if count and int(entries["record"][-1]) + int(entries["count"][-1]) != entries["count"].sum():
+            return None
+        return entries
+
+    def _write_index(self, entries):
+        temp_path = self.index_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(FILE_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, INDEX_DTYPE.itemsize, 0))
+                f.write(entries.tobytes())
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            # Read-only location: the index is rebuilt next time
+            print(f"[INFO] Could not write {self.index_path}: {e}")
+
+    def records_of(self, header):
+        """Record numbers of all packets with the given header byte."""
+        entries = self.index()
+        entries = entries[entries["header"] == header]
+        if not len(entries):
+            return np.zeros(0, dtype=np.int64)
+        counts = entries["count"].astype(np.int64)
+        offsets = np.repeat(entries["record"].astype(np.int64) - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(counts.sum())
+
+
+def _index_entries(headers, t_ns, first_record=0):
+    """Run-length index entries of a block of packet headers starting at first_record."""
+    if not len(headers):
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(headers)) + 1))
+    entries = np.empty(len(starts), dtype=INDEX_DTYPE)
+    entries["record"] = first_record + starts
+    entries["count"] = np.diff(np.append(starts, len(headers)))
+    entries["header"] = headers[starts]
+    entries["t_ns"] = t_ns[starts]
+    return entries
+
+
+def _drain(q):
+    """Take everything currently on a queue without blocking."""
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def capture_filename(directory=".", prefix="capture"):
+    """Timestamped capture path, e.g. ./capture_20240101_120000.cap"""
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(directory, f"{prefix}_{timestamp}.cap")
@@ -0,0 +1,54 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class RenderScheduler(QObject):
+    """
+    Redraws plot items at a fixed frame rate instead of on every packet.
+
+    Each item registers a render callback under a name. Data ingestion only
+    calls mark_dirty(name); a QTimer on the GUI thread then runs the
+    callbacks of the items that changed since the previous frame, at most
+    once per frame each.
+    """
+
+    def __init__(self, fps=30, parent=None):
+        super().__init__(parent)
+        self._renderers = {}
+        self._dirty = set()
+        self.frame_histogram = None  # Optional metrics Histogram that gets every frame's duration (s)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.render)
+        self.set_fps(fps)
+
+    def register(self, name, callback):
+        """Register a render callback; items render in registration order."""
+        self._renderers[name] = callback
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self._timer.setInterval(max(1, round(1000 / fps)))
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def mark_dirty(self, *names):
+        """Schedule the named items (all items if none given) for the next frame."""
+        self._dirty.update(names or self._renderers)
+
+    def render(self):
+        """Run the callbacks of all dirty items now."""
+        if not self._dirty:
+            return
+        t0 = time.perf_counter()
+        dirty = self._dirty
+        self._dirty = set()
+        for name, callback in self._renderers.items():
+            if name in dirty:
+                callback()
+        if self.frame_histogram is not None:
+            self.frame_histogram.observe(time.perf_counter() - t0)
@@ -0,0 +1,154 @@
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from framer import PACKET_SIZE
+from packet_batch import STATUS_HEADER, SYNC_HEADER, BatchBuilder
+from recorder import CaptureFile
+from timeline import read_windows
+
+LINE_PACKETS_PER_S = 115200 / 11 / PACKET_SIZE
+
+# Most records looked at per paced replay step (keeps each step O(1) in the file size)
+MAX_STEP_PACKETS = 65536
+
+
+class ReplayReader(QObject):
+    """
+    Replays a recorded capture in place of a SerialReader.
+
+    Emits the same packet_received / packet_batch_received signals, with
+    the same batch_interval semantics. Like the firmware, playback runs
+    between START and STOP commands sent with send_signal(); RESET rewinds.
+
+    speed selects the pacing: 1.0 replays at the recorded rate, N at N
+    times that rate, 0 as fast as the receiver can take it. Playback runs
+    on a timer of the thread the reader lives in (normally the GUI
+    thread), so each step is delivered before the next one starts; in
+    as-fast-as-possible mode this measures the maximum sustainable
+    throughput of the receiving code. Throughput is printed at the end.
+    """
+
+    packet_received = pyqtSignal(bytes)
+    packet_batch_received = pyqtSignal(object)
+    finished = pyqtSignal()
+
+    def __init__(self, path, speed=1.0, batch_interval=None, chunk_packets=512, parent=None):
+        super().__init__(parent)
+        self.capture = CaptureFile(path)
+        self.speed = speed
+        self.batch_interval = batch_interval
+        self.chunk_packets = chunk_packets  # Packets per step when not paced
+        self.running = False  # "Connected": accepts commands
+        self.playing = False
+        self.position = 0  # Next record to deliver
+        self.packets_emitted = 0
+        self._read_window = None  # Receive window of the record before position
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._step)
+        self._play_start = 0.0
+        self._play_start_position = 0
+
+    @property
+    def paced(self):
+        return bool(self.speed) and self.speed > 0
+
+    def start(self):
+        self.running = True
+        print(
+            f"[REPLAY] {self.capture.path}: {len(self.capture)} packets, "
+            f"{len(self.capture.records_of(SYNC_HEADER))} sync packet(s), "
+            f"{self.capture.duration_s:.1f} s recorded"
+        )
+
+    def stop(self):
+        self.running = False
+        self.pause()
+
+    def send_signal(self, signal_bytes):
+        """Handle a 9-byte command like the firmware would."""
+        command = bytes(signal_bytes).rstrip(b"_")
+        if command == b"START":
+            self.play()
+        elif command == b"STOP":
+            self.pause()
+        elif command == b"RESET":
+            self.pause()
+            self.position = 0
+            self._read_window = None
+
+    def play(self):
+        if not self.running or self.playing:
+            return
+        if self.position >= len(self.capture):
+            self.position = 0
+            self._read_window = None
+        self.playing = True
+        self._play_start = time.monotonic()
+        self._play_start_position = self.position
+        self._timer.start(0)
+
+    def pause(self):
+        self.playing = False
+        self._timer.stop()
+
+    def _step(self):
+        if not self.playing:
+            return
+        capture = self.capture
+        total = len(capture)
+        elapsed = time.monotonic() - self._play_start
+
+        if self.paced:
+            # Everything recorded up to the current replay time is due
+            t_first = int(capture.t_ns[self._play_start_position])
+            due_ns = t_first + int(elapsed * self.speed * 1e9)
+            window = np.asarray(capture.t_ns[self.position : self.position + MAX_STEP_PACKETS])
+            end = self.position + int(np.searchsorted(window, due_ns, side="right"))
+        else:
+            end = min(self.position + self.chunk_packets, total)
+
+        delivered = end - self.position
+        if delivered:
+            self._deliver(capture.records[self.position : end])
+            self.position = end
+
+        if self.position >= total:
+            self._finish(time.monotonic() - self._play_start)
+            return
+        # Catch up immediately if the step was capped
+        behind = delivered == MAX_STEP_PACKETS
+        interval_s = (self.batch_interval or 0.005) if self.paced and not behind else 0
+        self._timer.start(int(interval_s * 1000))
+
+    def _deliver(self, records):
+        data = records["packet"].tobytes()
+        self.packets_emitted += len(records)
+        if self.batch_interval is None:
+            for i in range(0, len(data), PACKET_SIZE):
+                self.packet_received.emit(data[i : i + PACKET_SIZE])
+            return
+        t_ns = records["t_ns"]
+        earliest_ns = read_windows(t_ns, self._read_window)
+        self._read_window = (int(earliest_ns[-1]), int(t_ns[-1]))
+        builder = BatchBuilder()
+        for i in range(0, len(data), PACKET_SIZE):
+            if data[i] in (SYNC_HEADER, STATUS_HEADER):
+                # Receive windows of the recording, for the ADC timeline checks
+                builder.received = (int(earliest_ns[i // PACKET_SIZE]), int(t_ns[i // PACKET_SIZE]))
+            builder.add(data[i : i + PACKET_SIZE])
+        for batch in builder.take(int(t_ns[-1])):
+            self.packet_batch_received.emit(batch)
+
+    def _finish(self, elapsed):
+        self.playing = False
+        packets = self.position - self._play_start_position
+        rate = packets / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"[REPLAY] Done: {packets} packets in {elapsed:.3f} s = {rate:.0f} packets/s "
+            f"({rate / LINE_PACKETS_PER_S:.1f}x line rate)"
+        )
+        self.finished.emit()
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class SampleBuffer:
+    """
+    Growable typed 1-D numpy buffer.
+
+    Appending a block copies it once into preallocated storage; the storage
+    doubles when full, so appends are amortized O(1) per sample. view()
+    returns the filled part as a numpy array without copying, which can be
+    handed directly to pyqtgraph or the analysis code.
+
+    The list-style methods (append, extend, clear, len, indexing) are kept
+    so the buffer can stand in for the Python lists it replaces.
+    """
+
+    def __init__(self, dtype=np.float64, capacity=4096):
+        self.dtype = np.dtype(dtype)
+        self._data = np.empty(max(1, capacity), dtype=self.dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, index):
+        return self._data[: self._size][index]
+
+    def __array__(self, dtype=None, copy=None):
+        view = self.view()
+        return view if dtype is None else view.astype(dtype)
+
+    @property
+    def capacity(self):
+        """Number of samples that fit without reallocating"""
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        """Bytes allocated for the buffer (including unused capacity)"""
+        return self._data.nbytes
+
+    def view(self):
+        """Zero-copy array of all samples appended so far"""
+        return self._data[: self._size]
+
+    def append(self, value):
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        """Append a block of samples (array, list or scalar iterable)."""
+        values = np.asarray(values, dtype=self.dtype)
+        n = values.size
+        if n == 0:
+            return
+        self._reserve(self._size + n)
+        self._data[self._size : self._size + n] = values.ravel()
+        self._size += n
+
+    def clear(self):
+        """Drop all samples but keep the allocated storage for reuse."""
+        self._size = 0
+
+    def _reserve(self, size):
+        if size <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < size:
+            capacity *= 2
+        data = np.empty(capacity, dtype=self.dtype)
+        data[: self._size] = self._data[: self._size]
+        self._data = data
+
+
+class SampleStore:
+    """Named set of SampleBuffers that share a lifetime (one capture)."""
+
+    def __init__(self):
+        self.series = {}
+
+    def add(self, name, dtype=np.float64, capacity=4096):
+        buffer = SampleBuffer(dtype, capacity)
+        self.series[name] = buffer
+        return buffer
+
+    def clear(self):
+        for buffer in self.series.values():
+            buffer.clear()
+
+    def memory_usage(self):
+        """Return {name: (samples, allocated bytes)} for every series."""
+        return {name: (len(b), b.nbytes) for name, b in self.series.items()}
+
+    @property
+    def nbytes(self):
+        """Total bytes allocated by all series"""
+        return sum(b.nbytes for b in self.series.values())
+
+    def summary(self):
+        """One-line description of the memory use, for logging"""
+        parts = [
+            f"{name}={samples} ({nbytes / 1024:.0f} KiB)"
+            for name, (samples, nbytes) in self.memory_usage().items()
+        ]
+        return f"{self.nbytes / (1024 * 1024):.2f} MiB: " + ", ".join(parts)
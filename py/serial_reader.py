@@ -1,72 +1,92 @@
-import serial
-import threading
 from PyQt5.QtCore import QObject, pyqtSignal
 
-PACKET_SIZE = 21
-VALID_HEADERS = {0xA0, 0xB0, 0xC0, 0xD0}
+from reader_core import ReaderCore
 
 
 class SerialReader(QObject):
+    """
+    Qt signal layer over ReaderCore.
+
+    The core reads and frames on its own thread; packets and batches are
+    emitted as signals, which Qt queues to the receiver's thread.
+    """
+
     packet_received = pyqtSignal(bytes)
+    packet_batch_received = pyqtSignal(object)
 
-    def __init__(self, port, baudrate=115200):
+    def __init__(self, port, baudrate=115200, batch_interval=None):
+        """
+        batch_interval selects how packets are delivered:
+            None -- one packet_received signal per packet
+            0    -- one packet_batch_received signal per serial read
+            > 0  -- one packet_batch_received signal per time slice (seconds)
+        """
         super().__init__()
-        self.buffer = bytearray()
-        self.ser = serial.Serial(
+        self.core = ReaderCore(
             port,
             baudrate=baudrate,
-            bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_EVEN,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=1,  # Prevent blocking forever
+            batch_interval=batch_interval,
+            on_packet=self._emit_packet,
+            on_batch=self.packet_batch_received.emit,
         )
-        self.running = False
-        self.read_thread = threading.Thread(target=self.read_loop, daemon=True)
+        self.ser = self.core.ser
+        self.framer = self.core.framer
+        self.batch_interval = batch_interval
+
+    @property
+    def running(self):
+        return self.core.running
+
+    @property
+    def desync_bytes(self):
+        return self.core.desync_bytes
+
+    @property
+    def bytes_received(self):
+        return self.core.bytes_received
+
+    @property
+    def packets_received(self):
+        return self.core.packets_received
+
+    @property
+    def header_counts(self):
+        return self.core.header_counts
+
+    @property
+    def deliveries(self):
+        return self.core.deliveries
+
+    @property
+    def backlog_bytes(self):
+        return self.core.backlog_bytes
+
+    @property
+    def peak_backlog_bytes(self):
+        return self.core.peak_backlog_bytes
+
+    @property
+    def recorder(self):
+        return self.core.recorder
+
+    @recorder.setter
+    def recorder(self, recorder):
+        """Optional CaptureRecorder that gets every framed packet"""
+        self.core.recorder = recorder
 
     def start(self):
-        self.running = True
-        self.read_thread.start()
+        self.core.start()
 
     def stop(self):
-        self.running = False
-        if self.ser.is_open:
-            self.ser.close()
+        self.core.stop()
 
     def send_signal(self, signal_bytes):
-        if self.ser.is_open:
-            self.ser.write(signal_bytes)
+        self.core.send_signal(signal_bytes)
 
     def log_packet(self, packet: bytes):
         hex_str = " ".join(f"{b:02X}" for b in packet)
         #print(f"[PACKET] {hex_str}")
 
-    def log_desync(self, byte: int):
-        print(f"[DESYNC] Dropped byte: {byte:02X}")
-
-    def read_loop(self):
-        while self.running:
-            try:
-                data = self.ser.read(self.ser.in_waiting or 1)
-                if not data:
-                    continue
-
-                self.buffer.extend(data)
-
-                while len(self.buffer) >= PACKET_SIZE:
-                    if self.buffer[0] in VALID_HEADERS:
-                        packet = bytes(self.buffer[:PACKET_SIZE])
-                        self.log_packet(packet)
-                        self.packet_received.emit(packet)
-                        self.buffer = self.buffer[PACKET_SIZE:]
-                    else:
-                        self.log_desync(self.buffer[0])
-                        self.buffer.pop(0)
-
-            except serial.SerialException as e:
-                print(f"[ERROR] Serial exception: {e}")
-                self.running = False
-                break
-            except Exception as e:
-                print(f"[ERROR] Unexpected exception: {e}")
-                self.running = False
-                break
+    def _emit_packet(self, packet):
+        self.log_packet(packet)
+        self.packet_received.emit(packet)
@@ -0,0 +1,195 @@
+import multiprocessing
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from packet_batch import PacketBatch
+from shm_ring import (
+    ADC_CAPACITY,
+    GPIO_CAPACITY,
+    PACKET_CAPACITY,
+    STAT_BYTES,
+    STAT_DESYNC,
+    STAT_PACKETS,
+    STAT_RUNNING,
+    RingSet,
+    acquisition_main,
+)
+
+
+class SharedMemoryReader(QObject):
+    """
+    Drop-in for SerialReader that reads the port in a separate process.
+
+    The acquisition process (shm_ring.acquisition_main) frames and decodes
+    the stream and writes it into shared-memory rings; this object polls
+    the rings every batch_interval on the GUI thread and emits the new
+    data as PacketBatch objects, split at C0 sync packets. Because the
+    serial reads happen in another process, GUI stalls only delay the
+    polling; as long as the rings hold the backlog nothing is lost. Data
+    overwritten before it could be read is counted in lost_samples,
+    lost_events and lost_packets (packet log only).
+
+    Unlike SerialReader it always delivers batches: packet_received exists
+    only so the two can be connected alike and is never emitted, and a
+    batch_interval of None or 0 polls every 20 ms. The batches carry no D0
+    packets or receive windows, so the ADC timeline's block and wall clock
+    checks do not run; ring overruns arrive as adc_lost instead.
+
+    Commands and recording requests go to the process over a pipe.
+    """
+
+    packet_received = pyqtSignal(bytes)
+    packet_batch_received = pyqtSignal(object)
+
+    def __init__(self, port, baudrate=115200, batch_interval=0.02, adc_capacity=ADC_CAPACITY,
+                 gpio_capacity=GPIO_CAPACITY, packet_capacity=PACKET_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.baudrate = baudrate
+        self.batch_interval = batch_interval or 0.02
+        # Created here, so they live as long as the GUI needs them; only the
+        # acquisition process writes to them
+        self.rings = RingSet(
+            readonly=True,
+            adc_capacity=adc_capacity,
+            gpio_capacity=gpio_capacity,
+            packet_capacity=packet_capacity,
+        )
+        self.positions = {key: 0 for key in self.rings.rings}
+        self.pending_syncs = []
+        self.lost_samples = 0
+        self.lost_events = 0
+        self.lost_packets = 0
+        self.lost_syncs = 0
+
+        context = multiprocessing.get_context("spawn")
+        self.stats = context.Array("Q", 4, lock=False)
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=acquisition_main,
+            args=(port, baudrate, self.rings.names, self.stats, child_conn),
+            daemon=True,
+        )
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.poll)
+        self._started = False
+
+    @property
+    def running(self):
+        return self._started and self.process.is_alive()
+
+    @property
+    def bytes_received(self):
+        return self.stats[STAT_BYTES]
+
+    @property
+    def packets_received(self):
+        return self.stats[STAT_PACKETS]
+
+    @property
+    def desync_bytes(self):
+        return self.stats[STAT_DESYNC]
+
+    def start(self):
+        self.process.start()
+        self._started = True
+        self._timer.start(int(self.batch_interval * 1000))
+        print(f"[SHM] Acquisition process {self.process.pid} reading {self.port}")
+
+    def wait_ready(self, timeout=10.0):
+        """Block until the acquisition process has opened the port (or failed)."""
+        t_end = time.monotonic() + timeout
+        while not self.stats[STAT_RUNNING] and self.process.is_alive():
+            if time.monotonic() > t_end:
+                return False
+            time.sleep(0.01)
+        return bool(self.stats[STAT_RUNNING])
+
+    def stop(self):
+        if not self._started:
+            return
+        self._timer.stop()
+        if self.process.is_alive():
+            self._send(("stop",))
+            self.process.join(2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+        self.poll()
+        self._started = False
+        self.rings.close()
+        if self.lost_samples or self.lost_events or self.lost_packets:
+            print(
+                f"[SHM] Overflow: lost {self.lost_samples} samples, {self.lost_events} GPIO "
+                f"events, {self.lost_packets} logged packets"
+            )
+
+    def send_signal(self, signal_bytes):
+        self._send(("command", bytes(signal_bytes)))
+
+    def record(self, path):
+        """Record the raw packets in the acquisition process (None stops)."""
+        self._send(("record", path))
+
+    def _send(self, message):
+        try:
+            self._conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def poll(self):
+        """Read everything new from the rings and emit it as batches."""
+        if not self._started:
+            return
+        rings = self.rings
+        # Snapshot the data ends first; syncs written later point at or past them
+        adc_end = rings.adc.written
+        gpio_end = rings.gpio.written
+
+        syncs, self.positions["sync"], lost = rings.sync.read(self.positions["sync"])
+        self.lost_syncs += lost
+        self.pending_syncs.extend(syncs)
+        due = [s for s in self.pending_syncs if s["adc"] <= adc_end and s["gpio"] <= gpio_end]
+        self.pending_syncs = self.pending_syncs[len(due) :]
+
+        raw, self.positions["packets"], lost = rings.packets.read(self.positions["packets"])
+        self.lost_packets += lost
+
+        batches = []
+        sync = None
+        for next_sync in due + [None]:
+            adc_stop = adc_end if next_sync is None else int(next_sync["adc"])
+            gpio_stop = gpio_end if next_sync is None else int(next_sync["gpio"])
+            lost_before = self.lost_samples
+            adc = self._read("adc", adc_stop)
+            gpio = self._read("gpio", gpio_stop)
+            adc_lost = self.lost_samples - lost_before
+            if sync is not None or len(adc) or len(gpio) or adc_lost:
+                batches.append(
+                    PacketBatch(
+                        sync=sync, adc=adc.tobytes(), gpio=gpio.tobytes(), adc_lost=adc_lost
+                    )
+                )
+            if next_sync is not None:
+                sync = next_sync["payload"].tobytes()
+
+        if batches:
+            batches[0].raw = raw.tobytes()
+        elif len(raw):
+            batches.append(PacketBatch(raw=raw.tobytes()))
+        for batch in batches:
+            self.packet_batch_received.emit(batch)
+
+    def _read(self, key, end):
+        ring = self.rings.rings[key]
+        position = self.positions[key]
+        if end <= position:
+            return np.zeros(0, dtype=ring.dtype)
+        items, self.positions[key], lost = ring.read(position, end)
+        if key == "adc":
+            self.lost_samples += lost
+        else:
+            self.lost_events += lost
+        return items
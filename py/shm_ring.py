@@ -0,0 +1,229 @@
+"""
+Shared-memory rings between the acquisition process and the GUI.
+
+The acquisition process (acquisition_main) runs ReaderCore and writes the
+decoded content of every serial read into SharedRing buffers: ADC counts,
+GPIO events, C0 sync records and the raw packets for the packet log. The
+GUI process maps the rings read-only and polls them (shm_reader.py), so
+neither the GIL nor a stalled GUI thread can delay the serial reads.
+
+Nothing here imports Qt.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from framer import PACKET_SIZE
+from gpio_decoder import GPIO_EVENT_DTYPE
+
+# Ring header: reserve and commit counters (items ever written), capacity, item size
+HEADER_DTYPE = np.dtype(
+    [("reserve", "<u8"), ("commit", "<u8"), ("capacity", "<u8"), ("itemsize", "<u8")]
+)
+HEADER_SIZE = 64
+
+ADC_DTYPE = np.dtype("<u2")
+PACKET_DTYPE = np.dtype(("u1", (PACKET_SIZE,)))
+# A C0 start packet and the ADC/GPIO ring positions of the first data after it
+SYNC_DTYPE = np.dtype([("adc", "<u8"), ("gpio", "<u8"), ("payload", "u1", (PACKET_SIZE - 1,))])
+
+# Default capacities: minutes of ADC data at 2500 Hz, seconds at 1 MHz
+ADC_CAPACITY = 1 << 22
+GPIO_CAPACITY = 1 << 18
+SYNC_CAPACITY = 256
+PACKET_CAPACITY = 1 << 16
+
+# Stats array slots written by the acquisition process
+STAT_BYTES, STAT_PACKETS, STAT_DESYNC, STAT_RUNNING = range(4)
+
+
+class SharedRing:
+    """
+    Single-producer ring buffer of fixed-size items in shared memory.
+
+    The writer never blocks: it overwrites the oldest items when the
+    reader falls behind. Positions are item counts since creation. To
+    write, the producer first advances `reserve`, then copies the items,
+    then advances `commit`; a reader copies up to `commit` and afterwards
+    checks `reserve` to tell which of the copied items may have been
+    overwritten meanwhile, so overflow is always detected and reported
+    instead of returning torn data.
+
+    The creating side passes capacity and dtype; the other side attaches
+    with the name and dtype and, with readonly, gets read-only views.
+    """
+
+    def __init__(self, dtype, capacity=None, name=None, readonly=False):
+        self.dtype = np.dtype(dtype)
+        create = name is None
+        if create:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=HEADER_SIZE + capacity * self.dtype.itemsize
+            )
+        else:
+            # The acquisition process is started through multiprocessing and
+            # shares the creator's resource tracker, so attaching does not
+            # hand the segment to another tracker that would unlink it early
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.owner = create
+
+        self._header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if create:
+            self._header[0] = (0, 0, capacity, self.dtype.itemsize)
+        self.capacity = int(self._header["capacity"][0])
+        if int(self._header["itemsize"][0]) != self.dtype.itemsize:
+            raise ValueError(f"ring {self.name}: item size does not match {self.dtype}")
+        self.items = np.ndarray(
+            self.capacity, dtype=self.dtype, buffer=self.shm.buf, offset=HEADER_SIZE
+        )
+        if readonly:
+            self.items.flags.writeable = False
+
+    @property
+    def written(self):
+        """Items committed so far"""
+        return int(self._header["commit"][0])
+
+    def write(self, items):
+        items = np.asarray(items)  # Cast on assignment; a subarray dtype (PACKET_DTYPE) takes 2-D rows
+        n = len(items)
+        if not n:
+            return
+        start = self.written
+        end = start + n
+        if n > self.capacity:
+            items = items[-self.capacity :]
+        self._header["reserve"] = end
+        first = (end - len(items)) % self.capacity
+        split = min(len(items), self.capacity - first)
+        self.items[first : first + split] = items[:split]
+        self.items[: len(items) - split] = items[split:]
+        self._header["commit"] = end
+
+    def read(self, position, end=None):
+        """
+        Copy the items from position up to end (default: all committed).
+
+        Returns:
+            (items, new_position, lost): lost counts the items between
+            position and the returned ones that were overwritten before
+            they could be read
+        """
+        if end is None:
+            end = self.written
+        lost = 0
+        if end - position > self.capacity:
+            lost = end - self.capacity - position
+            position += lost
+        first = position % self.capacity
+        count = end - position
+        split = min(count, self.capacity - first)
+        items = np.concatenate((self.items[first : first + split], self.items[: count - split]))
+
+        # Items the writer may have been overwriting while they were copied
+        overrun = int(self._header["reserve"][0]) - self.capacity - position
+        if overrun > 0:
+            overrun = min(overrun, count)
+            items = items[overrun:]
+            lost += overrun
+        return items, end, lost
+
+    def close(self):
+        del self._header, self.items
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingSet:
+    """The four rings of one acquisition process."""
+
+    def __init__(self, names=None, readonly=False, adc_capacity=ADC_CAPACITY,
+                 gpio_capacity=GPIO_CAPACITY, packet_capacity=PACKET_CAPACITY):
+        names = names or {}
+        specs = {
+            "adc": (ADC_DTYPE, adc_capacity),
+            "gpio": (GPIO_EVENT_DTYPE, gpio_capacity),
+            "sync": (SYNC_DTYPE, SYNC_CAPACITY),
+            "packets": (PACKET_DTYPE, packet_capacity),
+        }
+        self.rings = {
+            key: SharedRing(dtype, capacity, name=names.get(key), readonly=readonly)
+            for key, (dtype, capacity) in specs.items()
+        }
+        for key, ring in self.rings.items():
+            setattr(self, key, ring)
+
+    @property
+    def names(self):
+        return {key: ring.name for key, ring in self.rings.items()}
+
+    def write_batch(self, batch):
+        """Write the content of a PacketBatch (reader thread of the acquisition process)."""
+        if batch.sync is not None:
+            record = np.zeros(1, dtype=SYNC_DTYPE)
+            record["adc"] = self.adc.written
+            record["gpio"] = self.gpio.written
+            record["payload"][0, : len(batch.sync)] = np.frombuffer(batch.sync, dtype=np.uint8)
+            self.sync.write(record)
+        if batch.adc.size:
+            self.adc.write(batch.adc)
+        if batch.gpio:
+            count = len(batch.gpio) // GPIO_EVENT_DTYPE.itemsize
+            self.gpio.write(np.frombuffer(batch.gpio, dtype=GPIO_EVENT_DTYPE, count=count))
+        rows = np.frombuffer(batch.raw, dtype=np.uint8)
+        self.packets.write(rows.reshape(-1, PACKET_SIZE))
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+
+
+def acquisition_main(port, baudrate, names, stats, conn):
+    """
+    Entry point of the acquisition process.
+
+    Reads `port` with ReaderCore and writes every serial read into the
+    rings named in `names`. Messages from `conn`: ("command", bytes) is
+    sent to the device, ("record", path or None) starts or stops a
+    CaptureRecorder, ("stop",) ends the process. Reader counters go to
+    the shared `stats` array.
+    """
+    from reader_core import ReaderCore
+    from recorder import CaptureRecorder
+
+    rings = RingSet(names)
+    reader = ReaderCore(port, baudrate=baudrate, batch_interval=0, on_batch=rings.write_batch)
+    reader.start()
+    stats[STAT_RUNNING] = 1
+    recorder = None
+    try:
+        while reader.running:
+            if conn.poll(0.05):
+                message = conn.recv()
+                if message[0] == "command":
+                    reader.send_signal(message[1])
+                elif message[0] == "record":
+                    if recorder is not None:
+                        reader.recorder = None
+                        recorder.close()
+                        recorder = None
+                    if message[1]:
+                        recorder = CaptureRecorder(message[1])
+                        reader.recorder = recorder
+                elif message[0] == "stop":
+                    break
+            stats[STAT_BYTES] = reader.bytes_received
+            stats[STAT_PACKETS] = reader.packets_received
+            stats[STAT_DESYNC] = reader.desync_bytes
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        stats[STAT_RUNNING] = 0
+        reader.stop()
+        reader.read_thread.join(2.0)  # The read thread must leave the rings first
+        if recorder is not None:
+            recorder.close()
+        rings.close()
@@ -0,0 +1,389 @@
+"""
+Firmware protocol simulator on a pseudo-terminal.
+
+Opens a Linux pty that behaves like the STM32 firmware (Core/Src/handlers.c,
+muart.c): it accepts the 9-byte commands and streams 21-byte A0/B0/C0/D0
+packets, so SerialReader(port) can be pointed at it instead of a board.
+
+    python simulator.py [--rate 2500] [--baud 115200] [--mode trg|int]
+                        [--block 1000] [--script scenario.py] [--duration S]
+
+The pty path is printed on start. Sample and event content come from a
+Scenario; --script loads a Python file that defines `scenario` (a Scenario
+instance) or the functions adc_counts(t) and gpio_events() (see Scenario).
+"""
+
+import argparse
+import os
+import pty
+import runpy
+import select
+import threading
+import time
+import tty
+
+import numpy as np
+
+from commands import COMMAND_LENGTH, INTMODE_CMD, RESET_CMD, START_CMD, STOP_CMD, TRGMODE_CMD
+from framer import PACKET_SIZE
+
+ADC_HEADER = 0xA0
+GPIO_HEADER = 0xB0
+START_HEADER = 0xC0
+DUMMY_HEADER = 0xD0
+
+PAYLOAD_SIZE = PACKET_SIZE - 1
+GPIO_EVENT_SIZE = 5
+
+# Firmware defaults (config.h, UART 8E1 = 11 bits per byte)
+ADC_BUFFER_SIZE = 1000
+RING_BUFFER_SIZE = 10000
+BITS_PER_BYTE = 11
+TX_BUFFER_SIZE = 4096  # Packets queued for the pty beyond this wait on the line
+UNTHROTTLED_BUFFER_SIZE = 65536
+TICK_US = 2
+
+CONTINUOUS_MODE = "trg"
+INTERRUPT_MODE = "int"
+
+
+class Scenario:
+    """
+    Signal content of the simulator; subclass or pass callables to script it.
+
+    adc_counts(t) gets an array of sample times in seconds since START and
+    returns 12-bit ADC codes. gpio_events() returns (time_s, level) pairs
+    since START, in time order. The default is a 50 Hz sine around mid-scale
+    and an arc (HIGH from 1 ms to 20 ms with contact chatter) followed by
+    six voltage zero-crossing double-pulses, repeated every period_s.
+    """
+
+    def __init__(self, adc_counts=None, gpio_events=None, frequency_hz=50.0,
+                 amplitude=1500, period_s=1.0):
+        self.frequency_hz = frequency_hz
+        self.amplitude = amplitude
+        self.period_s = period_s
+        if adc_counts is not None:
+            self.adc_counts = adc_counts
+        if gpio_events is not None:
+            self.gpio_events = gpio_events
+
+    def adc_counts(self, t):
+        return 2048 + self.amplitude * np.sin(2 * np.pi * self.frequency_hz * t)
+
+    def gpio_events(self):
+        arc_ms = [(1.0, 1), (3.0, 0), (3.2, 1), (20.0, 0)]
+        for k in range(6):
+            base = 30.0 + 10 * k
+            arc_ms += [(base, 1), (base + 0.3, 0), (base + 0.6, 1), (base + 0.9, 0)]
+        repeat = 0
+        while True:
+            for ms, level in arc_ms:
+                yield repeat * self.period_s + ms / 1000.0, level
+            repeat += 1
+
+
+def load_scenario(path):
+    """Scenario from a script defining `scenario` or adc_counts()/gpio_events()."""
+    namespace = runpy.run_path(path)
+    if isinstance(namespace.get("scenario"), Scenario):
+        return namespace["scenario"]
+    return Scenario(
+        adc_counts=namespace.get("adc_counts"), gpio_events=namespace.get("gpio_events")
+    )
+
+
+class _Ring:
+    """Byte FIFO of the firmware ring buffers; overflow drops the oldest items."""
+
+    def __init__(self, capacity, item_size):
+        self.capacity = capacity
+        self.item_size = item_size
+        self.data = bytearray()
+        self.overflow_bytes = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def queue(self, data):
+        self.data += data
+        excess = len(self.data) - self.capacity
+        if excess > 0:
+            excess += -excess % self.item_size
+            del self.data[:excess]
+            self.overflow_bytes += excess
+
+    def dequeue(self, size):
+        """Up to size bytes, zero-padded to size like the firmware's payload buffers."""
+        chunk = bytes(self.data[:size])
+        del self.data[:size]
+        return chunk.ljust(size, b"\0")
+
+    def clear(self):
+        self.data.clear()
+
+
+class FirmwareSimulator:
+    """
+    STM32 firmware stand-in on a pty.
+
+    Command handling follows handlers.c: START resets and, in continuous
+    (TRGMODE) mode, starts the ADC and timers and sends the C0 start packet;
+    in interrupt (INTMODE) mode that happens at the first GPIO event
+    instead. STOP resets, TRGMODE/INTMODE/RESET switch the mode and reset.
+
+    The ADC produces sample_rate_hz samples per second and queues them in
+    blocks of adc_block (ADC_BUFFER_SIZE, one DMA transfer). Transmission
+    follows muart.c: GPIO packets first, then ADC packets, and D0 dummy
+    packets while the ADC runs and nothing is queued. Packets go out at
+    the rate a UART at `baudrate` (8E1) allows; baudrate=None sends
+    everything queued as fast as the pty takes it, without dummies.
+
+    TIM2 (the GPIO timestamps) is reset at each start and ticks every
+    tick_us, the resolution the Python side decodes.
+    """
+
+    def __init__(self, scenario=None, sample_rate_hz=2500, baudrate=115200,
+                 adc_block=ADC_BUFFER_SIZE, mode=CONTINUOUS_MODE, tick_us=TICK_US):
+        self.scenario = scenario or Scenario()
+        self.sample_rate_hz = sample_rate_hz
+        self.baudrate = baudrate
+        self.adc_block = adc_block
+        self.mode = mode
+        self.tick_us = tick_us
+
+        self.master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self._slave_fd)
+
+        self.adc_ring = _Ring(RING_BUFFER_SIZE, PAYLOAD_SIZE)
+        self.gpio_ring = _Ring(RING_BUFFER_SIZE, GPIO_EVENT_SIZE)
+        self.commands_received = []
+        self.packets_sent = {h: 0 for h in (ADC_HEADER, GPIO_HEADER, START_HEADER, DUMMY_HEADER)}
+        self.unknown_commands = 0
+
+        self._rx = bytearray()
+        self._tx = bytearray()  # Packets on the line, not yet taken by the pty
+        self._armed = False  # START seen; waiting for the start condition
+        self._adc_running = False
+        self._tx_active = False  # Transmit-complete chain running
+        self._t_start = 0.0  # Scenario time 0 (START)
+        self._t_init = 0.0  # ADC/TIM2 start, seconds since START
+        self._samples = 0
+        self._events = None
+        self._next_event = None
+        self._tx_credit = 0.0
+        self._last_tx = 0.0
+
+        self.running = False
+        self._thread = None
+
+    @property
+    def packets_per_s(self):
+        """Line rate in packets per second, or None if unthrottled."""
+        if not self.baudrate:
+            return None
+        return self.baudrate / BITS_PER_BYTE / PACKET_SIZE
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"[SIM] Listening on {self.port}")
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(1.0)
+        os.close(self.master_fd)
+        os.close(self._slave_fd)
+
+    def _run(self):
+        while self.running:
+            # Wake up for commands, pty space for pending packets, or the next tick
+            writers = [self.master_fd] if self._tx else []
+            try:
+                readable, _, _ = select.select([self.master_fd], writers, [], 0.001)
+                if readable:
+                    self._receive(os.read(self.master_fd, 4096))
+            except OSError:
+                pass
+            now = time.monotonic()
+            self._advance(now)
+            self._transmit(now)
+
+    # Commands
+
+    def _receive(self, data):
+        # The firmware receives exactly CMD_STR_LEN bytes per DMA transfer
+        self._rx += data
+        while len(self._rx) >= COMMAND_LENGTH:
+            command = bytes(self._rx[:COMMAND_LENGTH]).decode("ascii", "replace")
+            del self._rx[:COMMAND_LENGTH]
+            self.handle_command(command)
+
+    def handle_command(self, command):
+        self.commands_received.append(command)
+        if command == START_CMD:
+            self._reset()
+            self._armed = True
+            self._t_start = time.monotonic()
+            self._events = iter(self.scenario.gpio_events())
+            self._next_event = next(self._events, None)
+            if self.mode == CONTINUOUS_MODE:
+                self._init(0.0)
+        elif command == STOP_CMD:
+            self._reset()
+        elif command in (TRGMODE_CMD, RESET_CMD):
+            self.mode = CONTINUOUS_MODE
+            self._reset()
+        elif command == INTMODE_CMD:
+            self.mode = INTERRUPT_MODE
+            self._reset()
+        else:
+            self.unknown_commands += 1
+            print(f"[SIM] Unknown command: {command!r}")
+
+    def _reset(self):
+        self._armed = False
+        self._adc_running = False
+        self._tx_active = False
+        self.adc_ring.clear()
+        self.gpio_ring.clear()
+
+    def _init(self, t):
+        """Start ADC and timers at t (s since START) and queue the C0 packet."""
+        self._adc_running = True
+        self._t_init = t
+        self._samples = 0
+        self._send(bytes([START_HEADER]) + (0).to_bytes(4, "little") + b"\xff" * 16)
+        self._tx_active = True
+        self._last_tx = time.monotonic()
+        self._tx_credit = 0.0
+
+    # Signal generation
+
+    def _advance(self, now):
+        if not self._armed:
+            return
+        t = now - self._t_start
+
+        while self._next_event is not None and self._next_event[0] <= t:
+            t_event, level = self._next_event
+            if not self._adc_running:
+                # Interrupt mode: the first GPIO event starts the acquisition
+                self._init(t_event)
+            ticks = int(round((t_event - self._t_init) * 1e6 / self.tick_us)) & 0xFFFFFFFF
+            self.gpio_ring.queue(max(ticks, 1).to_bytes(4, "little") + bytes([level & 1]))
+            self._next_event = next(self._events, None)
+
+        if not self._adc_running:
+            return
+        due = int((t - self._t_init) * self.sample_rate_hz)
+        while due - self._samples >= self.adc_block:
+            index = self._samples + np.arange(self.adc_block)
+            times = self._t_init + index / self.sample_rate_hz
+            counts = np.clip(np.rint(self.scenario.adc_counts(times)), 0, 4095)
+            self.adc_ring.queue(counts.astype("<u2").tobytes())
+            self._samples += self.adc_block
+
+    # Transmission
+
+    def _transmit(self, now):
+        if self._tx:
+            self._flush()
+        if not self._tx_active:
+            return
+
+        if self.baudrate:
+            per_packet = PACKET_SIZE * BITS_PER_BYTE / self.baudrate
+            # A blocked receiver does not let the line run ahead by more than ~10 ms
+            limit = max(8.0, 0.01 / per_packet)
+            self._tx_credit = min(self._tx_credit + (now - self._last_tx) / per_packet, limit)
+            self._last_tx = now
+            space = (TX_BUFFER_SIZE - len(self._tx)) // PACKET_SIZE
+            self._tx_credit -= self._next_packets(min(int(self._tx_credit), space), dummy=True)
+        else:
+            self._next_packets((UNTHROTTLED_BUFFER_SIZE - len(self._tx)) // PACKET_SIZE, dummy=False)
+        self._flush()
+
+    def _next_packets(self, count, dummy):
+        """
+        Queue up to count packets of the transmit chain, in the firmware's
+        order: GPIO first, then ADC, then D0 dummies while the ADC runs
+        (only if dummy). Returns the number queued.
+        """
+        sent = 0
+        while sent < count and len(self.gpio_ring):
+            self._send(bytes([GPIO_HEADER]) + self.gpio_ring.dequeue(PAYLOAD_SIZE))
+            sent += 1
+
+        adc_packets = min(count - sent, -(-len(self.adc_ring) // PAYLOAD_SIZE))
+        if adc_packets > 0:
+            rows = np.empty((adc_packets, PACKET_SIZE), dtype=np.uint8)
+            rows[:, 0] = ADC_HEADER
+            payloads = self.adc_ring.dequeue(adc_packets * PAYLOAD_SIZE)
+            rows[:, 1:] = np.frombuffer(payloads, dtype=np.uint8).reshape(adc_packets, PAYLOAD_SIZE)
+            self._tx += rows.tobytes()
+            self.packets_sent[ADC_HEADER] += adc_packets
+            sent += adc_packets
+
+        if sent < count:
+            if not self._adc_running:
+                # Nothing queued and the ADC stopped: the chain ends
+                self._tx_active = False
+            elif dummy:
+                dummies = count - sent
+                self._tx += (bytes([DUMMY_HEADER]) + bytes(PAYLOAD_SIZE)) * dummies
+                self.packets_sent[DUMMY_HEADER] += dummies
+                sent = count
+        return sent
+
+    def _send(self, packet):
+        self._tx += packet
+        self.packets_sent[packet[0]] += 1
+
+    def _flush(self):
+        try:
+            written = os.write(self.master_fd, self._tx)
+        except (BlockingIOError, OSError):
+            return
+        del self._tx[:written]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=2500, help="ADC sample rate (Hz)")
+    parser.add_argument("--baud", type=int, default=115200, help="0 for unthrottled")
+    parser.add_argument("--mode", choices=(CONTINUOUS_MODE, INTERRUPT_MODE), default=CONTINUOUS_MODE)
+    parser.add_argument("--block", type=int, default=ADC_BUFFER_SIZE, help="samples per ADC transfer")
+    parser.add_argument("--script", help="Python file defining the scenario")
+    parser.add_argument("--duration", type=float, help="exit after this many seconds")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.script) if args.script else Scenario()
+    sim = FirmwareSimulator(
+        scenario, sample_rate_hz=args.rate, baudrate=args.baud or None,
+        adc_block=args.block, mode=args.mode,
+    )
+    sim.start()
+    try:
+        if args.duration:
+            time.sleep(args.duration)
+        else:
+            while True:
+                time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    sim.stop()
+    print(f"[SIM] Commands: {sim.commands_received}")
+    print("[SIM] Packets sent: " + ", ".join(f"{h:02X}={n}" for h, n in sim.packets_sent.items()))
+    print(
+        f"[SIM] Ring overflow: ADC {sim.adc_ring.overflow_bytes} B, "
+        f"GPIO {sim.gpio_ring.overflow_bytes} B"
+    )
+
+
+if __name__ == "__main__":
+    main()
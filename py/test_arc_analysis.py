@@ -0,0 +1,269 @@
+import numpy as np
+import pytest
+
+from arc_analysis import ArcTracker, analyze_gpio, current_zero_crossings
+from gpio_decoder import expand_gpio_steps
+
+KEYS = ("t_start", "raw_end_time", "pulse_pair_duration", "t_end", "t_arc")
+
+
+def steps(times_ms, high):
+    """GPIO step series as the live view builds it: the LOW point at 0 ms, then the steps."""
+    times, _, levels = expand_gpio_steps(np.asarray(times_ms), np.asarray(high, dtype=bool))
+    return np.concatenate(([0.0], times)), np.concatenate(([0], levels)).astype(np.uint8)
+
+
+def step_series(rng, events, mean_gap_ms):
+    times_ms = np.cumsum(rng.exponential(mean_gap_ms, events) + 0.002).round(3)
+    return steps(times_ms, rng.random(events) < 0.5)
+
+
+def double_pulse_series(rng, tail_ms):
+    """An arc, then a dense train of double-pulses, ending tail_ms after a falling edge."""
+    events = []
+    t = 1.0
+    for _ in range(int(rng.integers(1, 8))):  # The arc: GPIO toggling
+        events += [(t, 1), (t + rng.uniform(0.1, 4.0), 0)]
+        t = events[-1][0] + rng.uniform(0.1, 6.0)
+    for _ in range(int(rng.integers(0, 40))):  # Double-pulses, some wider than the window
+        widths = rng.uniform(0.05, 0.8, 3)
+        events += [(t, 1), (t + widths[0], 0), (t + widths[:2].sum(), 1),
+                   (t + widths.sum(), 0)]
+        t = events[-1][0] + rng.uniform(0.05, 10.0)
+    # The data ends tail_ms after the last falling edge (a LOW event, no edge)
+    events.append((events[-1][0] + tail_ms, 0))
+    times_ms = np.round([time for time, _ in events], 3)
+    return steps(times_ms, [level for _, level in events])
+
+
+# Reference copies of the LivePlotter methods analyze_gpio replaced
+# (detect_arc_start_time, detect_arc_end_time, find_last_pulse_pair_duration,
+# find_zero_crossings and their use in process_arc_analysis)
+
+def reference_arc_start_time(gpio_times, gpio_levels):
+    if gpio_times is None or len(gpio_times) < 2:
+        return None
+    for i in range(1, len(gpio_levels)):
+        if gpio_levels[i - 1] == 0 and gpio_levels[i] == 1:
+            return gpio_times[i]
+    return None
+
+
+def reference_arc_end_time(gpio_times, gpio_levels):
+    if gpio_times is None or len(gpio_times) < 2:
+        return None, None
+
+    falling_edges = []
+    for i in range(1, len(gpio_levels)):
+        if gpio_levels[i - 1] == 1 and gpio_levels[i] == 0:
+            falling_edges.append((i, gpio_times[i]))
+
+    for idx, (i, time) in enumerate(falling_edges):
+        if idx == len(falling_edges) - 1:
+            if i < len(gpio_times) - 1 and gpio_times[-1] - time >= 5.0:
+                return time, reference_pulse_pair_duration(gpio_times, gpio_levels, i)
+        else:
+            next_rising_idx = None
+            for j in range(i + 1, len(gpio_levels)):
+                if gpio_levels[j] == 1:
+                    next_rising_idx = j
+                    break
+
+            if next_rising_idx is None:
+                if gpio_times[-1] - time >= 5.0:
+                    return time, reference_pulse_pair_duration(gpio_times, gpio_levels, i)
+            elif gpio_times[next_rising_idx] - time >= 5.0:
+                return time, reference_pulse_pair_duration(gpio_times, gpio_levels, i)
+
+    return None, None
+
+
+def reference_pulse_pair_duration(gpio_times, gpio_levels, end_idx):
+    if end_idx >= len(gpio_times) - 1:
+        return 0
+
+    rising_edges = []
+    falling_edges = []
+    i = end_idx + 1
+    while i < len(gpio_levels) and (len(rising_edges) < 2 or len(falling_edges) < 2):
+        if i > 0:
+            if gpio_levels[i - 1] == 0 and gpio_levels[i] == 1:
+                rising_edges.append(i)
+            elif gpio_levels[i - 1] == 1 and gpio_levels[i] == 0:
+                falling_edges.append(i)
+        i += 1
+
+    if len(rising_edges) >= 2 and len(falling_edges) >= 2:
+        return gpio_times[falling_edges[1]] - gpio_times[rising_edges[0]]
+    return 0
+
+
+def reference_zero_crossings(gpio_times, gpio_levels, raw_end_time=None):
+    zero_crossings = []
+    i = 0
+    while i < len(gpio_times) - 3:
+        if i > 0 and gpio_levels[i - 1] == 0 and gpio_levels[i] == 1:
+            t1 = gpio_times[i]
+            if raw_end_time is not None and t1 < raw_end_time:
+                i += 1
+                continue
+
+            j = i + 1
+            found_second_falling = False
+            while j < len(gpio_times) and gpio_times[j] - t1 < 2.0:
+                if j > 0 and gpio_levels[j - 1] == 1 and gpio_levels[j] == 0:
+                    has_rising_edge = False
+                    for k in range(i + 1, j):
+                        if gpio_levels[k - 1] == 0 and gpio_levels[k] == 1:
+                            has_rising_edge = True
+                            break
+                    if has_rising_edge:
+                        zero_crossings.append((t1 + gpio_times[j]) / 2.0)
+                        found_second_falling = True
+                        i = j
+                        break
+                j += 1
+
+            if not found_second_falling:
+                i += 1
+        else:
+            i += 1
+
+    return zero_crossings
+
+
+def reference_analysis(gpio_times, gpio_levels):
+    gpio_times = gpio_times.tolist()
+    gpio_levels = gpio_levels.tolist()
+    t_start = reference_arc_start_time(gpio_times, gpio_levels)
+    raw_end_time, pulse_pair_duration = reference_arc_end_time(gpio_times, gpio_levels)
+    t_end = t_arc = None
+    if raw_end_time is not None:
+        t_end = raw_end_time - pulse_pair_duration / 2.0
+        if t_start is not None:
+            t_arc = raw_end_time - t_start - pulse_pair_duration / 2.0
+    return {
+        "t_start": t_start,
+        "raw_end_time": raw_end_time,
+        "pulse_pair_duration": pulse_pair_duration,
+        "t_end": t_end,
+        "t_arc": t_arc,
+        "voltage_zero_crossings": reference_zero_crossings(gpio_times, gpio_levels, raw_end_time),
+    }
+
+
+def assert_same(expected, actual):
+    for key in KEYS:
+        if expected[key] is None:
+            assert actual[key] is None, key
+        else:
+            assert actual[key] == pytest.approx(expected[key], abs=1e-9), key
+    assert actual["voltage_zero_crossings"] == pytest.approx(
+        expected["voltage_zero_crossings"], abs=1e-9
+    )
+
+
+@pytest.mark.parametrize("mean_gap_ms", [0.3, 1.0, 3.0])
+def test_chunked_feed_matches_analyze_gpio(mean_gap_ms):
+    rng = np.random.default_rng(int(mean_gap_ms * 10))
+    for _ in range(200):
+        times, levels = step_series(rng, int(rng.integers(0, 60)), mean_gap_ms)
+        tracker = ArcTracker()
+        previous = tracker.results()
+        i = 0
+        while i < len(times):
+            k = int(rng.integers(1, 6))
+            changed = tracker.feed(times[i : i + k], levels[i : i + k])
+            i += k
+            results = tracker.results()
+            assert_same(analyze_gpio(times[:i], levels[:i]), results)
+            if not changed:
+                assert results == previous
+            previous = results
+
+
+def test_double_pulses_after_arc_end():
+    # Arc from 1 ms to 10 ms, a pulse pair, then two more double-pulses
+    events = [(1.0, 1), (3.0, 0), (4.0, 1), (10.0, 0), (20.0, 1), (20.5, 0), (21.0, 1),
+              (21.5, 0), (30.0, 1), (30.4, 0), (30.8, 1), (31.2, 0), (40.0, 1), (40.5, 0),
+              (41.0, 1), (41.5, 0)]
+    times_ms = np.array([t for t, _ in events])
+    high = np.array([level for _, level in events], dtype=bool)
+    times, _, levels = expand_gpio_steps(times_ms, high)
+    times = np.concatenate(([0.0], times))
+    levels = np.concatenate(([0], levels)).astype(np.uint8)
+
+    tracker = ArcTracker()
+    for i in range(len(times)):
+        tracker.feed(times[i : i + 1], levels[i : i + 1])
+    results = tracker.results()
+    assert_same(analyze_gpio(times, levels), results)
+    assert results["t_start"] == 1.0
+    assert results["raw_end_time"] == 10.0
+    assert results["pulse_pair_duration"] == 1.5
+    # The pulse pair is within the window too, so it also marks a zero-crossing
+    assert results["voltage_zero_crossings"] == [20.75, 30.6, 40.75]
+
+
+@pytest.mark.parametrize("mean_gap_ms", [0.3, 1.0, 3.0])
+def test_analyze_gpio_matches_reference_on_random_series(mean_gap_ms):
+    rng = np.random.default_rng(100 + int(mean_gap_ms * 10))
+    for _ in range(300):
+        times, levels = step_series(rng, int(rng.integers(0, 80)), mean_gap_ms)
+        assert analyze_gpio(times, levels) == reference_analysis(times, levels)
+
+
+@pytest.mark.parametrize("tail_ms", [0.5, 4.999, 5.0, 12.0])
+def test_analyze_gpio_matches_reference_on_double_pulse_trains(tail_ms):
+    rng = np.random.default_rng(int(tail_ms * 1000))
+    for _ in range(200):
+        times, levels = double_pulse_series(rng, tail_ms)
+        expected = reference_analysis(times, levels)
+        assert analyze_gpio(times, levels) == expected
+
+
+def reference_current_zero_crossings(adc_times, values, start_time=None, end_time=None):
+    """The sample loop of LivePlotter.detect_current_zero_crossings that current_zero_crossings replaced."""
+    zero_crossings = []
+    for i in range(1, len(adc_times)):
+        if start_time is not None and adc_times[i] < start_time:
+            continue
+        if end_time is not None and adc_times[i] > end_time:
+            break
+        if (values[i - 1] < 0 and values[i] > 0) or (values[i - 1] > 0 and values[i] < 0):
+            if values[i] != values[i - 1]:
+                t_ratio = -values[i - 1] / (values[i] - values[i - 1])
+                zero_crossings.append(adc_times[i - 1] + t_ratio * (adc_times[i] - adc_times[i - 1]))
+    return zero_crossings
+
+
+def test_current_zero_crossings_match_reference():
+    rng = np.random.default_rng(7)
+    for _ in range(500):
+        n = int(rng.integers(0, 200))
+        times = np.cumsum(rng.uniform(0.1, 0.5, n)).round(2)
+        # Small integers, so exact zeros and runs of them are common
+        values = rng.integers(-2, 3, n).astype(np.float64) * rng.choice([1.0, 0.37])
+        windows = [(None, None)]
+        if n:
+            # Window edges on sample times, between them and outside the data
+            edges = np.concatenate((times[rng.integers(0, n, 2)], rng.uniform(-5, times[-1] + 5, 2)))
+            windows += [(edges[0], edges[1]), (edges[2], None), (None, edges[3]),
+                        (edges[1], edges[0]), (times[-1] + 1, None), (None, times[0] - 1)]
+        for start, end in windows:
+            expected = reference_current_zero_crossings(times, values, start, end)
+            assert current_zero_crossings(times, values, start, end) == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_hysteresis_counts_one_crossing_per_half_period(seed):
+    # 50 Hz sine sampled at 10 kHz with 10 % noise; true zeros at 11.3, 21.3, ... 61.3 ms
+    rng = np.random.default_rng(seed)
+    times = np.arange(0, 100, 0.1)
+    values = np.sin(2 * np.pi * (times - 1.3) / 20.0) + 0.1 * rng.standard_normal(len(times))
+
+    assert len(current_zero_crossings(times, values, 10.0, 70.0)) > 6  # Noise near zero
+    crossings = current_zero_crossings(times, values, 10.0, 70.0, hysteresis=0.3)
+    assert len(crossings) == 6
+    # Taken at the last sign change before the threshold: late by up to about 1 ms
+    assert np.abs(np.array(crossings) - (11.3 + 10.0 * np.arange(6))).max() < 1.0
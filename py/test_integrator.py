@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from integrator import CALIBRATION_KA_PER_V, HIGH_PASS_WINDOW, StreamingIntegrator, integrate_batch
+
+PERIOD_MS = 0.4
+
+
+def coil_signal(n, seed=0):
+    """50 Hz coil voltage with a DC offset and noise, sampled every PERIOD_MS."""
+    rng = np.random.default_rng(seed)
+    times = np.arange(n) * PERIOD_MS
+    signal = 0.5 * np.sin(2 * np.pi * times / 20.0) + 0.05 + 0.01 * rng.standard_normal(n)
+    return times, signal
+
+
+def streamed(times, signal, block):
+    integrator = StreamingIntegrator()
+    parts = [integrator.process(times[i : i + block], signal[i : i + block])
+             for i in range(0, len(signal), block)]
+    return np.concatenate(parts)
+
+
+@pytest.mark.parametrize("block", [1, 10, 137, 5000])
+def test_matches_batch_within_transient_bound(block):
+    times, signal = coil_signal(5000)
+    batch = integrate_batch(times, signal)
+    live = streamed(times, signal, block)
+    delay = StreamingIntegrator().delay
+    assert len(live) == len(signal) - delay
+
+    # Documented bound: calibration * (window / 2) * dt * max |running mean - mean|
+    half = HIGH_PASS_WINDOW // 2
+    mean_error = np.abs(np.cumsum(signal) / np.arange(1, len(signal) + 1) - signal.mean())
+    bound = np.array([
+        CALIBRATION_KA_PER_V * half * PERIOD_MS * mean_error[max(k - half, 0) : k + half + 1].max()
+        for k in range(len(live))
+    ])
+    error = np.abs(live - batch[: len(live)])
+    assert np.all(error <= bound)
+    # The transient is gone after a few thousand samples
+    assert error[2000:].max() < 0.01 * np.abs(batch).max()
+
+
+def test_block_size_does_not_matter():
+    times, signal = coil_signal(3000, seed=1)
+    np.testing.assert_allclose(streamed(times, signal, 1), streamed(times, signal, 3000), atol=1e-9)
+
+
+def test_reset_starts_a_new_capture():
+    times, signal = coil_signal(1000, seed=2)
+    integrator = StreamingIntegrator()
+    integrator.process(times, signal + 1.0)
+    integrator.reset()
+    np.testing.assert_allclose(integrator.process(times, signal), streamed(times, signal, 1000))
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from framer import PACKET_SIZE
+from packet_batch import ADC_HEADER, STATUS_HEADER, SYNC_HEADER, BatchBuilder
+from timeline import ADC_BLOCK_SAMPLES, SAMPLES_PER_FRAME, AdcTimeline, read_windows, recorded_times
+
+RATE_HZ = 2500
+BLOCK_FRAMES = ADC_BLOCK_SAMPLES // SAMPLES_PER_FRAME
+PACKET_NS = 230_000  # 21 bytes at 921600 baud
+LATENCY_NS = 2_000_000
+T0_NS = 1_700_000_000_000_000_000
+
+
+def stream(seconds, start_ticks=0, drop_blocks=(), read_ms=10):
+    """
+    Packets of a simulated capture with the times of the reads that return them.
+
+    The firmware sends C0, then every completed block of ADC samples, and
+    D0 dummies in between while its ring is empty; the host reads every
+    read_ms.
+
+    Returns:
+        list of (packet, earliest_ns, latest_ns)
+    """
+    sent = [(T0_NS, bytes([SYNC_HEADER]) + start_ticks.to_bytes(4, "little") + bytes(16))]
+    block_ns = ADC_BLOCK_SAMPLES * 1_000_000_000 // RATE_HZ
+    t_ns = T0_NS
+    for block in range(int(seconds * RATE_HZ) // ADC_BLOCK_SAMPLES):
+        done_ns = T0_NS + (block + 1) * block_ns
+        while t_ns + PACKET_NS < done_ns:
+            t_ns += PACKET_NS
+            sent.append((t_ns, bytes([STATUS_HEADER]) + bytes(PACKET_SIZE - 1)))
+        t_ns = done_ns
+        if block not in drop_blocks:
+            for _ in range(BLOCK_FRAMES):
+                t_ns += PACKET_NS
+                sent.append((t_ns, bytes([ADC_HEADER]) + bytes(PACKET_SIZE - 1)))
+    sent.append((t_ns + PACKET_NS, bytes([STATUS_HEADER]) + bytes(PACKET_SIZE - 1)))
+
+    read_ns = read_ms * 1_000_000
+    packets = []
+    for t_ns, packet in sent:
+        # Returned by the first read after it arrived; reads are 3 ms off the firmware's clock
+        latest = T0_NS + 3_000_000 + -(-(t_ns + LATENCY_NS - T0_NS - 3_000_000) // read_ns) * read_ns
+        packets.append((packet, latest - read_ns, latest))
+    return packets
+
+
+def live_times(packets, batch_packets, start_ticks=0):
+    """Run packets through a BatchBuilder cut every batch_packets, as the GUI does."""
+    builder = BatchBuilder()
+    timeline = None
+    times = []
+    for i, (packet, earliest, latest) in enumerate(packets, 1):
+        builder.received = (earliest, latest)
+        builder.add(packet)
+        if i % batch_packets and i != len(packets):
+            continue
+        for batch in builder.take(latest):
+            if batch.sync is not None:
+                timeline = AdcTimeline(RATE_HZ, start_ticks, batch.sync_received)
+            times.append(
+                timeline.add(
+                    batch.adc.size, batch.status_received, batch.adc_lost, batch.adc_before_status()
+                )
+            )
+    return timeline, np.concatenate(times)
+
+
+def test_nonzero_start_stamp():
+    packets = stream(4.0, start_ticks=5_000_000)
+    timeline, times = live_times(packets, 40, start_ticks=5_000_000)
+    assert timeline.lost_samples == 0
+    assert timeline.duplicate_samples == 0
+    assert timeline.status_checks > 10
+    np.testing.assert_allclose(times, np.arange(times.size) * 1000.0 / RATE_HZ)
+
+
+@pytest.mark.parametrize("batch_packets", [40, 80, 512, 5000])
+def test_large_batches(batch_packets):
+    timeline, times = live_times(stream(6.0), batch_packets)
+    assert timeline.lost_samples == 0
+    assert timeline.duplicate_samples == 0
+    np.testing.assert_allclose(times, np.arange(times.size) * 1000.0 / RATE_HZ)
+
+
+@pytest.mark.parametrize("batch_packets", [1, 80, 512])
+def test_dropped_block(batch_packets):
+    timeline, times = live_times(stream(6.0, drop_blocks=(4,)), batch_packets)
+    assert timeline.lost_samples == ADC_BLOCK_SAMPLES
+    assert timeline.duplicate_samples == 0
+    assert [gap["reason"] for gap in timeline.gaps] == ["overflow"]
+    assert timeline.gaps[0]["time_ms"] == 4 * ADC_BLOCK_SAMPLES * 1000.0 / RATE_HZ
+    # Samples after the gap keep their firmware times
+    assert times.size == 14 * ADC_BLOCK_SAMPLES
+    assert times[-1] == (15 * ADC_BLOCK_SAMPLES - 1) * 1000.0 / RATE_HZ
+
+
+def test_recorded_stream():
+    packets = stream(6.0, start_ticks=5_000_000, drop_blocks=(7,))
+    headers = np.array([packet[0] for packet, _, _ in packets])
+    t_ns = np.array([latest for _, _, latest in packets], dtype=np.int64)
+    earliest_ns = read_windows(t_ns)
+    # The recording starts at the C0: when its read began is unknown
+    assert earliest_ns[0] == 0
+    # Reads that returned nothing are not recorded: the windows can only be wider
+    assert np.all(earliest_ns[1:] <= [earliest for _, earliest, _ in packets[1:]])
+
+    timeline = AdcTimeline(RATE_HZ, 5_000_000, (int(earliest_ns[0]), int(t_ns[0])))
+    times = recorded_times(timeline, headers[1:], t_ns[1:], earliest_ns[1:])
+    assert times.size == 14 * ADC_BLOCK_SAMPLES
+    assert timeline.lost_samples == ADC_BLOCK_SAMPLES
+    assert timeline.duplicate_samples == 0
+    assert timeline.gaps[0]["time_ms"] == 7 * ADC_BLOCK_SAMPLES * 1000.0 / RATE_HZ
+
+
+def test_read_windows_continue_previous_read():
+    t_ns = np.array([5, 5, 9, 9, 9, 12])
+    assert list(read_windows(t_ns)) == [0, 0, 5, 5, 5, 9]
+    assert list(read_windows(t_ns, previous=(2, 5))) == [2, 2, 5, 5, 5, 9]
+    assert list(read_windows(t_ns, previous=(1, 3))) == [3, 3, 5, 5, 5, 9]
@@ -0,0 +1,28 @@
+import time
+
+
+class ThrottledLog:
+    """
+    Print channel for messages that can fire at packet rate.
+
+    At most one message per interval is printed; the others are counted
+    and the count is appended to the next printed message. Arguments are
+    %-formatted only when a message is actually printed.
+    """
+
+    def __init__(self, interval_s=1.0):
+        self.interval_s = interval_s
+        self.suppressed = 0
+        self._last = None
+
+    def log(self, message, *args):
+        now = time.monotonic()
+        if self._last is not None and now - self._last < self.interval_s:
+            self.suppressed += 1
+            return
+        self._last = now
+        text = message % args if args else message
+        if self.suppressed:
+            text += f" (+{self.suppressed} suppressed)"
+            self.suppressed = 0
+        print(text)
@@ -0,0 +1,234 @@
+import math
+
+import numpy as np
+
+from framer import PACKET_SIZE
+from gpio_decoder import TICK_MS
+from packet_batch import ADC_HEADER, STATUS_HEADER
+
+SAMPLES_PER_FRAME = (PACKET_SIZE - 1) // 2  # Samples per A0 packet
+
+# ADC_BUFFER_SIZE of the firmware: samples per DMA block, queued for sending at once
+ADC_BLOCK_SAMPLES = 1000
+
+# Longest time a packet takes from the firmware into the host's serial driver (USB-UART bridge)
+LATENCY_MARGIN_MS = 50.0
+
+
+class AdcTimeline:
+    """
+    Firmware time of every ADC sample of one capture, with the gaps in it.
+
+    Sample n of a capture is taken n sample periods after the ADC
+    started, right before the firmware sent the C0 packet, so sample times
+    are in ms since the start of the capture. (TIM2 runs freely; the C0
+    stamp start_ticks is kept as start_ms but does not shift the times.)
+    A0 frames carry no counter, so lost and repeated frames are inferred:
+
+        block alignment -- the firmware queues whole blocks of
+                           block_samples and sends D0 only while its ADC
+                           ring is empty, so at a D0 the samples received
+                           must be a whole number of blocks. A shortfall
+                           means frames were lost (typically with a framer
+                           desync), an excess that frames were repeated.
+        wall clock      -- between the C0 and a D0 the firmware can have
+                           completed neither more nor fewer blocks than the
+                           receive times of the two packets allow. A full
+                           ring drops whole blocks; they show up here.
+        host loss       -- samples the host knows it lost (shared memory
+                           ring overruns) are passed to add() directly.
+
+    Lost samples are not compressed away: the samples after a gap keep
+    their firmware times, and every gap is recorded in `gaps`. A loss found
+    at a D0 is placed at the D0, the first point where it is known. Repeated
+    samples cannot be located; they are counted in duplicate_samples and
+    keep consecutive times.
+
+    Receive times are given as windows (earliest_ns, latest_ns): a packet
+    reached the serial driver between the previous read (earliest) and
+    the read that returned it (latest). The check allows for the
+    whole window plus margin_ms of transit latency, so it holds however
+    many packets a read or a GUI batch covers. Without a window (None) it
+    is skipped; an unknown earliest time (0) skips the bound that needs it.
+    """
+
+    def __init__(self, sample_rate_hz, start_ticks=0, start_received=None,
+                 block_samples=ADC_BLOCK_SAMPLES, margin_ms=LATENCY_MARGIN_MS):
+        self.sample_rate_hz = sample_rate_hz
+        self.period_ms = 1000.0 / sample_rate_hz
+        self.start_ms = start_ticks * TICK_MS  # TIM2 time of the C0 packet
+        self.start_received = start_received  # Receive window of the C0 packet
+        self.block_samples = block_samples
+        self.margin_ms = margin_ms
+
+        self.index = 0  # Firmware index of the next sample
+        self.received_samples = 0
+        self.lost_samples = 0
+        self.duplicate_samples = 0
+        self.desync_events = 0
+        self.desync_bytes = 0
+        self.status_checks = 0
+        self.gaps = []  # dicts: time_ms (first missing sample), samples, duration_ms, reason
+        self._desync_pending = False
+
+    def add(self, count, received=None, lost=0, caught_up=None):
+        """
+        Assign firmware times to the samples of one batch.
+
+        Args:
+            count: Number of samples in the batch
+            received: Receive window (earliest_ns, latest_ns) of the batch's
+                last D0 packet, or None if unknown
+            lost: Samples known to be lost right before the batch
+            caught_up: Samples of the batch that precede its last D0 packet,
+                or None if it has none
+
+        Returns:
+            float64 array of count sample times in ms
+        """
+        if lost:
+            self._gap(lost, "host")
+        split = count if caught_up is None else caught_up
+        first = self.index
+        self.index += count
+        self.received_samples += count
+
+        shift = 0
+        if caught_up is not None:
+            self.index -= count - split
+            self._check(received)
+            shift = self.index - (first + split)
+            self.index += count - split
+
+        indices = np.arange(first, first + count, dtype=np.float64)
+        if shift:
+            indices[split:] += shift
+        return indices * self.period_ms
+
+    def desync(self, byte_count):
+        """Note a framer desync: the frames it broke show up at the next D0."""
+        self.desync_events += 1
+        self.desync_bytes += byte_count
+        self._desync_pending = True
+
+    def summary(self):
+        """Counters and gaps as a JSON-serializable dict."""
+        return {
+            "received_samples": self.received_samples,
+            "lost_samples": self.lost_samples,
+            "duplicate_samples": self.duplicate_samples,
+            "gaps": list(self.gaps),
+            "desync_events": self.desync_events,
+            "desync_bytes": self.desync_bytes,
+            "status_checks": self.status_checks,
+        }
+
+    def _check(self, received):
+        """The firmware has sent every completed block: account for what is missing."""
+        self.status_checks += 1
+        block = self.block_samples
+        remainder = (self.index - self.duplicate_samples) % block
+        if remainder:
+            if self._desync_pending or remainder > block // 2:
+                self._gap(block - remainder, "desync" if self._desync_pending else "frames")
+            else:
+                self.duplicate_samples += remainder
+        self._desync_pending = False
+
+        start = self.start_received
+        if not received or not start:
+            return
+        # Firmware time from the C0 to the D0, at least and at most
+        block_ms = block * self.period_ms
+        blocks = (self.index - self.duplicate_samples) // block
+        if received[0]:
+            shortest_ms = (received[0] - start[1]) / 1e6 - self.margin_ms
+            fewest = math.floor(shortest_ms / block_ms)
+            if blocks < fewest:
+                self._gap((fewest - blocks) * block, "overflow")
+                return
+        if start[0]:
+            longest_ms = (received[1] - start[0]) / 1e6 + self.margin_ms
+            most = math.floor(longest_ms / block_ms)
+            if blocks > most:
+                self.duplicate_samples += (blocks - most) * block
+
+    def _gap(self, samples, reason):
+        gap = {
+            "time_ms": self.index * self.period_ms,
+            "samples": int(samples),
+            "duration_ms": samples * self.period_ms,
+            "reason": reason,
+        }
+        self.gaps.append(gap)
+        self.index += samples
+        self.lost_samples += samples
+        print(
+            f"[GAP] {gap['samples']} ADC samples ({gap['duration_ms']:.1f} ms) "
+            f"missing at {gap['time_ms']:.3f} ms ({reason})"
+        )
+
+
+def read_windows(t_ns, previous=None):
+    """
+    Earliest receive time of every packet of a recorded stream.
+
+    The packets of one serial read share its receive time; they reached
+    the driver after the previous read, so a packet was received within
+    (earliest, t_ns], earliest being the time of the previous read.
+
+    Args:
+        t_ns: Receive time of every packet (ns, non-decreasing)
+        previous: Receive window (earliest_ns, latest_ns) of the packet
+            before t_ns[0], or None if unknown
+
+    Returns:
+        int64 array of earliest receive times, 0 where unknown
+    """
+    t_ns = np.asarray(t_ns, dtype=np.int64)
+    if not len(t_ns):
+        return t_ns.copy()
+    before = np.empty_like(t_ns)
+    before[1:] = t_ns[:-1]
+    before[0] = previous[1] if previous else 0
+    new_read = t_ns != before
+    earliest = np.where(new_read, before, 0)
+    if previous and not new_read[0]:
+        # The first packets continue the read of the previous packet
+        new_read[0] = True
+        earliest[0] = previous[0]
+    read_start = np.maximum.accumulate(np.where(new_read, np.arange(len(t_ns)), 0))
+    return earliest[read_start]
+
+
+def recorded_times(timeline, headers, t_ns, earliest_ns):
+    """
+    Assign firmware times to the A0 samples of a recorded capture.
+
+    Args:
+        timeline: AdcTimeline of the capture, started at its C0 packet
+        headers: Header byte of every packet after the C0
+        t_ns: Receive time of every packet (ns)
+        earliest_ns: Earliest receive time of every packet (read_windows)
+
+    Returns:
+        float64 array of sample times in ms, ten per A0 packet
+    """
+    headers = np.asarray(headers)
+    frames = np.cumsum(headers == ADC_HEADER)  # A0 packets up to each packet
+    status = np.flatnonzero(headers == STATUS_HEADER)
+    if len(status):
+        # One check per run of D0 packets: the last one has the latest receive time
+        last_of_run = np.append(frames[status[1:]] != frames[status[:-1]], True)
+        status = status[last_of_run]
+
+    parts = []
+    done = 0
+    for position in status:
+        count = int(frames[position]) * SAMPLES_PER_FRAME - done
+        received = (int(earliest_ns[position]), int(t_ns[position]))
+        parts.append(timeline.add(count, received, caught_up=count))
+        done += count
+    total = int(frames[-1]) * SAMPLES_PER_FRAME if len(frames) else 0
+    parts.append(timeline.add(total - done))
+    return np.concatenate(parts)